@@ -88,7 +88,7 @@ setup(
     package_data={
         'graph_notebook': ['graph_notebook/widgets/nbextensions/static/*.js',
                            'graph_notebook/widgets/labextension/*.tgz'],
-        '': ['*.ipynb', '*.html', '*.css', '*.js', '*.txt', '*.json', '*.ts', '*.css', '*.yaml', '*.md', '*.tgz']
+        '': ['*.ipynb', '*.html', '*.css', '*.js', '*.txt', '*.json', '*.ts', '*.css', '*.yaml', '*.md', '*.tgz', '*.gz']
     },
     cmdclass=cmd_class,
     classifiers=[
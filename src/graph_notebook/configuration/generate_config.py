@@ -48,11 +48,16 @@ class Configuration(object):
     def __init__(self, host: str, port: int,
                  auth_mode: AuthModeEnum = AuthModeEnum.DEFAULT,
                  load_from_s3_arn='', ssl: bool = True, aws_region: str = 'us-east-1',
-                 sparql_section: SparqlSection = None):
+                 sparql_section: SparqlSection = None, readers: list = None):
+        """
+        :param readers: reader endpoints, as "host" or "host:port", which read-only queries are load balanced
+                        across. Mutations are always sent to host.
+        """
         self.host = host
         self.port = port
         self.ssl = ssl
         self.sparql = sparql_section if sparql_section is not None else SparqlSection()
+        self.readers = readers if readers is not None else []
         if ".neptune.amazonaws.com" in self.host:
             self.is_neptune_config = True
             self.auth_mode = auth_mode
@@ -63,7 +68,7 @@ class Configuration(object):
 
     def to_dict(self) -> dict:
         if self.is_neptune_config:
-            return {
+            data = {
                 'host': self.host,
                 'port': self.port,
                 'auth_mode': self.auth_mode.value,
@@ -73,12 +78,15 @@ class Configuration(object):
                 'sparql': self.sparql.to_dict()
             }
         else:
-            return {
+            data = {
                 'host': self.host,
                 'port': self.port,
                 'ssl': self.ssl,
                 'sparql': self.sparql.to_dict()
             }
+        if self.readers:
+            data['readers'] = self.readers
+        return data
 
     def write_to_file(self, file_path=DEFAULT_CONFIG_LOCATION):
         data = self.to_dict()
@@ -89,9 +97,9 @@ class Configuration(object):
 
 
 def generate_config(host, port, auth_mode: AuthModeEnum = AuthModeEnum.DEFAULT, ssl: bool = True, load_from_s3_arn='',
-                    aws_region: str = 'us-east-1'):
+                    aws_region: str = 'us-east-1', readers: list = None):
     use_ssl = False if ssl in [False, 'False', 'false', 'FALSE'] else True
-    c = Configuration(host, port, auth_mode, load_from_s3_arn, use_ssl, aws_region)
+    c = Configuration(host, port, auth_mode, load_from_s3_arn, use_ssl, aws_region, readers=readers)
     return c
 
 
@@ -116,11 +124,14 @@ if __name__ == "__main__":
                         default=DEFAULT_CONFIG_LOCATION)
     parser.add_argument("--load_from_s3_arn", help="arn of role to use for bulk loader", default='')
     parser.add_argument("--aws_region", help="aws region your ml cluster is in.", default='us-east-1')
+    parser.add_argument("--readers", default='',
+                        help="comma separated reader endpoints (host or host:port) to send read-only queries to")
     args = parser.parse_args()
 
     auth_mode_arg = args.auth_mode if args.auth_mode != '' else AuthModeEnum.DEFAULT.value
+    readers_arg = [r.strip() for r in args.readers.split(',') if r.strip() != '']
     config = generate_config(args.host, int(args.port), AuthModeEnum(auth_mode_arg), args.ssl,
-                             args.load_from_s3_arn, args.aws_region)
+                             args.load_from_s3_arn, args.aws_region, readers_arg)
     config.write_to_file(args.config_destination)
 
     exit(0)
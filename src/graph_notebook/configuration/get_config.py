@@ -14,9 +14,11 @@ def get_config_from_dict(data: dict) -> Configuration:
     if ".neptune.amazonaws.com" in data['host']:
         config = Configuration(host=data['host'], port=data['port'], auth_mode=AuthModeEnum(data['auth_mode']),
                                ssl=data['ssl'], load_from_s3_arn=data['load_from_s3_arn'],
-                               aws_region=data['aws_region'], sparql_section=sparql_section)
+                               aws_region=data['aws_region'], sparql_section=sparql_section,
+                               readers=data.get('readers'))
     else:
-        config = Configuration(host=data['host'], port=data['port'], ssl=data['ssl'], sparql_section=sparql_section)
+        config = Configuration(host=data['host'], port=data['port'], ssl=data['ssl'], sparql_section=sparql_section,
+                               readers=data.get('readers'))
     return config
 
 
@@ -6,18 +6,31 @@ SPDX-License-Identifier: Apache-2.0
 import functools
 import json
 import re
+from typing import TYPE_CHECKING
 
 from IPython.core.display import HTML, display, clear_output
 
-import ipywidgets as widgets
-from graph_notebook.visualization.template_retriever import retrieve_template
-from gremlin_python.driver.protocol import GremlinServerError
+from graph_notebook.lazy_import import lazy_import
+from graph_notebook.visualization.template_retriever import LazyTemplate
+from graph_notebook.neptune.client import sparql_term
 from requests import HTTPError
 
-error_template = retrieve_template("error.html")
+if TYPE_CHECKING:
+    from gremlin_python.driver.protocol import GremlinServerError
+
+widgets = lazy_import('ipywidgets')
+error_template = LazyTemplate("error.html")
 
 check_if_dict_access_regex = re.compile(r'^[a-zA-Z0-9_]+((\[\'.*?\'\])|(\[\".*?\"\])|(\[.*?\]))+$')
 dict_name_regex = re.compile(r'^[^\[]*')
+variable_regex = re.compile(r'\$\{(.*?)}')
+quoted_variable_regex = re.compile(r'([\'"])\$\{([^}]*?)}\1(?!@|\^\^)')
+iri_variable_regex = re.compile(r'<\$\{([^}]*?)}>')
+sparql_iri_regex = re.compile(r'<[^<>"{}|^`\\\s]*>')
+
+# when this flag is passed to a magic, ${var} values are sent as bindings/parameters instead of being injected
+BIND_VARIABLES_FLAG = '--bind-variables'
+BINDING_NAME_PREFIX = '_p'
 
 
 def get_variable_injection_dict_and_indices(raw_var: str, keys_are_str: bool = True):
@@ -34,7 +47,7 @@ def get_variable_injection_dict_and_indices(raw_var: str, keys_are_str: bool = T
     return dict_name, keys_list
 
 
-def get_variable_injection_value(raw_var: str, local_ns: dict):
+def get_variable_raw_value(raw_var: str, local_ns: dict):
     # check if var string is trying to access a dict
     if re.match(check_if_dict_access_regex, raw_var):
         dict_name, keys_list = get_variable_injection_dict_and_indices(raw_var)
@@ -43,14 +56,122 @@ def get_variable_injection_value(raw_var: str, local_ns: dict):
         # loop through the nested keys/values until we get the final value
         for key in keys_list:
             current_dict = current_dict[key]
-        final_value = json.dumps(current_dict) if type(current_dict) is dict else str(current_dict)
-        return final_value
+        return current_dict
     else:
-        final_value = local_ns[raw_var]
-        if type(final_value) is dict:
-            return json.dumps(final_value)
-        else:
-            return str(final_value)
+        return local_ns[raw_var]
+
+
+def get_variable_injection_value(raw_var: str, local_ns: dict):
+    final_value = get_variable_raw_value(raw_var, local_ns)
+    if type(final_value) is dict:
+        return json.dumps(final_value)
+    else:
+        return str(final_value)
+
+
+def inject_query_variables(query: str, local_ns: dict) -> str:
+    return variable_regex.sub(lambda m: get_variable_injection_value(raw_var=m.group(1), local_ns=local_ns), query)
+
+
+def is_scalar_binding_value(value) -> bool:
+    return type(value) in [int, float, bool]
+
+
+def bind_query_variables(query: str, local_ns: dict, language: str):
+    """
+    Replaces the ${var} references in a query with bindings/parameters, so that queries which only differ in the
+    values of their variables share the same query text and can reuse the server's compiled scripts and plans.
+
+    Only references where a binding is equivalent to injecting the value as text are bound:
+        - a reference making up a whole string literal, such as '${id}', is bound as a string.
+        - for gremlin/openCypher, a bare reference to a number, boolean, or a list of those or of strings.
+        - for SPARQL, a reference making up a whole IRI, such as <${uri}>, is bound as an IRI. Bare references
+          are injected as text, as they may be used where a variable is not allowed, such as in LIMIT.
+    Every other reference, such as one inside a longer string literal or one holding a string of query text,
+    is injected as text as before.
+
+    :param language: one of gremlin, opencypher or sparql
+    :return: the rewritten query and a dict of binding names to values. For SPARQL, the values are already
+             rendered as RDF terms for a VALUES block, see graph_notebook.neptune.client.add_sparql_values_block.
+    """
+    sparql = language == 'sparql'
+    placeholder_prefix = {'gremlin': '', 'opencypher': '$', 'sparql': '?'}[language]
+    bindings = {}
+    binding_names = {}
+
+    def bind(raw_var, value, kind):
+        key = (raw_var, kind)
+        if key not in binding_names:
+            name = f'{BINDING_NAME_PREFIX}{len(binding_names)}'
+            binding_names[key] = name
+            bindings[name] = sparql_term(value, iri=kind == 'iri') if sparql else value
+        return placeholder_prefix + binding_names[key]
+
+    def bindable(value):
+        if sparql:
+            return False
+        if is_scalar_binding_value(value):
+            return True
+        if type(value) in [list, tuple]:
+            return all(is_scalar_binding_value(v) or type(v) is str for v in value)
+        return False
+
+    out = []
+    pos = 0
+    quote = None
+    while pos < len(query):
+        if query.startswith('${', pos):
+            m = variable_regex.match(query, pos)
+            if m:
+                value = get_variable_raw_value(m.group(1), local_ns)
+                if quote is None and bindable(value):
+                    out.append(bind(m.group(1), list(value) if type(value) is tuple else value, 'value'))
+                else:
+                    out.append(get_variable_injection_value(m.group(1), local_ns))
+                pos = m.end()
+                continue
+
+        c = query[pos]
+        if quote is not None:
+            if c == '\\':
+                out.append(query[pos:pos + 2])
+                pos += 2
+                continue
+            if c == quote:
+                quote = None
+        elif c in '\'"':
+            m = quoted_variable_regex.match(query, pos)
+            if m:
+                out.append(bind(m.group(2), get_variable_injection_value(m.group(2), local_ns), 'string'))
+                pos = m.end()
+                continue
+            quote = c
+        elif c == '`':
+            quote = c
+        elif sparql and c == '<':
+            m = iri_variable_regex.match(query, pos) or sparql_iri_regex.match(query, pos)
+            if m and m.re is iri_variable_regex:
+                out.append(bind(m.group(1), get_variable_injection_value(m.group(1), local_ns), 'iri'))
+                pos = m.end()
+                continue
+            elif m:
+                # copy IRIs as they are, so that a '#' in them is not mistaken for a comment
+                out.append(m.group(0))
+                pos = m.end()
+                continue
+        elif (sparql and c == '#') or (not sparql and query.startswith('//', pos)):
+            # comments are copied as they are, a quote in them does not start a string literal
+            end = query.find('\n', pos)
+            end = len(query) if end == -1 else end
+            out.append(variable_regex.sub(lambda v: get_variable_injection_value(v.group(1), local_ns),
+                                          query[pos:end]))
+            pos = end
+            continue
+
+        out.append(c)
+        pos += 1
+
+    return ''.join(out), bindings
 
 
 def display_exceptions(func):
@@ -67,12 +188,15 @@ def display_exceptions(func):
         except HTTPError as http_ex:
             caught_ex = http_ex
             raw_html = http_ex_to_html(http_ex)
-        except GremlinServerError as gremlin_ex:
-            caught_ex = gremlin_ex
-            raw_html = gremlin_server_error_to_html(gremlin_ex)
         except Exception as e:
+            # imported on failure, so that loading the magics does not import the Gremlin driver
+            from gremlin_python.driver.protocol import GremlinServerError
+
             caught_ex = e
-            raw_html = exception_to_html(e)
+            if isinstance(e, GremlinServerError):
+                raw_html = gremlin_server_error_to_html(e)
+            else:
+                raw_html = exception_to_html(e)
 
         if 'local_ns' in kwargs:
             kwargs['local_ns']['graph_notebook_error'] = caught_ex
@@ -93,15 +217,15 @@ def magic_variables(func):
     def use_magic_variables(*args, **kwargs):
         local_ns = kwargs['local_ns']
         args = list(args)
-        variable_regex = re.compile(r'\$\{(.*?)}')
         try:
             # If we want to use custom line magic variables with the same syntax:
             # line_string = args[1]
             # args[1] = variable_regex.sub(lambda m: str(local_ns[m.group(1)]), line_string)
-            if len(args) > 2:
-                cell_string = args[2]
-                args[2] = variable_regex.sub(
-                    lambda m: get_variable_injection_value(raw_var=m.group(1), local_ns=local_ns), cell_string)
+            if len(args) > 2 and BIND_VARIABLES_FLAG in str(args[1]).split():
+                # the magic binds the variables itself, see bind_query_variables
+                pass
+            elif len(args) > 2:
+                args[2] = inject_query_variables(args[2], local_ns)
             return func(*args, **kwargs)
         except KeyError as key_error:
             print(f'Terminated query due to undefined variable: {key_error}')
@@ -130,7 +254,7 @@ def exception_to_html(ex: Exception):
     return error_html
 
 
-def gremlin_server_error_to_html(gremlin_ex: GremlinServerError):
+def gremlin_server_error_to_html(gremlin_ex: 'GremlinServerError'):
     try:
         error = json.loads(gremlin_ex.args[0][5:])  # remove the leading error code.
         content = json.dumps(error, indent=2)
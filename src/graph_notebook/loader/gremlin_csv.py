@@ -0,0 +1,331 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import csv
+import datetime
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from graph_notebook.neptune.client import Client
+
+logger = logging.getLogger('gremlin_csv')
+
+DEFAULT_CSV_LOAD_CONCURRENCY = 4
+DEFAULT_CSV_LOAD_BATCH_SIZE = 100
+
+ID_COLUMN = '~id'
+LABEL_COLUMN = '~label'
+FROM_COLUMN = '~from'
+TO_COLUMN = '~to'
+SYSTEM_COLUMNS = [ID_COLUMN, LABEL_COLUMN, FROM_COLUMN, TO_COLUMN]
+
+DEFAULT_VERTEX_LABEL = 'vertex'
+DEFAULT_EDGE_LABEL = 'edge'
+ARRAY_SEPARATOR = ';'
+# the Neptune loader stores a vertex with several labels as the labels joined with this
+MULTI_LABEL_SEPARATOR = '::'
+
+# status names match those of the Neptune bulk loader, see FINAL_LOAD_STATUSES
+LOAD_COMPLETED = 'LOAD_COMPLETED'
+LOAD_FAILED = 'LOAD_FAILED'
+LOAD_IN_PROGRESS = 'LOAD_IN_PROGRESS'
+
+# the date formats accepted by the Neptune bulk loader
+NEPTUNE_DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%dT%H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%SZ']
+
+
+def _to_bool(value: str) -> bool:
+    if value.lower() in ['true', '1']:
+        return True
+    if value.lower() in ['false', '0']:
+        return False
+    raise ValueError(f'{value} is not a boolean')
+
+
+def _to_date(value: str) -> datetime.datetime:
+    for date_format in NEPTUNE_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f'{value} is not a date in one of the formats {NEPTUNE_DATE_FORMATS}')
+
+
+GREMLIN_CSV_TYPES = {
+    'bool': _to_bool,
+    'boolean': _to_bool,
+    'byte': int,
+    'short': int,
+    'int': int,
+    'long': int,
+    'float': float,
+    'double': float,
+    'string': str,
+    'date': _to_date
+}
+
+
+class CsvColumn(object):
+    """
+    A column of a Neptune Gremlin load format CSV, as described by its header.
+
+    Ex. 'genre:String[]' -> CsvColumn('genre', 'string', array=True)
+        'age:Int(single)' -> CsvColumn('age', 'int', cardinality='single')
+    """
+
+    def __init__(self, header: str):
+        self.header = header
+        self.system = header.lower() in SYSTEM_COLUMNS
+        if self.system:
+            self.name, self.type, self.array, self.cardinality = header.lower(), 'string', False, None
+            return
+
+        name, _, type_name = header.rpartition(':')
+        if name == '' or type_name == '':
+            name, type_name = header, 'string'
+        type_name = type_name.strip().lower()
+
+        self.cardinality = None
+        if type_name.endswith(')') and '(' in type_name:
+            type_name, _, cardinality = type_name[:-1].partition('(')
+            self.cardinality = cardinality.strip()
+        self.array = type_name.endswith('[]')
+        if self.array:
+            type_name = type_name[:-2]
+        if type_name not in GREMLIN_CSV_TYPES:
+            raise ValueError(f'unsupported type "{type_name}" in CSV header "{header}"')
+
+        self.name = name.strip()
+        self.type = type_name
+
+    def convert(self, value: str):
+        """
+        :return: the typed values of a cell, a list for array columns.
+        """
+        convert = GREMLIN_CSV_TYPES[self.type]
+        if self.array:
+            return [convert(v) for v in value.split(ARRAY_SEPARATOR) if v != '']
+        return convert(value)
+
+
+def is_edge_file(columns: list) -> bool:
+    names = [c.name for c in columns if c.system]
+    return FROM_COLUMN in names and TO_COLUMN in names
+
+
+def build_vertex_batch(columns: list, rows: list) -> tuple:
+    """
+    Builds a single traversal adding every vertex of the batch, with all values sent as bindings. Each vertex is
+    added in its own union branch, and the traversal returns the number of vertices added.
+
+    :param rows: (label, id, [(column index, value), ...]) for each vertex
+    :return: the traversal, and its bindings
+    """
+    bindings = {}
+    branches = []
+    for r, (label, vertex_id, values) in enumerate(rows):
+        bindings[f'l{r}'] = label
+        steps = [f'__.addV(l{r})']
+        if vertex_id is not None:
+            bindings[f'i{r}'] = vertex_id
+            steps.append(f'property(T.id, i{r})')
+        for c, value in values:
+            bindings[f'k{c}'] = columns[c].name
+            if columns[c].array:
+                for v, entry in enumerate(value):
+                    bindings[f'p{r}_{c}_{v}'] = entry
+                    steps.append(f'property(set, k{c}, p{r}_{c}_{v})')
+            elif columns[c].cardinality == 'single':
+                bindings[f'p{r}_{c}'] = value
+                steps.append(f'property(single, k{c}, p{r}_{c})')
+            else:
+                bindings[f'p{r}_{c}'] = value
+                steps.append(f'property(k{c}, p{r}_{c})')
+        branches.append('.'.join(steps))
+    return f"g.inject(1).union({', '.join(branches)}).count()", bindings
+
+
+def build_edge_batch(columns: list, rows: list) -> tuple:
+    """
+    Like build_vertex_batch, for (label, id, from id, to id, [(column index, value), ...]) rows. An edge between
+    vertices which do not exist is skipped, and not counted. Both vertices are looked up before the edge is added,
+    as to() fails the whole traversal, and so every other edge of the batch, when it is given no vertex.
+    """
+    bindings = {}
+    branches = []
+    for r, (label, edge_id, from_id, to_id, values) in enumerate(rows):
+        bindings[f'l{r}'] = label
+        bindings[f'f{r}'] = from_id
+        bindings[f't{r}'] = to_id
+        steps = [f"__.V(t{r}).as('t').V(f{r}).addE(l{r}).to('t')"]
+        if edge_id is not None:
+            bindings[f'i{r}'] = edge_id
+            steps.append(f'property(T.id, i{r})')
+        for c, value in values:
+            bindings[f'k{c}'] = columns[c].name
+            bindings[f'p{r}_{c}'] = value
+            steps.append(f'property(k{c}, p{r}_{c})')
+        branches.append('.'.join(steps))
+    return f"g.inject(1).union({', '.join(branches)}).count()", bindings
+
+
+def iter_csv_batches(path: str, batch_size: int = DEFAULT_CSV_LOAD_BATCH_SIZE, allow_empty_strings: bool = False,
+                     on_error: Callable[[str, str], None] = None):
+    """
+    Reads a Neptune Gremlin load format CSV in batches of :param batch_size records, without reading the whole
+    file into memory.
+
+    :param on_error: called with the kind of error, 'parsingErrors' or 'datatypeMismatchErrors', and a message, for
+                     every record which is skipped
+    :return: a generator of (traversal, bindings, record count) for each batch
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [CsvColumn(h) for h in header]
+        index = {c.name: i for i, c in enumerate(columns) if c.system}
+        edges = is_edge_file(columns)
+        build = build_edge_batch if edges else build_vertex_batch
+
+        batch = []
+        for line_number, record in enumerate(reader, start=2):
+            if not record:
+                continue
+            if len(record) != len(columns):
+                if on_error is not None:
+                    on_error('parsingErrors', f'{path}:{line_number} has {len(record)} values, '
+                                              f'expected {len(columns)}')
+                continue
+
+            try:
+                values = []
+                for c, column in enumerate(columns):
+                    if column.system:
+                        continue
+                    if record[c] == '' and not (allow_empty_strings and column.type == 'string'):
+                        continue
+                    values.append((c, column.convert(record[c])))
+            except ValueError as e:
+                if on_error is not None:
+                    on_error('datatypeMismatchErrors', f'{path}:{line_number} {e}')
+                continue
+
+            record_id = record[index[ID_COLUMN]] if ID_COLUMN in index and record[index[ID_COLUMN]] != '' else None
+            label = record[index[LABEL_COLUMN]] if LABEL_COLUMN in index else ''
+            if edges:
+                batch.append((label or DEFAULT_EDGE_LABEL, record_id, record[index[FROM_COLUMN]],
+                              record[index[TO_COLUMN]], values))
+            else:
+                label = MULTI_LABEL_SEPARATOR.join(part for part in label.split(ARRAY_SEPARATOR) if part != '')
+                batch.append((label or DEFAULT_VERTEX_LABEL, record_id, values))
+
+            if len(batch) >= batch_size:
+                yield build(columns, batch) + (len(batch),)
+                batch = []
+
+        if batch:
+            yield build(columns, batch) + (len(batch),)
+
+
+def list_csv_files(source: str) -> list:
+    """
+    :return: the CSV files of a file or directory source, with every vertex file ahead of the edge files so
+             that edges are only added once the vertices they connect exist.
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in sorted(os.listdir(source)) if name.lower().endswith('.csv')]
+    else:
+        paths = [source]
+
+    vertex_files = []
+    edge_files = []
+    for path in paths:
+        with open(path, newline='', encoding='utf-8') as f:
+            header = next(csv.reader(f), [])
+        (edge_files if is_edge_file([CsvColumn(h) for h in header]) else vertex_files).append(path)
+    return vertex_files + edge_files
+
+
+def load_gremlin_csv(client: Client, source: str, concurrency: int = DEFAULT_CSV_LOAD_CONCURRENCY,
+                     batch_size: int = DEFAULT_CSV_LOAD_BATCH_SIZE, fail_on_error: bool = False,
+                     allow_empty_strings: bool = False, on_progress: Callable[[dict], None] = None) -> dict:
+    """
+    Loads a Neptune Gremlin load format CSV file, or a directory of them, through Gremlin traversals instead of the
+    Neptune bulk loader. This works against any Gremlin Server, such as a local TinkerGraph, where the bulk loader
+    is not available. Every batch of records is added by one traversal with its values sent as bindings, and at
+    most :param concurrency batches are in flight at once over a pooled connection.
+
+    :param on_progress: called after every batch with the current status
+    :return: the status of the load, in the same shape as the overallStatus of a Neptune bulk load status
+    """
+    concurrency = max(1, concurrency)
+    status = {
+        'fullUri': source,
+        'status': LOAD_IN_PROGRESS,
+        'totalTimeSpent': 0,
+        'totalRecords': 0,
+        'insertErrors': 0,
+        'parsingErrors': 0,
+        'datatypeMismatchErrors': 0,
+        'recordsPerSecond': 0,
+        'errors': []
+    }
+    start = time.time()
+
+    def on_error(kind: str, message: str):
+        status[kind] += 1
+        status['errors'].append(message)
+
+    def submit(traversal: str, bindings: dict):
+        return connection.submit(traversal, bindings).all().result()
+
+    def collect(path: str, record_count: int, future) -> bool:
+        try:
+            added = future.result()[0]
+        except Exception as e:
+            added = 0
+            status['errors'].append(f'{path}: {e}')
+        status['totalRecords'] += added
+        status['insertErrors'] += record_count - added
+        elapsed = time.time() - start
+        status['totalTimeSpent'] = int(elapsed)
+        status['recordsPerSecond'] = round(status['totalRecords'] / elapsed, 1) if elapsed > 0 else 0
+        if on_progress is not None:
+            on_progress(status)
+        return added == record_count
+
+    connection = client.get_gremlin_connection(pool_size=concurrency)
+    failed = False
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for path in list_csv_files(source):
+                # edges can only be added once the vertices, and the edges of earlier files, have all been added.
+                pending = deque()
+                for traversal, bindings, record_count in iter_csv_batches(path, batch_size, allow_empty_strings,
+                                                                          on_error):
+                    pending.append((path, record_count, executor.submit(submit, traversal, bindings)))
+                    while len(pending) >= concurrency * 2 or (pending and pending[0][2].done()):
+                        failed = not collect(*pending.popleft()) or failed
+                    if fail_on_error and (failed or status['parsingErrors'] or status['datatypeMismatchErrors']):
+                        break
+                while pending:
+                    failed = not collect(*pending.popleft()) or failed
+                if fail_on_error and (failed or status['parsingErrors'] or status['datatypeMismatchErrors']):
+                    break
+    finally:
+        connection.close()
+
+    has_errors = failed or status['parsingErrors'] or status['datatypeMismatchErrors']
+    status['status'] = LOAD_FAILED if fail_on_error and has_errors else LOAD_COMPLETED
+    elapsed = time.time() - start
+    status['totalTimeSpent'] = int(elapsed)
+    status['recordsPerSecond'] = round(status['totalRecords'] / elapsed, 1) if elapsed > 0 else 0
+    return status
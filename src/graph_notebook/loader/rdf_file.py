@@ -0,0 +1,380 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import gzip
+import io
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+import requests
+
+from graph_notebook.neptune.client import Client, FORMAT_NTRIPLE, FORMAT_NQUADS, FORMAT_TURTLE
+
+logger = logging.getLogger('rdf_file')
+
+RDF_FILE_FORMATS = [FORMAT_NTRIPLE, FORMAT_NQUADS, FORMAT_TURTLE]
+RDF_FILE_EXTENSIONS = {
+    '.nt': FORMAT_NTRIPLE,
+    '.nq': FORMAT_NQUADS,
+    '.ttl': FORMAT_TURTLE
+}
+
+DEFAULT_LOAD_CONCURRENCY = 4
+DEFAULT_LOAD_BATCH_BYTES = 512 * 1024
+DEFAULT_LOAD_BATCH_STATEMENTS = 5000
+DEFAULT_LOAD_MAX_RETRIES = 3
+DEFAULT_LOAD_RETRY_BACKOFF = 1  # seconds
+
+# a batch answered with one of these is too large for the endpoint, and is split in half and sent again.
+PAYLOAD_TOO_LARGE_STATUS_CODES = [413]
+
+PROLOGUE = 'prologue'
+TRIPLES = 'triples'
+
+NQUADS_TERM = re.compile(r'<[^>]*>|_:[^\s.]+(?:\.[^\s.]+)*|"(?:[^"\\]|\\.)*"(?:@[A-Za-z0-9-]+|\^\^<[^>]*>)?')
+TURTLE_DIRECTIVE = re.compile(r'@?(prefix|base)\s+(.*?)\s*\.?$', re.IGNORECASE | re.DOTALL)
+SPARQL_DIRECTIVE = re.compile(r'(prefix|base)\s', re.IGNORECASE)
+NON_SPACE = re.compile(r'\S')
+TURTLE_SPECIAL = re.compile(r'[#"\'<\[\]().]')
+STRING_END = {delimiter: re.compile(r'\\|' + delimiter) for delimiter in ['"', "'", '"""', "'''"]}
+
+
+def detect_rdf_format(path: str) -> str:
+    """
+    Ex. 'airports.nt.gz' -> 'ntriples'
+    """
+    name = path[:-len('.gz')] if path.endswith('.gz') else path
+    extension = os.path.splitext(name)[1].lower()
+    if extension not in RDF_FILE_EXTENSIONS:
+        raise ValueError(f'cannot tell the format of {path} from its extension, specify one of {RDF_FILE_FORMATS}')
+    return RDF_FILE_EXTENSIONS[extension]
+
+
+def iter_ntriples_statements(lines: Iterable[str], quads: bool = False):
+    """
+    Yields (TRIPLES, graph, statement) for each line of an N-Triples or N-Quads document. The graph is None
+    for triples in the default graph.
+    """
+    for line in lines:
+        line = line.strip()
+        if line == '' or line.startswith('#'):
+            continue
+        if not quads:
+            yield TRIPLES, None, line
+            continue
+
+        terms = NQUADS_TERM.findall(line)
+        if len(terms) == 4:
+            yield TRIPLES, terms[3], f'{terms[0]} {terms[1]} {terms[2]} .'
+        else:
+            yield TRIPLES, None, line
+
+
+def iter_turtle_statements(lines: Iterable[str]):
+    """
+    Splits a Turtle document into its statements in a single pass, without parsing them. A statement ends at a '.'
+    which is outside of any IRI, string, comment or bracket, and is followed by whitespace or the end of the input.
+
+    Yields (PROLOGUE, name, declaration) for each @prefix, @base, PREFIX or BASE directive, where the declaration
+    is in SPARQL syntax, and (TRIPLES, None, statement) for every other statement.
+    """
+    buffer = []
+    state = None  # the delimiter of the IRI or string being read, if any
+    depth = 0
+    at_start = True
+    sparql_directive = False
+
+    def emit(text):
+        text = text.strip()
+        if text == '':
+            return None
+        m = TURTLE_DIRECTIVE.match(text)
+        if m is not None and (text[0] == '@' or sparql_directive):
+            keyword = m.group(1).upper()
+            if keyword == 'BASE':
+                return PROLOGUE, 'BASE', f'BASE {m.group(2)}'
+            name = m.group(2).split(':', 1)[0].strip()
+            return PROLOGUE, name, f'PREFIX {m.group(2)}'
+        return TRIPLES, None, text
+
+    for line in lines:
+        i = 0
+        start = 0
+        n = len(line)
+        while i < n:
+            if state is None:
+                if at_start:
+                    m = NON_SPACE.search(line, i)
+                    if m is None:
+                        break
+                    i = m.start()
+                    if line[i] != '#':
+                        at_start = False
+                        sparql_directive = SPARQL_DIRECTIVE.match(line, i) is not None
+                # jump straight to the next character which can change the state of the scan
+                m = TURTLE_SPECIAL.search(line, i)
+                if m is None:
+                    break
+                i = m.start()
+                c = line[i]
+                if c == '#':
+                    buffer.append(line[start:i])
+                    buffer.append('\n')
+                    start = n
+                    break
+                elif c == '"' or c == "'":
+                    state = c * 3 if line.startswith(c * 3, i) else c
+                    i += len(state)
+                    continue
+                elif c == '<':
+                    state = '>'
+                elif c in '[(':
+                    depth += 1
+                elif c in '])':
+                    depth -= 1
+                elif depth == 0 and (i + 1 == n or line[i + 1].isspace() or line[i + 1] == '#'):
+                    buffer.append(line[start:i + 1])
+                    statement = emit(''.join(buffer))
+                    if statement is not None:
+                        yield statement
+                    buffer = []
+                    start = i + 1
+                    at_start = True
+            elif state == '>':
+                i = line.find('>', i)
+                if i == -1:
+                    break
+                state = None
+                if sparql_directive:
+                    # SPARQL style directives are not terminated by a '.'
+                    buffer.append(line[start:i + 1])
+                    statement = emit(''.join(buffer))
+                    if statement is not None:
+                        yield statement
+                    buffer = []
+                    start = i + 1
+                    at_start = True
+                    sparql_directive = False
+            else:
+                m = STRING_END[state].search(line, i)
+                if m is None:
+                    break
+                i = m.start()
+                if line[i] == '\\':
+                    i += 2
+                    continue
+                i += len(state)
+                state = None
+                continue
+            i += 1
+        buffer.append(line[start:])
+
+    statement = emit(''.join(buffer))
+    if statement is not None:
+        yield statement
+
+
+def iter_rdf_statements(lines: Iterable[str], rdf_format: str):
+    if rdf_format == FORMAT_NTRIPLE:
+        return iter_ntriples_statements(lines)
+    elif rdf_format == FORMAT_NQUADS:
+        return iter_ntriples_statements(lines, quads=True)
+    elif rdf_format == FORMAT_TURTLE:
+        return iter_turtle_statements(lines)
+    raise ValueError(f'rdf_format must be one of {RDF_FILE_FORMATS}')
+
+
+def build_insert_data(prologue: list, statements: list) -> str:
+    """
+    :param prologue: the PREFIX and BASE declarations the statements depend on
+    :param statements: (graph, statement) pairs, where graph is None for the default graph
+    """
+    graphs = {}
+    for graph, statement in statements:
+        graphs.setdefault(graph, []).append(statement)
+
+    parts = list(prologue)
+    parts.append('INSERT DATA {')
+    for graph, graph_statements in graphs.items():
+        if graph is None:
+            parts.extend(graph_statements)
+        else:
+            parts.append(f'GRAPH {graph} {{')
+            parts.extend(graph_statements)
+            parts.append('}')
+    parts.append('}')
+    return '\n'.join(parts)
+
+
+class InsertBatch(object):
+    def __init__(self, prologue: list, statements: list, size: int, source_offset: int):
+        """
+        :param size: the number of characters in the statements of the batch
+        :param source_offset: how far into the source file reading had got when the batch was complete
+        """
+        self.prologue = prologue
+        self.statements = statements
+        self.size = size
+        self.source_offset = source_offset
+
+    def update(self) -> str:
+        return build_insert_data(self.prologue, self.statements)
+
+    def split(self) -> list:
+        middle = len(self.statements) // 2
+        first, second = self.statements[:middle], self.statements[middle:]
+        first_size = sum(len(s) for _, s in first)
+        return [InsertBatch(self.prologue, first, first_size, self.source_offset),
+                InsertBatch(self.prologue, second, self.size - first_size, self.source_offset)]
+
+
+def iter_insert_batches(statements, max_bytes: int = DEFAULT_LOAD_BATCH_BYTES,
+                        max_statements: int = DEFAULT_LOAD_BATCH_STATEMENTS, offset: Callable[[], int] = None):
+    """
+    Groups statements into InsertBatches of at most :param max_statements statements, which are closed as soon as
+    their statements add up to :param max_bytes characters.
+
+    :param statements: as yielded by iter_rdf_statements
+    :param offset: returns how far into the source the statements have been read, for progress reporting
+    """
+    prologue = {}
+    batch = []
+    size = 0
+    for kind, name, statement in statements:
+        if kind == PROLOGUE:
+            if prologue.get(name) != statement:
+                # statements already in the batch must be sent with the declaration they were written against
+                if batch:
+                    yield InsertBatch(list(prologue.values()), batch, size, offset() if offset else 0)
+                    batch = []
+                    size = 0
+                prologue[name] = statement
+            continue
+
+        batch.append((name, statement))
+        size += len(statement)
+        if size >= max_bytes or len(batch) >= max_statements:
+            yield InsertBatch(list(prologue.values()), batch, size, offset() if offset else 0)
+            batch = []
+            size = 0
+
+    if batch:
+        yield InsertBatch(list(prologue.values()), batch, size, offset() if offset else 0)
+
+
+def open_rdf_file(path: str):
+    """
+    :return: the raw file, whose position tracks how much of it has been read, and a text stream of its
+             (decompressed, if it ends in .gz) contents.
+    """
+    raw = open(path, 'rb')
+    stream = gzip.GzipFile(fileobj=raw) if path.endswith('.gz') else raw
+    return raw, io.TextIOWrapper(stream, encoding='utf-8')
+
+
+def load_rdf_file(client: Client, path: str, rdf_format: str = None,
+                  concurrency: int = DEFAULT_LOAD_CONCURRENCY, batch_bytes: int = DEFAULT_LOAD_BATCH_BYTES,
+                  batch_statements: int = DEFAULT_LOAD_BATCH_STATEMENTS, max_retries: int = DEFAULT_LOAD_MAX_RETRIES,
+                  retry_backoff: float = DEFAULT_LOAD_RETRY_BACKOFF, sparql_path: str = '',
+                  on_progress: Callable[[dict], None] = None) -> dict:
+    """
+    Streams a local N-Triples, N-Quads or Turtle file (optionally gzipped) into a SPARQL 1.1 endpoint as a series of
+    INSERT DATA updates, with at most :param concurrency updates in flight. Reading the file is paused while that
+    many updates are waiting, so memory use stays bounded however large the file is.
+
+    Inserting the same data twice leaves the graph unchanged, so failed updates are retried with backoff. Updates
+    which are rejected as too large are split in half and sent again.
+
+    NOTE: Blank node labels are scoped to a single update, so a blank node which is referenced from statements in
+    two different batches is loaded as two different blank nodes.
+
+    :param retry_backoff: base delay in seconds for the jittered exponential backoff between retries
+    :param on_progress: called after every batch with the stats below, and the size of the source file as 'total'
+    :return: {'statements': ..., 'batches': ..., 'failed_batches': ..., 'failed_statements': ..., 'bytes': ...,
+              'offset': ..., 'time': ..., 'errors': [...]}
+    """
+    if rdf_format is None:
+        rdf_format = detect_rdf_format(path)
+    if rdf_format not in RDF_FILE_FORMATS:
+        raise ValueError(f'rdf_format must be one of {RDF_FILE_FORMATS}')
+    concurrency = max(1, concurrency)
+
+    def send(batch: InsertBatch):
+        attempt = 0
+        while True:
+            try:
+                res = client.sparql_update(batch.update(), path=sparql_path)
+            except (requests.exceptions.RequestException, OSError) as e:
+                error = e
+            else:
+                if res.status_code in PAYLOAD_TOO_LARGE_STATUS_CODES and len(batch.statements) > 1:
+                    logger.debug(f'splitting a batch of {len(batch.statements)} statements which is too large')
+                    return sum((send(b) for b in batch.split()), [])
+                if res.status_code < 400:
+                    return [(batch, None)]
+                error = requests.exceptions.HTTPError(f'{res.status_code}: {res.text[:500]}', response=res)
+                if res.status_code < 500:
+                    # the update was rejected, sending it again will not change that
+                    return [(batch, error)]
+
+            if attempt >= max_retries:
+                return [(batch, error)]
+            attempt += 1
+            time.sleep(random.uniform(0, retry_backoff * (2 ** attempt)))
+
+    stats = {
+        'statements': 0,
+        'batches': 0,
+        'failed_batches': 0,
+        'failed_statements': 0,
+        'bytes': 0,
+        'offset': 0,
+        'total': os.path.getsize(path),
+        'time': 0,
+        'errors': []
+    }
+    start = time.time()
+
+    def collect(future):
+        for batch, error in future.result():
+            stats['batches'] += 1
+            stats['offset'] = max(stats['offset'], batch.source_offset)
+            if error is None:
+                stats['statements'] += len(batch.statements)
+                stats['bytes'] += batch.size
+            else:
+                stats['failed_batches'] += 1
+                stats['failed_statements'] += len(batch.statements)
+                stats['errors'].append(str(error))
+        stats['time'] = time.time() - start
+        if on_progress is not None:
+            on_progress(stats)
+
+    raw, text = open_rdf_file(path)
+    # the session must exist before the workers start so that they all share its connection pool.
+    client._ensure_http_session()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = deque()
+            statements = iter_rdf_statements(text, rdf_format)
+            for batch in iter_insert_batches(statements, batch_bytes, batch_statements, offset=raw.tell):
+                pending.append(executor.submit(send, batch))
+                while len(pending) >= concurrency * 2:
+                    collect(pending.popleft())
+            while pending:
+                collect(pending.popleft())
+    finally:
+        text.close()
+        raw.close()
+
+    stats['offset'] = stats['total']
+    stats['time'] = time.time() - start
+    return stats
@@ -6,56 +6,63 @@ SPDX-License-Identifier: Apache-2.0
 from __future__ import print_function  # Python 2/3 compatibility
 
 import argparse
+import itertools
 import logging
 import json
 import time
 import datetime
 import os
+import re
+import sqlite3
+import threading
 import uuid
 from enum import Enum
-from json import JSONDecodeError
-from graph_notebook.network.opencypher.OCNetwork import OCNetwork
 
-import ipywidgets as widgets
-from SPARQLWrapper import SPARQLWrapper
-from botocore.session import get_session
-from gremlin_python.driver.protocol import GremlinServerError
 from IPython.core.display import HTML, display_html, display
 from IPython.core.magic import (Magics, magics_class, cell_magic, line_magic, line_cell_magic, needs_local_scope)
-from ipywidgets.widgets.widget_description import DescriptionStyle
 from requests import HTTPError
 
 import graph_notebook
 from graph_notebook.configuration.generate_config import generate_default_config, DEFAULT_CONFIG_LOCATION, \
     AuthModeEnum, Configuration
-from graph_notebook.decorators.decorators import display_exceptions, magic_variables
-from graph_notebook.magics.ml import neptune_ml_magic_handler, generate_neptune_ml_parser
-from graph_notebook.magics.streams import StreamViewer
+from graph_notebook.decorators.decorators import display_exceptions, magic_variables, bind_query_variables, \
+    inject_query_variables, BIND_VARIABLES_FLAG
+from graph_notebook.loader.rdf_file import load_rdf_file, RDF_FILE_FORMATS, DEFAULT_LOAD_CONCURRENCY, \
+    DEFAULT_LOAD_BATCH_BYTES, DEFAULT_LOAD_BATCH_STATEMENTS, DEFAULT_LOAD_MAX_RETRIES
+from graph_notebook.loader.gremlin_csv import load_gremlin_csv, DEFAULT_CSV_LOAD_CONCURRENCY, \
+    DEFAULT_CSV_LOAD_BATCH_SIZE
 from graph_notebook.neptune.client import ClientBuilder, Client, VALID_FORMATS, PARALLELISM_OPTIONS, PARALLELISM_HIGH, \
     LOAD_JOB_MODES, MODE_AUTO, FINAL_LOAD_STATUSES, SPARQL_ACTION, FORMAT_CSV, FORMAT_OPENCYPHER, FORMAT_NTRIPLE, \
-    FORMAT_NQUADS, FORMAT_RDFXML, FORMAT_TURTLE
-from graph_notebook.network import SPARQLNetwork
-from graph_notebook.network.gremlin.GremlinNetwork import parse_pattern_list_str, GremlinNetwork
-from graph_notebook.visualization.rows_and_columns import sparql_get_rows_and_columns, opencypher_get_rows_and_columns
-from graph_notebook.visualization.template_retriever import retrieve_template
+    FORMAT_NQUADS, FORMAT_RDFXML, FORMAT_TURTLE, DEFAULT_QUERY_PLAN_WORKERS, DEFAULT_BATCH_CONCURRENCY, BATCH_LANGUAGES, \
+    add_sparql_values_block, batch_rows, get_sparql_query_type
+from graph_notebook.lazy_import import lazy_import
+from graph_notebook.visualization.rows_and_columns import sparql_get_rows_and_columns, sparql_has_rows_and_columns, \
+    opencypher_get_columns, OpenCypherColumns
+from graph_notebook.visualization.template_retriever import LazyTemplate
 from graph_notebook.configuration.get_config import get_config, get_config_from_dict
-from graph_notebook.seed.load_query import get_data_sets, get_queries, normalize_model_name
-from graph_notebook.widgets import Force
+from graph_notebook.seed.load_query import get_data_sets, get_batches, normalize_model_name
 from graph_notebook.options import OPTIONS_DEFAULT_DIRECTED, vis_options_merge
 from graph_notebook.magics.metadata import build_sparql_metadata_from_query, build_gremlin_metadata_from_query, \
-    build_opencypher_metadata_from_query
-
-sparql_table_template = retrieve_template("sparql_table.html")
-sparql_explain_template = retrieve_template("sparql_explain.html")
-sparql_construct_template = retrieve_template("sparql_construct.html")
-gremlin_table_template = retrieve_template("gremlin_table.html")
-opencypher_table_template = retrieve_template("opencypher_table.html")
-pre_container_template = retrieve_template("pre_container.html")
-loading_wheel_template = retrieve_template("loading_wheel.html")
-error_template = retrieve_template("error.html")
-
-loading_wheel_html = loading_wheel_template.render()
-DEFAULT_LAYOUT = widgets.Layout(max_height='600px', overflow='scroll', width='100%')
+    build_opencypher_metadata_from_query, PipelineStats
+from graph_notebook.magics.profile_history import ProfileHistory, DEFAULT_PROFILE_HISTORY_LOCATION, sparkline_points
+from graph_notebook.magics.lazy_tabs import LazyTabs, TAB_NAMES, parse_tab_names
+from graph_notebook.magics.query_history import QueryHistory, SnapshotClient, DEFAULT_QUERY_HISTORY_LOCATION
+
+# Query language drivers, networks, widgets and the ML and streams magics are imported on first use of the magics
+# which need them, to keep %load_ext graph_notebook.magics fast. test_import_time checks that this stays the case.
+widgets = lazy_import('ipywidgets')
+
+sparql_table_template = LazyTemplate("sparql_table.html")
+sparql_explain_template = LazyTemplate("sparql_explain.html")
+sparql_construct_template = LazyTemplate("sparql_construct.html")
+gremlin_table_template = LazyTemplate("gremlin_table.html")
+opencypher_table_template = LazyTemplate("opencypher_table.html")
+profile_history_template = LazyTemplate("profile_history.html")
+pre_container_template = LazyTemplate("pre_container.html")
+loading_wheel_template = LazyTemplate("loading_wheel.html")
+error_template = LazyTemplate("error.html")
+
+DEFAULT_LAYOUT = {'max_height': '600px', 'overflow': 'scroll', 'width': '100%'}
 
 logging.basicConfig()
 logger = logging.getLogger("graph_magic")
@@ -68,6 +75,14 @@ SPARQL_CANCEL_HINT_MSG = '''You must supply a string queryId when using --cancel
                             for example: %sparql_status --cancelQuery --queryId my-query-id'''
 OPENCYPHER_CANCEL_HINT_MSG = '''You must supply a string queryId when using --cancelQuery, 
                                 for example: %opencypher_status --cancelQuery --queryId my-query-id'''
+NO_GRAPH_MSG = 'No vertices or edges were found in the results to display as a graph.'
+ANALYZE_SCORES = ['pagerank', 'degree', 'betweenness']
+ANALYZE_GROUPS = {'components': 'component', 'communities': 'community'}
+# nodes with their label inside, like the default circles, are only sized by their value when their label scales
+ANALYZE_SCALING = {'label': {'enabled': True}}
+ANALYZE_PATH_GROUP = 'shortest path'
+ANALYZE_ALGORITHMS = ANALYZE_SCORES + list(ANALYZE_GROUPS) + ['shortest_path']
+ANALYZE_TITLES_SHOWN = 5
 SEED_LANGUAGE_OPTIONS = ['', 'Property_Graph', 'RDF']
 
 LOADER_FORMAT_CHOICES = ['']
@@ -110,6 +125,83 @@ def str_to_query_mode(s: str) -> QueryMode:
     return QueryMode.DEFAULT
 
 
+VARIANT_SEPARATOR_REGEX = re.compile(r'^\s*-{3,}\s*$', re.MULTILINE)
+GRID_PLACEHOLDER_REGEX = re.compile(r'\{\{\s*(\w+)\s*}}')
+
+
+def expand_query_variants(cell: str, split_variants: bool = False, grid: dict = None) -> list:
+    """
+    Expands a cell into the list of query variants to compare, returned as (name, query) tuples.
+
+    :param cell: the cell contents
+    :param split_variants: treat lines consisting only of --- as separators between independent query variants
+    :param grid: a dict mapping placeholder names to lists of values. Every combination of values is substituted
+                 into the {{name}} placeholders of each variant.
+    """
+    if split_variants:
+        queries = [q.strip() for q in VARIANT_SEPARATOR_REGEX.split(cell) if q.strip() != '']
+    else:
+        queries = [cell.strip()]
+
+    if not grid:
+        if len(queries) == 1:
+            return [('query', queries[0])]
+        return [(f'variant {i + 1}', q) for i, q in enumerate(queries)]
+
+    keys = list(grid.keys())
+    value_lists = [v if isinstance(v, (list, tuple)) else [v] for v in grid.values()]
+    variants = []
+    for i, q in enumerate(queries):
+        for combination in itertools.product(*value_lists):
+            values = dict(zip(keys, combination))
+            query = GRID_PLACEHOLDER_REGEX.sub(
+                lambda m: str(values[m.group(1)]) if m.group(1) in values else m.group(0), q)
+            name = ', '.join(f'{k}={v}' for k, v in values.items())
+            if len(queries) > 1:
+                name = f'variant {i + 1}: {name}'
+            variants.append((name, query))
+    return variants
+
+
+PARALLEL_HEADER_REGEX = re.compile(r'^\s*-{3,}[ \t]*(.*?)\s*$')
+PARALLEL_LANGUAGE_ALIASES = {'oc': 'opencypher'}
+
+
+def parse_parallel_queries(cell: str, default_language: str = 'gremlin') -> list:
+    """
+    Splits a %%graph_parallel cell into the queries to run, returned as (label, language, query) tuples.
+    Queries are separated by header lines of three or more dashes, which may be followed by the language of the
+    query and by a label, e.g. "--- opencypher routes per airport". The language defaults to
+    :param default_language and the label to the number of the query.
+    """
+    sections = []
+    header = ''
+    lines = []
+    for line in cell.splitlines() + ['---']:
+        match = PARALLEL_HEADER_REGEX.match(line)
+        if match is None:
+            lines.append(line)
+            continue
+        query = '\n'.join(lines).strip()
+        if query != '':
+            sections.append((header, query))
+        header = match.group(1)
+        lines = []
+
+    queries = []
+    for i, (header, query) in enumerate(sections):
+        words = header.split(maxsplit=1)
+        language = default_language
+        if words:
+            first = PARALLEL_LANGUAGE_ALIASES.get(words[0].lower(), words[0].lower())
+            if first in BATCH_LANGUAGES:
+                language = first
+                header = words[1] if len(words) > 1 else ''
+        label = header if header != '' else f'query {i + 1}'
+        queries.append((label, language, query))
+    return queries
+
+
 ACTION_TO_QUERY_TYPE = {
     'sparql': 'application/sparql-query',
     'sparqlupdate': 'application/sparql-update'
@@ -117,9 +209,7 @@ ACTION_TO_QUERY_TYPE = {
 
 
 def get_query_type(query):
-    s = SPARQLWrapper('')
-    s.setQuery(query)
-    return s.queryType
+    return get_sparql_query_type(query)
 
 
 def query_type_to_action(query_type):
@@ -140,9 +230,11 @@ class Graph(Magics):
         super(Graph, self).__init__(shell)
 
         self.graph_notebook_config = generate_default_config()
+        self._client: Client = None
+        self._client_config: Configuration = None
+        self._client_lock = threading.Lock()
         try:
             self.config_location = os.getenv('GRAPH_NOTEBOOK_CONFIG', DEFAULT_CONFIG_LOCATION)
-            self.client: Client = None
             self.graph_notebook_config = get_config(self.config_location)
         except FileNotFoundError:
             print('Could not find a valid configuration. '
@@ -150,30 +242,99 @@ class Graph(Magics):
 
         self.max_results = DEFAULT_MAX_RESULTS
         self.graph_notebook_vis_options = OPTIONS_DEFAULT_DIRECTED
+        # the network of the graph which was rendered last, which %graph_analyze runs on
+        self.last_network = None
         self._generate_client_from_config(self.graph_notebook_config)
+        try:
+            self.profile_store = ProfileHistory(os.getenv('GRAPH_NOTEBOOK_PROFILE_HISTORY',
+                                                          DEFAULT_PROFILE_HISTORY_LOCATION))
+        except sqlite3.Error as e:
+            logger.debug(f'Unable to open profile history, query runs will not be recorded: {e}')
+            self.profile_store = None
+        self.query_history = None
+        # every query result is kept unencrypted in the history, set GRAPH_NOTEBOOK_QUERY_HISTORY_ENABLED to false
+        # to turn it off
+        if os.getenv('GRAPH_NOTEBOOK_QUERY_HISTORY_ENABLED', 'true').lower() not in ['false', 'no', '0']:
+            try:
+                self.query_history = QueryHistory(os.getenv('GRAPH_NOTEBOOK_QUERY_HISTORY',
+                                                            DEFAULT_QUERY_HISTORY_LOCATION))
+            except sqlite3.Error as e:
+                logger.debug(f'Unable to open query history, query results will not be recorded: {e}')
         logger.setLevel(logging.ERROR)
 
     def _generate_client_from_config(self, config: Configuration):
-        if self.client:
-            self.client.close()
-
+        # the client is built by the first magic which uses it, so that loading the magics stays fast
+        with self._client_lock:
+            if self._client:
+                self._client.close()
+            self._client = None
+            self._client_config = config
+
+    @property
+    def client(self) -> Client:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._build_client(self._client_config)
+        return self._client
+
+    @client.setter
+    def client(self, client: Client):
+        self._client = client
+
+    @staticmethod
+    def _build_client(config: Configuration) -> Client:
         if ".neptune.amazonaws.com" in config.host:
             builder = ClientBuilder() \
                 .with_host(config.host) \
                 .with_port(config.port) \
                 .with_region(config.aws_region) \
                 .with_tls(config.ssl) \
-                .with_sparql_path(config.sparql.path)
+                .with_sparql_path(config.sparql.path) \
+                .with_readers(config.readers)
             if config.auth_mode == AuthModeEnum.IAM:
+                from botocore.session import get_session
+
                 builder = builder.with_iam(get_session())
         else:
             builder = ClientBuilder() \
                 .with_host(config.host) \
                 .with_port(config.port) \
                 .with_tls(config.ssl) \
-                .with_sparql_path(config.sparql.path)
+                .with_sparql_path(config.sparql.path) \
+                .with_readers(config.readers)
 
-        self.client = builder.build()
+        return builder.build()
+
+    def _warm_up_client(self):
+        """
+        Builds the client, and opens its connections in the background so that the next query does not wait on them.
+        Set GRAPH_NOTEBOOK_WARM_UP to false to turn this off.
+        """
+        if os.getenv('GRAPH_NOTEBOOK_WARM_UP', 'true').lower() in ['false', 'no', '0']:
+            return
+        client = self.client
+        threading.Thread(target=self._run_warm_up, args=(client,), daemon=True).start()
+
+    @staticmethod
+    def _run_warm_up(client: Client):
+        steps = client.warm_up()
+        logger.debug(f'Warmed up the client for {client.host}:{client.port}: {steps}')
+
+    def _record_profile(self, language: str, mode: str, query: str, metadata):
+        if self.profile_store is None or isinstance(self.client, SnapshotClient):
+            return
+        try:
+            self.profile_store.record(language, mode, query, metadata)
+        except sqlite3.Error as e:
+            logger.debug(f'Unable to record query run in profile history: {e}')
+
+    def _record_result(self, language: str, mode: str, line: str, query: str, result, metadata=None):
+        if self.query_history is None or isinstance(self.client, SnapshotClient):
+            return
+        query_time = metadata.get_metric_value('request_time') if metadata is not None else None
+        self.query_history.record_in_background(language, mode, line, query,
+                                                f'{self.client.host}:{self.client.port}', result, query_time)
 
     @line_cell_magic
     @display_exceptions
@@ -183,10 +344,13 @@ class Graph(Magics):
             config = get_config_from_dict(data)
             self.graph_notebook_config = config
             self._generate_client_from_config(config)
+            self._warm_up_client()
             print('set notebook config to:')
             print(json.dumps(self.graph_notebook_config.to_dict(), indent=2))
         elif line == 'reset':
             self.graph_notebook_config = get_config(self.config_location)
+            self._generate_client_from_config(self.graph_notebook_config)
+            self._warm_up_client()
             print('reset notebook config to:')
             print(json.dumps(self.graph_notebook_config.to_dict(), indent=2))
         elif line == 'silent':
@@ -217,6 +381,8 @@ class Graph(Magics):
         language = args.language
         limit = args.limit
         uri = self.client.get_uri_with_port()
+        from graph_notebook.magics.streams import StreamViewer
+
         viewer = StreamViewer(self.client,uri,language,limit=limit)
         viewer.show()
         
@@ -229,6 +395,7 @@ class Graph(Magics):
         # TODO: we should attempt to make a status call to this host before we set the config to this value.
         self.graph_notebook_config.host = line
         self._generate_client_from_config(self.graph_notebook_config)
+        self._warm_up_client()
         print(f'set host to {line}')
 
     @magic_variables
@@ -254,122 +421,124 @@ class Graph(Magics):
         parser.add_argument('-sd', '--simulation-duration', type=int, default=1500,
                             help='Specifies maximum duration of visualization physics simulation. Default is 1500ms')
         parser.add_argument('--silent', action='store_true', default=False, help="Display no query output.")
+        parser.add_argument('--tabs', type=parse_tab_names, default=None,
+                            help='Comma separated names of the result tabs to show, out of '
+                                 f'{", ".join(TAB_NAMES)}. Each tab is only rendered once it is selected. '
+                                 'Default is every tab.')
+        parser.add_argument(BIND_VARIABLES_FLAG, action='store_true', default=False,
+                            help='Send ${var} values as an inline VALUES block instead of injecting them into the query text, '
+                                 'so that repeated runs with different values reuse the same query plan.')
+        parser.add_argument('--trace-memory', action='store_true', default=False,
+                            help='Also trace the peak memory allocated by each stage of handling the result, and the '
+                                 'size of the graph sent to the front-end, in the Query Metadata tab. '
+                                 'Tracing slows the stages down.')
+        parser.add_argument('--store-stages-to', type=str, default='',
+                            help='store the time, memory and payload size of each stage of handling the result to '
+                                 'this variable. The table and graph stages are added once their tab is opened.')
         args = parser.parse_args(line.split())
         mode = str_to_query_mode(args.query_mode)
+        if args.bind_variables:
+            cell = self._bind_sparql_variables(cell, local_ns)
+        stats = PipelineStats(trace_memory=args.trace_memory)
+        store_to_ns(args.store_stages_to, stats, local_ns)
+        # classified once, and passed along to the client, so large updates are not scanned again for each use.
+        query_type = get_query_type(cell)
 
-        if not args.silent:
-            tab = widgets.Tab()
-            titles = []
-            children = []
-
-            first_tab_output = widgets.Output(layout=DEFAULT_LAYOUT)
-            children.append(first_tab_output)
+        tabs = LazyTabs(args.tabs, layout=DEFAULT_LAYOUT)
 
         path = args.path if args.path != '' else self.graph_notebook_config.sparql.path
         logger.debug(f'using mode={mode}')
         if mode == QueryMode.EXPLAIN:
-            res = self.client.sparql_explain(cell, args.explain_type, args.explain_format, path=path)
+            res = self.client.sparql_explain(cell, args.explain_type, args.explain_format, path=path,
+                                             query_type=query_type)
             res.raise_for_status()
             explain = res.content.decode('utf-8')
             store_to_ns(args.store_to, explain, local_ns)
-            if not args.silent:
-                sparql_metadata = build_sparql_metadata_from_query(query_type='explain', res=res)
-                titles.append('Explain')
-                first_tab_html = sparql_explain_template.render(table=explain)
+            sparql_metadata = build_sparql_metadata_from_query(query_type='explain', res=res)
+            self._record_profile('sparql', 'explain', cell, sparql_metadata)
+            self._record_result('sparql', 'explain', line, cell, res, sparql_metadata)
+            tabs.add('explain', 'Explain', lambda: display(HTML(sparql_explain_template.render(table=explain))))
         else:
-            query_type = get_query_type(cell)
             headers = {} if query_type not in ['SELECT', 'CONSTRUCT', 'DESCRIBE'] else {
                 'Accept': 'application/sparql-results+json'}
 
-            query_res = self.client.sparql(cell, path=path, headers=headers)
+            with stats.stage('receive') as stage:
+                query_res = self.client.sparql(cell, path=path, headers=headers, query_type=query_type)
+                stage['payload_bytes'] = len(query_res.content)
             query_res.raise_for_status()
-            results = query_res.json()
+            with stats.stage('decode'):
+                results = query_res.json()
             store_to_ns(args.store_to, results, local_ns)
-            try:
-                res = query_res.json()
-            except JSONDecodeError:
-                res = query_res.content.decode('utf-8')
-            store_to_ns(args.store_to, res, local_ns)
 
-            if not args.silent:
-                # Assign an empty value so we can always display to table output.
-                # We will only add it as a tab if the type of query allows it.
-                # Because of this, the table_output will only be displayed on the DOM if the query was of type SELECT.
-                first_tab_html = ""
-                query_type = get_query_type(cell)
-                if query_type in ['SELECT', 'CONSTRUCT', 'DESCRIBE']:
-                    logger.debug('creating sparql network...')
-
-                    titles.append('Table')
-                    sparql_metadata = build_sparql_metadata_from_query(query_type='query', res=query_res,
-                                                                       results=results, scd_query=True)
-
-                    sn = SPARQLNetwork(expand_all=args.expand_all)
-                    sn.extract_prefix_declarations_from_query(cell)
-                    try:
-                        sn.add_results(results)
-                    except ValueError as value_error:
-                        logger.debug(value_error)
-
-                    logger.debug(f'number of nodes is {len(sn.graph.nodes)}')
-                    if len(sn.graph.nodes) > 0:
-                        self.graph_notebook_vis_options['physics']['disablePhysicsAfterInitialSimulation'] \
-                            = args.stop_physics
-                        self.graph_notebook_vis_options['physics']['simulationDuration'] = args.simulation_duration
-                        f = Force(network=sn, options=self.graph_notebook_vis_options)
-                        titles.append('Graph')
-                        children.append(f)
-                        logger.debug('added sparql network to tabs')
-
-                    rows_and_columns = sparql_get_rows_and_columns(results)
-                    if rows_and_columns is not None:
-                        table_id = f"table-{str(uuid.uuid4())[:8]}"
-                        first_tab_html = sparql_table_template.render(columns=rows_and_columns['columns'],
-                                                                      rows=rows_and_columns['rows'], guid=table_id)
-
-                    # Handling CONSTRUCT and DESCRIBE on their own because we want to maintain the previous result
-                    # pattern of showing a tsv with each line being a result binding in addition to new ones.
-                    if query_type == 'CONSTRUCT' or query_type == 'DESCRIBE':
-                        lines = []
-                        for b in results['results']['bindings']:
-                            lines.append(f'{b["subject"]["value"]}\t{b["predicate"]["value"]}\t{b["object"]["value"]}')
-                        raw_output = widgets.Output(layout=DEFAULT_LAYOUT)
-                        with raw_output:
-                            html = sparql_construct_template.render(lines=lines)
-                            display(HTML(html))
-                        children.append(raw_output)
-                        titles.append('Raw')
-                else:
-                    sparql_metadata = build_sparql_metadata_from_query(query_type='query', res=query_res,
-                                                                       results=results)
-
-                json_output = widgets.Output(layout=DEFAULT_LAYOUT)
-                with json_output:
-                    print(json.dumps(results, indent=2))
-                children.append(json_output)
-                titles.append('JSON')
+            scd_query = query_type in ['SELECT', 'CONSTRUCT', 'DESCRIBE']
+            sparql_metadata = build_sparql_metadata_from_query(query_type='query', res=query_res,
+                                                               results=results, scd_query=scd_query)
+            sparql_metadata.stages = stats
+            self._record_profile('sparql', 'query', cell, sparql_metadata)
+            self._record_result('sparql', 'query', line, cell, query_res, sparql_metadata)
+
+            if query_type in ['SELECT', 'CONSTRUCT', 'DESCRIBE']:
+                if sparql_has_rows_and_columns(results):
+                    tabs.add('table', 'Table', lambda: self._render_sparql_table(results, stats))
+                tabs.add('graph', 'Graph', lambda: self._render_sparql_graph(results, cell, args, stats))
+                # CONSTRUCT and DESCRIBE keep the previous result pattern of showing a tsv with each line being a
+                # result binding, in addition to the other tabs.
+                if query_type == 'CONSTRUCT' or query_type == 'DESCRIBE':
+                    tabs.add('raw', 'Raw', lambda: self._render_sparql_construct(results))
+            tabs.add('json', 'JSON', lambda: print(json.dumps(results, indent=2)))
 
         if not args.silent:
-            metadata_output = widgets.Output(layout=DEFAULT_LAYOUT)
-            children.append(metadata_output)
-            titles.append('Query Metadata')
-
-            if first_tab_html == "":
-                tab.children = children[1:]  # the first tab is empty, remove it and proceed
-            else:
-                tab.children = children
-
-            for i in range(len(titles)):
-                tab.set_title(i, titles[i])
-
-            display(tab)
+            tabs.add('metadata', 'Query Metadata', lambda: display(HTML(sparql_metadata.to_html())))
+            tabs.display()
+
+    def _render_sparql_table(self, results: dict, stats: PipelineStats):
+        with stats.stage('table') as stage:
+            rows_and_columns = sparql_get_rows_and_columns(results)
+            table_id = f"table-{str(uuid.uuid4())[:8]}"
+            table_html = sparql_table_template.render(columns=rows_and_columns['columns'],
+                                                      rows=rows_and_columns['rows'], guid=table_id)
+            display(HTML(table_html))
+            stage['payload_bytes'] = len(table_html.encode('utf-8'))
+
+    def _render_sparql_graph(self, results: dict, query: str, args, stats: PipelineStats):
+        logger.debug('creating sparql network...')
+        from graph_notebook.network.sparql.SPARQLNetwork import SPARQLNetwork
+
+        with stats.stage('network'):
+            sn = SPARQLNetwork(expand_all=args.expand_all)
+            sn.extract_prefix_declarations_from_query(query)
+            try:
+                sn.add_results(results)
+            except ValueError as value_error:
+                logger.debug(value_error)
+        self._display_network(sn, args, stats)
+
+    @staticmethod
+    def _render_sparql_construct(results: dict):
+        lines = []
+        for b in results['results']['bindings']:
+            lines.append(f'{b["subject"]["value"]}\t{b["predicate"]["value"]}\t{b["object"]["value"]}')
+        display(HTML(sparql_construct_template.render(lines=lines)))
+
+    def _display_network(self, network, args, stats: PipelineStats = None):
+        logger.debug(f'number of nodes is {len(network.graph.nodes)}')
+        if len(network.graph.nodes) == 0:
+            print(NO_GRAPH_MSG)
+            return
 
-            with metadata_output:
-                display(HTML(sparql_metadata.to_html()))
+        from graph_notebook.widgets import Force
 
-            if first_tab_html != "":
-                with first_tab_output:
-                    display(HTML(first_tab_html))
+        self.graph_notebook_vis_options['physics']['disablePhysicsAfterInitialSimulation'] = args.stop_physics
+        self.graph_notebook_vis_options['physics']['simulationDuration'] = args.simulation_duration
+        if stats is None:
+            stats = PipelineStats()
+        # the state of the widget is serialized and sent to the front-end as it is created
+        with stats.stage('widget') as stage:
+            force = Force(network=network, options=self.graph_notebook_vis_options)
+            display(force)
+        if stats.trace_memory:
+            stage['payload_bytes'] = len(json.dumps(force.get_state(), default=str).encode('utf-8'))
+        self.last_network = network
 
     @line_magic
     @needs_local_scope
@@ -432,114 +601,228 @@ class Graph(Magics):
                                  'TinkerPop driver "Serializers" enum values. Default is application/json')
         parser.add_argument('--indexOps', action='store_true', default=False,
                             help='Show a detailed report of all index operations.')
+        parser.add_argument('--variants', action='store_true', default=False,
+                            help='Explain/profile mode only. Treat lines consisting of --- as separators between '
+                                 'query variants, and compare the explain/profile output of all variants.')
+        parser.add_argument('--grid', type=str, default='',
+                            help='Explain/profile mode only. Name of a dict variable mapping placeholder names to '
+                                 'lists of values. Every combination is substituted into the {{name}} placeholders '
+                                 'of the query and the explain/profile output of all combinations is compared.')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_QUERY_PLAN_WORKERS,
+                            help='Maximum number of variant explain/profile requests to run at once. '
+                                 f'Default is {DEFAULT_QUERY_PLAN_WORKERS}')
         parser.add_argument('-sp', '--stop-physics', action='store_true', default=False,
                             help="Disable visualization physics after the initial simulation stabilizes.")
         parser.add_argument('-sd', '--simulation-duration', type=int, default=1500,
                             help='Specifies maximum duration of visualization physics simulation. Default is 1500ms')
         parser.add_argument('--silent', action='store_true', default=False, help="Display no query output.")
+        parser.add_argument('--tabs', type=parse_tab_names, default=None,
+                            help='Comma separated names of the result tabs to show, out of '
+                                 f'{", ".join(TAB_NAMES)}. Each tab is only rendered once it is selected. '
+                                 'Default is every tab.')
+        parser.add_argument(BIND_VARIABLES_FLAG, action='store_true', default=False,
+                            help='Send ${var} values as query bindings instead of injecting them into the query text, '
+                                 'so that repeated runs with different values reuse the same query plan.')
+        parser.add_argument('--trace-memory', action='store_true', default=False,
+                            help='Also trace the peak memory allocated by each stage of handling the result, and the '
+                                 'size of the graph sent to the front-end, in the Query Metadata tab. '
+                                 'Tracing slows the stages down.')
+        parser.add_argument('--store-stages-to', type=str, default='',
+                            help='store the time, memory and payload size of each stage of handling the result to '
+                                 'this variable. The table and graph stages are added once their tab is opened.')
 
         args = parser.parse_args(line.split())
         mode = str_to_query_mode(args.query_mode)
         logger.debug(f'Arguments {args}')
+        stats = PipelineStats(trace_memory=args.trace_memory)
+        store_to_ns(args.store_stages_to, stats, local_ns)
+        bindings = None
+        if args.bind_variables:
+            cell, bindings = bind_query_variables(cell, local_ns, 'gremlin')
+
+        if mode in [QueryMode.EXPLAIN, QueryMode.PROFILE] and (args.variants or args.grid != ''):
+            grid = local_ns[args.grid] if args.grid != '' else None
+            variants = expand_query_variants(cell, args.variants, grid)
+            results = self._compare_gremlin_query_plans(variants, mode, self._gremlin_profile_args(args),
+                                                        args.concurrency, args.silent, bindings)
+            store_to_ns(args.store_to, results, local_ns)
+            return
 
-        if not args.silent:
-            tab = widgets.Tab()
-            children = []
-            titles = []
-
-            first_tab_output = widgets.Output(layout=DEFAULT_LAYOUT)
-            children.append(first_tab_output)
+        tabs = LazyTabs(args.tabs, layout=DEFAULT_LAYOUT)
 
         if mode == QueryMode.EXPLAIN:
-            res = self.client.gremlin_explain(cell)
+            res = self.client.gremlin_explain(cell, bindings=bindings)
             res.raise_for_status()
             query_res = res.content.decode('utf-8')
-            if not args.silent:
-                gremlin_metadata = build_gremlin_metadata_from_query(query_type='explain', results=query_res, res=res)
-                titles.append('Explain')
-                if 'Neptune Gremlin Explain' in query_res:
-                    first_tab_html = pre_container_template.render(content=query_res)
-                else:
-                    first_tab_html = pre_container_template.render(content='No explain found')
+            gremlin_metadata = build_gremlin_metadata_from_query(query_type='explain', results=query_res, res=res)
+            self._record_profile('gremlin', 'explain', cell, gremlin_metadata)
+            self._record_result('gremlin', 'explain', line, cell, res, gremlin_metadata)
+            explain = query_res if 'Neptune Gremlin Explain' in query_res else 'No explain found'
+            tabs.add('explain', 'Explain', lambda: display(HTML(pre_container_template.render(content=explain))))
         elif mode == QueryMode.PROFILE:
-            logger.debug(f'results: {args.no_results}')
-            logger.debug(f'chop: {args.chop}')
-            logger.debug(f'serializer: {args.serializer}')
-            logger.debug(f'indexOps: {args.indexOps}')
-            if args.serializer in serializers_map:
-                serializer = serializers_map[args.serializer]
-            else:
-                serializer = args.serializer
-            profile_args = {"profile.results": args.no_results,
-                            "profile.chop": args.chop,
-                            "profile.serializer": serializer,
-                            "profile.indexOps": args.indexOps}
-            res = self.client.gremlin_profile(query=cell, args=profile_args)
+            profile_args = self._gremlin_profile_args(args)
+            res = self.client.gremlin_profile(query=cell, args=profile_args, bindings=bindings)
             res.raise_for_status()
             query_res = res.content.decode('utf-8')
-            if not args.silent:
-                gremlin_metadata = build_gremlin_metadata_from_query(query_type='profile', results=query_res, res=res)
-                titles.append('Profile')
-                if 'Neptune Gremlin Profile' in query_res:
-                    first_tab_html = pre_container_template.render(content=query_res)
-                else:
-                    first_tab_html = pre_container_template.render(content='No profile found')
+            gremlin_metadata = build_gremlin_metadata_from_query(query_type='profile', results=query_res, res=res)
+            self._record_profile('gremlin', 'profile', cell, gremlin_metadata)
+            self._record_result('gremlin', 'profile', line, cell, res, gremlin_metadata)
+            profile = query_res if 'Neptune Gremlin Profile' in query_res else 'No profile found'
+            tabs.add('profile', 'Profile', lambda: display(HTML(pre_container_template.render(content=profile))))
         else:
             query_start = time.time() * 1000  # time.time() returns time in seconds w/high precision; x1000 to get in ms
-            query_res = self.client.gremlin_query(cell)
+            # the driver decodes GraphSON as the response arrives, so receiving includes decoding
+            with stats.stage('receive'):
+                query_res = self.client.gremlin_query(cell, bindings)
             query_time = time.time() * 1000 - query_start
-            if not args.silent:
-                gremlin_metadata = build_gremlin_metadata_from_query(query_type='query', results=query_res,
-                                                                     query_time=query_time)
-                titles.append('Console')
-                try:
-                    logger.debug(f'groupby: {args.group_by}')
-                    logger.debug(f'display_property: {args.display_property}')
-                    logger.debug(f'edge_display_property: {args.edge_display_property}')
-                    logger.debug(f'label_max_length: {args.label_max_length}')
-                    logger.debug(f'ignore_groups: {args.ignore_groups}')
-                    gn = GremlinNetwork(group_by_property=args.group_by, display_property=args.display_property,
-                                        edge_display_property=args.edge_display_property,
-                                        label_max_length=args.label_max_length, ignore_groups=args.ignore_groups)
-
-                    if args.path_pattern == '':
-                        gn.add_results(query_res)
-                    else:
-                        pattern = parse_pattern_list_str(args.path_pattern)
-                        gn.add_results_with_pattern(query_res, pattern)
-                    logger.debug(f'number of nodes is {len(gn.graph.nodes)}')
-                    if len(gn.graph.nodes) > 0:
-                        self.graph_notebook_vis_options['physics']['disablePhysicsAfterInitialSimulation'] \
-                            = args.stop_physics
-                        self.graph_notebook_vis_options['physics']['simulationDuration'] = args.simulation_duration
-                        f = Force(network=gn, options=self.graph_notebook_vis_options)
-                        titles.append('Graph')
-                        children.append(f)
-                        logger.debug('added gremlin network to tabs')
-                except ValueError as value_error:
-                    logger.debug(
-                        f'unable to create gremlin network from result. Skipping from result set: {value_error}')
-
-                table_id = f"table-{str(uuid.uuid4()).replace('-', '')[:8]}"
-                first_tab_html = gremlin_table_template.render(guid=table_id, results=query_res)
+            gremlin_metadata = build_gremlin_metadata_from_query(query_type='query', results=query_res,
+                                                                 query_time=query_time)
+            gremlin_metadata.stages = stats
+            self._record_profile('gremlin', 'query', cell, gremlin_metadata)
+            self._record_result('gremlin', 'query', line, cell, query_res, gremlin_metadata)
+            tabs.add('console', 'Console', lambda: self._render_gremlin_table(query_res, stats))
+            tabs.add('graph', 'Graph', lambda: self._render_gremlin_graph(query_res, args, stats))
 
         if not args.silent:
-            metadata_output = widgets.Output(layout=DEFAULT_LAYOUT)
-            titles.append('Query Metadata')
-            children.append(metadata_output)
+            tabs.add('metadata', 'Query Metadata', lambda: display(HTML(gremlin_metadata.to_html())))
+            tabs.display()
 
-            tab.children = children
-            for i in range(len(titles)):
-                tab.set_title(i, titles[i])
-            display(tab)
+        store_to_ns(args.store_to, query_res, local_ns)
 
-            with metadata_output:
-                display(HTML(gremlin_metadata.to_html()))
+    @staticmethod
+    def _render_gremlin_table(results, stats: PipelineStats):
+        with stats.stage('table') as stage:
+            table_id = f"table-{str(uuid.uuid4()).replace('-', '')[:8]}"
+            table_html = gremlin_table_template.render(guid=table_id, results=results)
+            display(HTML(table_html))
+            stage['payload_bytes'] = len(table_html.encode('utf-8'))
+
+    def _render_gremlin_graph(self, results, args, stats: PipelineStats):
+        logger.debug(f'groupby: {args.group_by}')
+        logger.debug(f'display_property: {args.display_property}')
+        logger.debug(f'edge_display_property: {args.edge_display_property}')
+        logger.debug(f'label_max_length: {args.label_max_length}')
+        logger.debug(f'ignore_groups: {args.ignore_groups}')
+        from graph_notebook.network.gremlin.GremlinNetwork import parse_pattern_list_str, GremlinNetwork
 
-            with first_tab_output:
-                display(HTML(first_tab_html))
+        try:
+            with stats.stage('network'):
+                gn = GremlinNetwork(group_by_property=args.group_by, display_property=args.display_property,
+                                    edge_display_property=args.edge_display_property,
+                                    label_max_length=args.label_max_length, ignore_groups=args.ignore_groups)
+                if args.path_pattern == '':
+                    gn.add_results(results)
+                else:
+                    pattern = parse_pattern_list_str(args.path_pattern)
+                    gn.add_results_with_pattern(results, pattern)
+        except ValueError as value_error:
+            logger.debug(f'unable to create gremlin network from result. Skipping from result set: {value_error}')
+            print(NO_GRAPH_MSG)
+            return
+        self._display_network(gn, args, stats)
 
-        store_to_ns(args.store_to, query_res, local_ns)
+    def _bind_sparql_variables(self, query: str, local_ns: dict) -> str:
+        """
+        Binds the ${var} values of a SPARQL query in an inline VALUES block. Updates, and queries without a WHERE
+        group or with a subquery or SELECT *, cannot be bound with a VALUES block, so their variables are injected
+        as text instead.
+        """
+        bound_query, bindings = bind_query_variables(query, local_ns, 'sparql')
+        if get_query_type(bound_query).upper() in ['SELECT', 'CONSTRUCT', 'ASK', 'DESCRIBE']:
+            bound_query = add_sparql_values_block(bound_query, bindings)
+            if bound_query is not None:
+                return bound_query
+        return inject_query_variables(query, local_ns)
+
+    def _gremlin_profile_args(self, args) -> dict:
+        logger.debug(f'results: {args.no_results}')
+        logger.debug(f'chop: {args.chop}')
+        logger.debug(f'serializer: {args.serializer}')
+        logger.debug(f'indexOps: {args.indexOps}')
+        if args.serializer in serializers_map:
+            serializer = serializers_map[args.serializer]
+        else:
+            serializer = args.serializer
+        return {"profile.results": args.no_results,
+                "profile.chop": args.chop,
+                "profile.serializer": serializer,
+                "profile.indexOps": args.indexOps}
+
+    def _compare_gremlin_query_plans(self, variants: list, mode: QueryMode, profile_args: dict, concurrency: int,
+                                     silent: bool = False, bindings: dict = None) -> list:
+        """
+        Runs the explain or profile of every query variant concurrently and displays a side-by-side comparison
+        of their metrics, followed by a tab with the full output of each variant.
+        """
+        plan_type = mode.value
+        plan_args = profile_args if mode == QueryMode.PROFILE else {}
+        responses = self.client.gremlin_query_plans([q for _, q in variants], plan_type=plan_type, args=plan_args,
+                                                    max_workers=concurrency, bindings=bindings)
+
+        results = []
+        for (name, query), res in zip(variants, responses):
+            entry = {'name': name, 'query': query, 'error': None, 'output': None, 'metadata': None}
+            try:
+                if isinstance(res, Exception):
+                    raise res
+                res.raise_for_status()
+                entry['output'] = res.content.decode('utf-8')
+                metadata = build_gremlin_metadata_from_query(query_type=plan_type, results=entry['output'], res=res)
+                entry['metadata'] = metadata.to_dict()
+                self._record_profile('gremlin', plan_type, query, metadata)
+            except HTTPError as http_ex:
+                entry['error'] = http_ex.response.content.decode('utf-8')
+            except Exception as e:
+                entry['error'] = str(e)
+            results.append(entry)
+
+        if silent:
+            return results
+
+        if mode == QueryMode.PROFILE:
+            metric_columns = ['Query execution time (ms)', 'Request execution time (ms)', '# of results',
+                              '[Query] # of statement index ops', '[Query]  # of unique statement index ops',
+                              '[Query] Duplication ratio', 'Serialization execution time (ms)']
+        else:
+            metric_columns = ['Request execution time (ms)', '# of predicates', 'Response size (bytes)']
+
+        rows = []
+        for entry in results:
+            if entry['error'] is not None:
+                rows.append([entry['name'], 'Error'] + ['-' for _ in metric_columns])
+            else:
+                rows.append([entry['name'], 'OK'] + [entry['metadata'].get(c, '-') for c in metric_columns])
+
+        tab = widgets.Tab()
+        children = []
+        titles = []
+
+        comparison_output = widgets.Output(layout=DEFAULT_LAYOUT)
+        children.append(comparison_output)
+        titles.append('Comparison')
+        table_id = f"table-{str(uuid.uuid4())[:8]}"
+        comparison_html = sparql_table_template.render(columns=['Variant', 'Status'] + metric_columns, rows=rows,
+                                                       guid=table_id)
+
+        variant_outputs = []
+        for entry in results:
+            variant_output = widgets.Output(layout=DEFAULT_LAYOUT)
+            children.append(variant_output)
+            titles.append(entry['name'])
+            content = entry['error'] if entry['error'] is not None else entry['output']
+            variant_outputs.append(pre_container_template.render(content=f"{entry['query']}\n\n{content}"))
+
+        tab.children = children
+        for i in range(len(titles)):
+            tab.set_title(i, titles[i])
+        display(tab)
+
+        with comparison_output:
+            display(HTML(comparison_html))
+        for variant_output, html in zip(children[1:], variant_outputs):
+            with variant_output:
+                display(HTML(html))
+        return results
 
     @line_magic
     @needs_local_scope
@@ -707,7 +990,7 @@ class Graph(Magics):
                             print('checking status...')
                         job_status_output.clear_output()
                         with job_status_output:
-                            display_html(HTML(loading_wheel_html))
+                            display_html(HTML(loading_wheel_template.render()))
                         try:
                             retry -= 1
                             status_res = self.client.status()
@@ -1098,6 +1381,8 @@ class Graph(Magics):
             dependencies_list = list(filter(None, dependencies.value.split('\n')))
 
             validated = True
+            from ipywidgets.widgets.widget_description import DescriptionStyle
+
             validation_label_style = DescriptionStyle(color='red')
             if not (source.value.startswith('s3://') and len(source.value) > 7) and not source.value.startswith('/'):
                 validated = False
@@ -1216,7 +1501,7 @@ class Graph(Magics):
                                 print('checking status...')
                             job_status_output.clear_output()
                             with job_status_output:
-                                display_html(HTML(loading_wheel_html))
+                                display_html(HTML(loading_wheel_template.render()))
                             try:
                                 load_status_res = self.client.load_status(load_result['payload']['loadId'])
                                 load_status_res.raise_for_status()
@@ -1343,6 +1628,7 @@ class Graph(Magics):
                                  'The queried path would then be host:port/foo/bar for sparql seed commands')
         parser.add_argument('--run', action='store_true')
         args = parser.parse_args(line.split())
+        from gremlin_python.driver.protocol import GremlinServerError
 
         output = widgets.Output()
         progress_output = widgets.Output()
@@ -1379,8 +1665,9 @@ class Graph(Magics):
             data_set = data_set_drop_down.value.lower()
             with output:
                 print(f'Loading data set {data_set} for {model}')
-            queries = get_queries(model, data_set)
-            if len(queries) < 1:
+            # each batch groups many of the data set's queries into a single request
+            batches = get_batches(model, data_set)
+            if len(batches) < 1:
                 with output:
                     print('Did not find any queries for the given dataset')
                 return
@@ -1389,7 +1676,7 @@ class Graph(Magics):
             progress = widgets.IntProgress(
                 value=load_index,
                 min=0,
-                max=len(queries) + 1,  # len + 1 so we can start at index 1
+                max=len(batches) + 1,  # len + 1 so we can start at index 1
                 orientation='horizontal',
                 bar_style='info',
                 description='Loading:'
@@ -1398,35 +1685,33 @@ class Graph(Magics):
             with progress_output:
                 display(progress)
 
-            for q in queries:
+            for q in batches:
                 with output:
-                    print(f'{progress.value}/{len(queries)}:\t{q["name"]}')
+                    print(f'{progress.value}/{len(batches)}:\t{q["name"]}')
                 if model == 'propertygraph':
-                    # IMPORTANT: We treat each line as its own query!
-                    for line in q['content'].splitlines():
+                    try:
+                        self.client.gremlin_query(q['content'])
+                    except GremlinServerError as gremlinEx:
                         try:
-                            self.client.gremlin_query(line)
-                        except GremlinServerError as gremlinEx:
-                            try:
-                                error = json.loads(gremlinEx.args[0][5:])  # remove the leading error code.
-                                content = json.dumps(error, indent=2)
-                            except Exception:
-                                content = {
-                                    'error': gremlinEx
-                                }
-
-                            with output:
-                                print(content)
-                            progress.close()
-                            return
-                        except Exception as e:
+                            error = json.loads(gremlinEx.args[0][5:])  # remove the leading error code.
+                            content = json.dumps(error, indent=2)
+                        except Exception:
                             content = {
-                                'error': e
+                                'error': gremlinEx
                             }
-                            with output:
-                                print(content)
-                            progress.close()
-                            return
+
+                        with output:
+                            print(content)
+                        progress.close()
+                        return
+                    except Exception as e:
+                        content = {
+                            'error': e
+                        }
+                        with output:
+                            print(content)
+                        progress.close()
+                        return
                 else:
                     try:
                         self.client.sparql(q['content'], path=args.path)
@@ -1509,11 +1794,488 @@ class Graph(Magics):
             options_dict = json.loads(cell)
             self.graph_notebook_vis_options = vis_options_merge(self.graph_notebook_vis_options, options_dict)
 
+    @line_magic
+    @needs_local_scope
+    @display_exceptions
+    def profile_history(self, line='', local_ns: dict = None):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('fingerprint', nargs='?', default='',
+                            help='fingerprint of a single query to show the individual runs of')
+        parser.add_argument('--language', type=str.lower, default='', choices=['', 'gremlin', 'sparql', 'opencypher'],
+                            help='only include runs of queries in the given language')
+        parser.add_argument('--mode', type=str.lower, default='', choices=['', 'query', 'explain', 'profile'],
+                            help='only include runs in the given query mode')
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Maximum number of queries (or runs, when a fingerprint is given) to display. '
+                                 'Default is 10')
+        parser.add_argument('--clear', action='store_true', default=False, help='delete all recorded runs')
+        parser.add_argument('--store-to', type=str, default='', help='store the history to this variable')
+        args = parser.parse_args(line.split())
+
+        if self.profile_store is None:
+            print('Profile history is unavailable, no query runs have been recorded.')
+            return
+
+        if args.clear:
+            self.profile_store.clear()
+            print('Cleared profile history.')
+            return
+
+        if args.fingerprint != '':
+            runs = self.profile_store.runs(fingerprint=args.fingerprint, mode=args.mode, limit=args.limit)
+            store_to_ns(args.store_to, runs, local_ns)
+            if not runs:
+                print(f'No runs recorded for query fingerprint {args.fingerprint}')
+                return
+            columns = ['timestamp', 'mode', 'wall_time', 'query_time', 'seri_time', 'index_ops', 'unique_index_ops',
+                       'duplication_ratio', 'resp_size', 'results']
+            rows = [[datetime.datetime.fromtimestamp(r['timestamp']).isoformat(sep=' ', timespec='seconds')]
+                    + [r[c] if r[c] is not None else 'N/A' for c in columns[1:]] for r in runs]
+            table_id = f"table-{str(uuid.uuid4())[:8]}"
+            table_html = sparql_table_template.render(columns=columns, rows=rows, guid=table_id)
+            trend_html = f'<svg width="480" height="96"><polyline fill="none" stroke="#1f77b4" ' \
+                         f'points="{sparkline_points([r["wall_time"] for r in runs], 480, 96)}"></polyline></svg>'
+            title = 'Runs'
+            html = pre_container_template.render(content=runs[-1]['query']) + trend_html + table_html
+        else:
+            ranking = self.profile_store.most_expensive(limit=args.limit, language=args.language, mode=args.mode)
+            store_to_ns(args.store_to, ranking, local_ns)
+            if not ranking:
+                print('No query runs have been recorded yet.')
+                return
+            for r in ranking:
+                r['sparkline'] = sparkline_points(r['wall_times'])
+            table_id = f"table-{str(uuid.uuid4())[:8]}"
+            title = 'Most Expensive'
+            html = profile_history_template.render(rows=ranking, guid=table_id)
+
+        output = widgets.Output(layout=DEFAULT_LAYOUT)
+        tab = widgets.Tab()
+        tab.children = [output]
+        tab.set_title(0, title)
+        display(tab)
+        with output:
+            display(HTML(html))
+
+    @line_magic
+    @needs_local_scope
+    @display_exceptions
+    def graph_history(self, line='', local_ns: dict = None):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('entry_id', nargs='?', type=int, default=None,
+                            help='id of a recorded query to show the result of again, without querying the database')
+        parser.add_argument('--language', type=str.lower, default='', choices=['', 'gremlin', 'sparql', 'opencypher'],
+                            help='only include queries in the given language')
+        parser.add_argument('--limit', type=int, default=20,
+                            help='Maximum number of recorded queries to list. Default is 20')
+        parser.add_argument('--clear', action='store_true', default=False,
+                            help='delete all recorded queries and results')
+        parser.add_argument('--store-to', type=str, default='',
+                            help='store the history, or the recorded result when an id is given, to this variable')
+        args = parser.parse_args(line.split())
+
+        if self.query_history is None:
+            print('Query history is unavailable or turned off with GRAPH_NOTEBOOK_QUERY_HISTORY_ENABLED, '
+                  'no query results have been recorded.')
+            return
+
+        if args.clear:
+            self.query_history.clear()
+            print('Cleared query history.')
+            return
+
+        if args.entry_id is None:
+            entries = self.query_history.entries(language=args.language, limit=args.limit)
+            store_to_ns(args.store_to, entries, local_ns)
+            if not entries:
+                print('No query results have been recorded yet.')
+                return
+            columns = ['id', 'timestamp', 'language', 'mode', 'endpoint', 'query_time', 'result_size', 'query']
+            rows = [[e['id'], datetime.datetime.fromtimestamp(e['timestamp']).isoformat(sep=' ', timespec='seconds'),
+                     e['language'], e['mode'], e['endpoint'],
+                     round(e['query_time'], 2) if e['query_time'] is not None else 'N/A', e['result_size'],
+                     e['query']] for e in entries]
+            table_id = f"table-{str(uuid.uuid4())[:8]}"
+            output = widgets.Output(layout=DEFAULT_LAYOUT)
+            tab = widgets.Tab()
+            tab.children = [output]
+            tab.set_title(0, 'Query History')
+            display(tab)
+            with output:
+                display(HTML(sparql_table_template.render(columns=columns, rows=rows, guid=table_id)))
+            return
+
+        entry = self.query_history.get(args.entry_id)
+        if entry is None:
+            print(f'No query result recorded with id {args.entry_id}')
+            return
+        store_to_ns(args.store_to, entry['result'], local_ns)
+
+        # the query magic renders the recorded result, answered by a stand-in for the client
+        replay_line = ' '.join(arg for arg in entry['line'].split() if arg != '--silent')
+        client = self.client
+        self.client = SnapshotClient(entry['result'], client.host, client.port)
+        try:
+            if entry['language'] == 'gremlin':
+                self.gremlin(replay_line, entry['query'], local_ns=local_ns)
+            elif entry['language'] == 'sparql':
+                self.sparql(replay_line, entry['query'], local_ns=local_ns)
+            else:
+                self.handle_opencypher_query(replay_line, entry['query'], local_ns)
+        finally:
+            self.client = client
+
+    @line_magic
+    @needs_local_scope
+    @display_exceptions
+    def graph_analyze(self, line='', local_ns: dict = None):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('algorithm', type=str.lower, choices=ANALYZE_ALGORITHMS,
+                            help='algorithm to run on the graph which was rendered last')
+        parser.add_argument('--source', type=str, default='', help='id of the node a shortest path starts from')
+        parser.add_argument('--target', type=str, default='', help='id of the node a shortest path ends at')
+        parser.add_argument('--undirected', action='store_true', default=False,
+                            help='follow edges in both directions when finding a shortest path')
+        parser.add_argument('--sample', type=int, default=None,
+                            help='number of nodes to sample to estimate the betweenness centrality of large graphs')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='random seed of the betweenness sample and of the communities')
+        parser.add_argument('--limit', type=int, default=20, help='Maximum number of nodes to list. Default is 20')
+        parser.add_argument('--no-update', action='store_true', default=False,
+                            help='do not change the groups and sizes of the nodes in the rendered graph')
+        parser.add_argument('--store-to', type=str, default='',
+                            help='store the dict of node id to score, group, or the list of node ids of the path, '
+                                 'to this variable')
+        args = parser.parse_args(line.split())
+
+        network = self.last_network
+        if network is None:
+            print('No graph has been rendered yet, open the Graph tab of a query result first.')
+            return
+
+        from graph_notebook.network import analysis
+
+        graph = network.graph
+        if args.algorithm == 'shortest_path':
+            if args.source == '' or args.target == '':
+                print('You must supply the ids of the nodes to find a path between with --source and --target.')
+                return
+            path = analysis.shortest_path(graph, args.source, args.target, directed=not args.undirected)
+            store_to_ns(args.store_to, path, local_ns)
+            if not path:
+                print(f'There is no path from {args.source} to {args.target}.')
+                return
+            print(' -> '.join(str(graph.nodes[node].get('title', node)) for node in path))
+            if not args.no_update:
+                network.update_nodes({node: {'group': ANALYZE_PATH_GROUP} for node in path})
+            return
+
+        if args.algorithm == 'pagerank':
+            results = analysis.pagerank(graph)
+        elif args.algorithm == 'degree':
+            results = analysis.degree_centrality(graph)
+        elif args.algorithm == 'betweenness':
+            results = analysis.betweenness_centrality(graph, k=args.sample, seed=args.seed)
+        elif args.algorithm == 'components':
+            results = analysis.connected_components(graph)
+        else:
+            results = analysis.communities(graph, seed=args.seed)
+        store_to_ns(args.store_to, results, local_ns)
+
+        if not args.no_update:
+            # the scores size the nodes, and the groups color them, in one update of the rendered graph
+            if args.algorithm in ANALYZE_SCORES:
+                network.update_nodes({node: {'value': score, 'scaling': ANALYZE_SCALING}
+                                      for node, score in results.items()})
+            else:
+                network.update_nodes({node: {'group': str(group)} for node, group in results.items()})
+
+        if args.algorithm in ANALYZE_SCORES:
+            columns = ['id', 'title', args.algorithm]
+            ranked = sorted(results.items(), key=lambda item: item[1], reverse=True)[:args.limit]
+            rows = [[node, graph.nodes[node].get('title', node), round(score, 6)] for node, score in ranked]
+        else:
+            columns = [ANALYZE_GROUPS[args.algorithm], 'nodes', 'titles']
+            grouped = {}
+            for node, group in results.items():
+                grouped.setdefault(group, []).append(str(graph.nodes[node].get('title', node)))
+            rows = [[group, len(titles), ', '.join(titles[:ANALYZE_TITLES_SHOWN])]
+                    for group, titles in sorted(grouped.items())[:args.limit]]
+        table_id = f"table-{str(uuid.uuid4())[:8]}"
+        output = widgets.Output(layout=DEFAULT_LAYOUT)
+        tab = widgets.Tab()
+        tab.children = [output]
+        tab.set_title(0, args.algorithm.capitalize())
+        display(tab)
+        with output:
+            display(HTML(sparql_table_template.render(columns=columns, rows=rows, guid=table_id)))
+
+    @cell_magic
+    @needs_local_scope
+    @display_exceptions
+    def graph_batch(self, line='', cell='', local_ns: dict = None):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('language', nargs='?', type=str.lower, default='gremlin', choices=BATCH_LANGUAGES,
+                            help='query language of the cell (default=gremlin)')
+        parser.add_argument('--rows', type=str, required=True,
+                            help='Name of a list of dicts or a pandas DataFrame variable. The query in the cell is '
+                                 'run once per row, with the values of the row bound to the parameters of the '
+                                 'same name (g.V(vid) for gremlin, $vid for openCypher and ?vid for SPARQL).')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_BATCH_CONCURRENCY,
+                            help='Maximum number of rows to run at once. '
+                                 f'Default is {DEFAULT_BATCH_CONCURRENCY}')
+        parser.add_argument('--store-to', type=str, default='', help='store the result of every row to this variable')
+        parser.add_argument('--silent', action='store_true', default=False, help="Display no query output.")
+        args = parser.parse_args(line.split())
+
+        rows = batch_rows(local_ns[args.rows])
+        if not args.silent:
+            progress = widgets.IntProgress(min=0, max=len(rows), description='Rows:')
+            progress_label = widgets.Label(f'0/{len(rows)}')
+            display(widgets.HBox([progress, progress_label]))
+
+        results = []
+        error_count = 0
+        start = time.time()
+        for entry in self.client.execute_batch(cell, rows, language=args.language, concurrency=args.concurrency,
+                                               sparql_path=self.graph_notebook_config.sparql.path):
+            results.append(entry)
+            if entry['error'] is not None:
+                error_count += 1
+            if not args.silent:
+                progress.value = len(results)
+                progress_label.value = f'{len(results)}/{len(rows)}, {error_count} failed'
+        elapsed = time.time() - start
+
+        store_to_ns(args.store_to, results, local_ns)
+        if args.silent:
+            return
+
+        rate = len(results) / elapsed if elapsed > 0 else len(results)
+        progress_label.value = f'{len(results)}/{len(rows)} rows in {elapsed:.2f}s ({rate:.1f} rows/s), ' \
+                               f'{error_count} failed'
+        table_rows = []
+        for entry in results:
+            if entry['error'] is not None:
+                status, content = 'Error', str(entry['error'])
+            else:
+                status, content = 'OK', json.dumps(entry['result'], default=str)
+            time_ms = round(entry['time'], 2) if entry['time'] is not None else '-'
+            content = content if len(content) <= 250 else content[:247] + '...'
+            table_rows.append([json.dumps(entry['params'], default=str), status, time_ms, content])
+
+        output = widgets.Output(layout=DEFAULT_LAYOUT)
+        tab = widgets.Tab()
+        tab.children = [output]
+        tab.set_title(0, 'Batch')
+        display(tab)
+        table_id = f"table-{str(uuid.uuid4())[:8]}"
+        with output:
+            display(HTML(sparql_table_template.render(columns=['Parameters', 'Status', 'Time (ms)', 'Result'],
+                                                      rows=table_rows, guid=table_id)))
+
+    @cell_magic
+    @needs_local_scope
+    @display_exceptions
+    def graph_parallel(self, line='', cell='', local_ns: dict = None):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('language', nargs='?', type=str.lower, default='gremlin', choices=BATCH_LANGUAGES,
+                            help='query language of the queries whose header does not give one (default=gremlin)')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_BATCH_CONCURRENCY,
+                            help='Maximum number of queries to run at once. '
+                                 f'Default is {DEFAULT_BATCH_CONCURRENCY}')
+        parser.add_argument('--store-to', type=str, default='', help='store the result of every query to this variable')
+        parser.add_argument('--silent', action='store_true', default=False, help="Display no query output.")
+        args = parser.parse_args(line.split())
+
+        queries = parse_parallel_queries(cell, args.language)
+        if not queries:
+            print('No queries were found in the cell. Separate queries with lines like "--- gremlin airports".')
+            return
+        if not args.silent:
+            progress = widgets.IntProgress(min=0, max=len(queries), description='Queries:')
+            progress_label = widgets.Label(f'0/{len(queries)}')
+            display(widgets.HBox([progress, progress_label]))
+
+        results = [None] * len(queries)
+        finished = 0
+        error_count = 0
+        start = time.time()
+        for entry in self.client.execute_parallel([(language, query) for _, language, query in queries],
+                                                  concurrency=args.concurrency,
+                                                  sparql_path=self.graph_notebook_config.sparql.path):
+            entry['label'] = queries[entry['index']][0]
+            results[entry['index']] = entry
+            finished += 1
+            if entry['error'] is not None:
+                error_count += 1
+            if not args.silent:
+                progress.value = finished
+                progress_label.value = f'{finished}/{len(queries)}, {error_count} failed'
+        elapsed = time.time() - start
+
+        store_to_ns(args.store_to, results, local_ns)
+        if args.silent:
+            return
+
+        sequential = sum(entry['time'] for entry in results if entry['time'] is not None) / 1000
+        progress_label.value = f'{len(queries)} queries in {elapsed:.2f}s ({sequential:.2f}s one after another), ' \
+                               f'{error_count} failed'
+        table_rows = []
+        for entry in results:
+            if entry['error'] is not None:
+                status, content = 'Error', str(entry['error'])
+            else:
+                status, content = 'OK', json.dumps(entry['result'], default=str)
+            time_ms = round(entry['time'], 2) if entry['time'] is not None else '-'
+            content = content if len(content) <= 250 else content[:247] + '...'
+            table_rows.append([entry['label'], entry['language'], status, time_ms, content])
+
+        # the full result of every query has a tab of its own, rendered once it is opened
+        tabs = LazyTabs(layout=DEFAULT_LAYOUT)
+        table_id = f"table-{str(uuid.uuid4())[:8]}"
+        tabs.add('summary', 'Summary', lambda: display(HTML(sparql_table_template.render(
+            columns=['Label', 'Language', 'Status', 'Time (ms)', 'Result'], rows=table_rows, guid=table_id))))
+        for entry in results:
+            tabs.add(entry['label'], entry['label'], lambda entry=entry: self._render_parallel_result(entry))
+        tabs.display()
+
+    @staticmethod
+    def _render_parallel_result(entry: dict):
+        if entry['error'] is not None:
+            content = str(entry['error'])
+        else:
+            content = json.dumps(entry['result'], indent=2, default=str)
+        display(HTML(pre_container_template.render(content=f"{entry['query']}\n\n{content}")))
+
+    @line_magic
+    @needs_local_scope
+    @display_exceptions
+    def sparql_load_file(self, line='', local_ns: dict = None):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('source', type=str,
+                            help='path of a local N-Triples (.nt), N-Quads (.nq) or Turtle (.ttl) file, '
+                                 'which may be gzipped (.gz)')
+        parser.add_argument('--format', type=str.lower, default=None, choices=RDF_FILE_FORMATS,
+                            help='format of the file, detected from its extension by default')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_LOAD_CONCURRENCY,
+                            help=f'Maximum number of INSERT DATA updates to send at once. '
+                                 f'Default is {DEFAULT_LOAD_CONCURRENCY}')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_LOAD_BATCH_BYTES // 1024,
+                            help=f'Size in KB of the statements sent in each update. '
+                                 f'Default is {DEFAULT_LOAD_BATCH_BYTES // 1024}')
+        parser.add_argument('--batch-statements', type=int, default=DEFAULT_LOAD_BATCH_STATEMENTS,
+                            help=f'Maximum number of statements sent in each update. '
+                                 f'Default is {DEFAULT_LOAD_BATCH_STATEMENTS}')
+        parser.add_argument('--retries', type=int, default=DEFAULT_LOAD_MAX_RETRIES,
+                            help=f'Number of times a failed update is retried. Default is {DEFAULT_LOAD_MAX_RETRIES}')
+        parser.add_argument('--path', '-p', default='',
+                            help='prefix path to sparql endpoint. For example, if "foo/bar" were specified, '
+                                 'the endpoint called would be host:port/foo/bar')
+        parser.add_argument('--store-to', type=str, default='', help='store the load stats to this variable')
+        parser.add_argument('--silent', action='store_true', default=False, help="Display no load output.")
+        args = parser.parse_args(line.split())
+
+        source = os.path.expanduser(args.source)
+        if not args.silent:
+            progress = widgets.IntProgress(min=0, max=100, description='Loading:')
+            progress_label = widgets.Label('')
+            display(widgets.HBox([progress, progress_label]))
+
+            def on_progress(stats: dict):
+                rate = stats['statements'] / stats['time'] if stats['time'] > 0 else 0
+                progress.value = int(100 * stats['offset'] / stats['total']) if stats['total'] > 0 else 100
+                progress_label.value = f"{stats['statements']} statements in {stats['batches']} updates " \
+                                       f"({rate:.0f} statements/s), {stats['failed_batches']} failed"
+        else:
+            on_progress = None
+
+        path = args.path if args.path != '' else self.graph_notebook_config.sparql.path
+        stats = load_rdf_file(self.client, source, rdf_format=args.format, concurrency=args.concurrency,
+                              batch_bytes=args.batch_size * 1024, batch_statements=args.batch_statements,
+                              max_retries=args.retries, sparql_path=path, on_progress=on_progress)
+        store_to_ns(args.store_to, stats, local_ns)
+        if args.silent:
+            return
+
+        on_progress(stats)
+        progress.bar_style = 'success' if stats['failed_batches'] == 0 else 'warning'
+        rate = stats['bytes'] / stats['time'] / 1024 if stats['time'] > 0 else 0
+        print(f"Loaded {stats['statements']} statements from {source} in {stats['time']:.2f}s ({rate:.0f} KB/s).")
+        if stats['failed_batches'] > 0:
+            print(f"{stats['failed_statements']} statements in {stats['failed_batches']} updates failed, "
+                  f"the first error was:")
+            print(stats['errors'][0])
+
+    @line_magic
+    @needs_local_scope
+    @display_exceptions
+    def gremlin_load_file(self, line='', local_ns: dict = None):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('source', type=str,
+                            help='path of a local CSV file, or directory of CSV files, in the Neptune Gremlin load '
+                                 'format (~id, ~label, ~from, ~to and name:Type columns)')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CSV_LOAD_CONCURRENCY,
+                            help=f'Maximum number of batches to send at once. '
+                                 f'Default is {DEFAULT_CSV_LOAD_CONCURRENCY}')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_CSV_LOAD_BATCH_SIZE,
+                            help=f'Number of records added by each traversal. Default is {DEFAULT_CSV_LOAD_BATCH_SIZE}')
+        parser.add_argument('--fail-on-failure', action='store_true', default=False)
+        parser.add_argument('--allow-empty-strings', action='store_true', default=False,
+                            help='Load empty strings found in node and edge property values.')
+        parser.add_argument('--store-to', type=str, default='', help='store the load status to this variable')
+        parser.add_argument('--silent', action='store_true', default=False, help="Display no load output.")
+        args = parser.parse_args(line.split())
+
+        if not args.silent:
+            source_label = widgets.Label(f'Source: {args.source}')
+            progress_output = widgets.Output()
+            job_status_output = widgets.Output()
+            display(widgets.VBox([source_label, progress_output, job_status_output]))
+            with job_status_output:
+                display_html(HTML(loading_wheel_template.render()))
+
+            def on_progress(status: dict):
+                progress_output.clear_output(wait=True)
+                with progress_output:
+                    print(f"{status['totalRecords']} records loaded ({status['recordsPerSecond']} records/s), "
+                          f"{status['insertErrors']} insert errors, {status['parsingErrors']} parsing errors, "
+                          f"{status['datatypeMismatchErrors']} datatype mismatch errors")
+        else:
+            on_progress = None
+
+        status = load_gremlin_csv(self.client, os.path.expanduser(args.source), concurrency=args.concurrency,
+                                  batch_size=args.batch_size, fail_on_error=args.fail_on_failure,
+                                  allow_empty_strings=args.allow_empty_strings, on_progress=on_progress)
+        store_to_ns(args.store_to, status, local_ns)
+        if args.silent:
+            return
+
+        on_progress(status)
+        job_status_output.clear_output()
+        with job_status_output:
+            print(f"Overall Status: {status['status']}")
+            execution_time = status['totalTimeSpent']
+            if execution_time == 0:
+                execution_time_statement = '<1 second'
+            elif execution_time > 59:
+                execution_time_statement = str(datetime.timedelta(seconds=execution_time))
+            else:
+                execution_time_statement = f'{execution_time} seconds'
+            print('Total execution time: ' + execution_time_statement)
+            for error in status['errors'][:10]:
+                print(error)
+            if len(status['errors']) > 10:
+                print(f"... and {len(status['errors']) - 10} more errors, use --store-to to see all of them.")
+            print('Done.')
+
     @magic_variables
     @line_cell_magic
     @display_exceptions
     @needs_local_scope
     def neptune_ml(self, line, cell='', local_ns: dict = None):
+        from graph_notebook.magics.ml import neptune_ml_magic_handler, generate_neptune_ml_parser
+
         parser = generate_neptune_ml_parser()
         args = parser.parse_args(line.split())
         logger.info(f'received call to neptune_ml with details: {args.__dict__}, cell={cell}, local_ns={local_ns}')
@@ -1541,95 +2303,110 @@ class Graph(Magics):
         parser.add_argument('-l', '--label-max-length', type=int, default=10,
                             help='Specifies max length of vertex label, in characters. Default is 10')
         parser.add_argument('--store-to', type=str, default='', help='store query result to this variable')
+        parser.add_argument('--store-dataframe-to', type=str, default='',
+                            help='store the query result to this variable as a pandas DataFrame, with a typed column '
+                                 'for each returned value, and for each key and property of returned nodes and '
+                                 'relationships')
         parser.add_argument('--ignore-groups', action='store_true', default=False, help="Ignore all grouping options")
         parser.add_argument('-sp', '--stop-physics', action='store_true', default=False,
                             help="Disable visualization physics after the initial simulation stabilizes.")
         parser.add_argument('-sd', '--simulation-duration', type=int, default=1500,
                             help='Specifies maximum duration of visualization physics simulation. Default is 1500ms')
         parser.add_argument('--silent', action='store_true', default=False, help="Display no query output.")
+        parser.add_argument('--tabs', type=parse_tab_names, default=None,
+                            help='Comma separated names of the result tabs to show, out of '
+                                 f'{", ".join(TAB_NAMES)}. Each tab is only rendered once it is selected. '
+                                 'Default is every tab.')
+        parser.add_argument(BIND_VARIABLES_FLAG, action='store_true', default=False,
+                            help='Send ${var} values as query parameters instead of injecting them into the query text, '
+                                 'so that repeated runs with different values reuse the same query plan.')
+        parser.add_argument('--trace-memory', action='store_true', default=False,
+                            help='Also trace the peak memory allocated by each stage of handling the result, and the '
+                                 'size of the graph sent to the front-end, in the Query Metadata tab. '
+                                 'Tracing slows the stages down.')
+        parser.add_argument('--store-stages-to', type=str, default='',
+                            help='store the time, memory and payload size of each stage of handling the result to '
+                                 'this variable. The table and graph stages are added once their tab is opened.')
         args = parser.parse_args(line.split())
         logger.debug(args)
+        stats = PipelineStats(trace_memory=args.trace_memory)
+        store_to_ns(args.store_stages_to, stats, local_ns)
         res = None
+        parameters = {}
+        if args.bind_variables:
+            cell, parameters = bind_query_variables(cell, local_ns, 'opencypher')
 
-        if not args.silent:
-            tab = widgets.Tab()
-            titles = []
-            children = []
-            force_graph_output = None
+        tabs = LazyTabs(args.tabs, layout=DEFAULT_LAYOUT)
+        oc_metadata = None
 
         if args.mode == 'query':
             query_start = time.time() * 1000  # time.time() returns time in seconds w/high precision; x1000 to get in ms
-            oc_http = self.client.opencypher_http(cell)
+            with stats.stage('receive') as stage:
+                oc_http = self.client.opencypher_http(cell, parameters=parameters)
+                stage['payload_bytes'] = len(oc_http.content)
             query_time = time.time() * 1000 - query_start
             oc_http.raise_for_status()
-            res = oc_http.json()
-            if not args.silent:
-                oc_metadata = build_opencypher_metadata_from_query(query_type='query', results=res,
-                                                                   query_time=query_time)
-                try:
-                    gn = OCNetwork(group_by_property=args.group_by, display_property=args.display_property,
-                                   edge_display_property=args.edge_display_property,
-                                   label_max_length=args.label_max_length, ignore_groups=args.ignore_groups)
-                    gn.add_results(res)
-                    logger.debug(f'number of nodes is {len(gn.graph.nodes)}')
-                    if len(gn.graph.nodes) > 0:
-                        self.graph_notebook_vis_options['physics']['disablePhysicsAfterInitialSimulation'] \
-                            = args.stop_physics
-                        self.graph_notebook_vis_options['physics']['simulationDuration'] = args.simulation_duration
-                        force_graph_output = Force(network=gn, options=self.graph_notebook_vis_options)
-                except (TypeError, ValueError) as network_creation_error:
-                    logger.debug(f'Unable to create network from result. Skipping from result set: {res}')
-                    logger.debug(f'Error: {network_creation_error}')
+            with stats.stage('decode'):
+                res = oc_http.json()
+            oc_metadata = build_opencypher_metadata_from_query(query_type='query', results=res, res=oc_http,
+                                                               query_time=query_time)
+            oc_metadata.stages = stats
+            self._record_profile('opencypher', 'query', cell, oc_metadata)
+            self._record_result('opencypher', 'query', line, cell, oc_http, oc_metadata)
         elif args.mode == 'bolt':
-            res = self.client.opencyper_bolt(cell)            
+            with stats.stage('receive'):
+                res = self.client.opencyper_bolt(cell, **parameters)
+            self._record_result('opencypher', 'bolt', line, cell, res)
             # Need to eventually add code to parse and display a network for the bolt format here
 
+        oc_table = None
+        if args.store_dataframe_to != '':
+            oc_table = opencypher_get_columns(res, args.mode == 'bolt')
+            store_to_ns(args.store_dataframe_to, oc_table.to_dataframe(), local_ns)
+
         if not args.silent:
-            rows_and_columns = opencypher_get_rows_and_columns(res, True if args.mode == 'bolt' else False)
-            display(tab)
-            table_output = widgets.Output(layout=DEFAULT_LAYOUT)
-            # Assign an empty value so we can always display to table output.
-            table_html = ""
-
-            # Display Console Tab
-            # some issues with displaying a datatable when not wrapped in an hbox and displayed last
-            hbox = widgets.HBox([table_output], layout=DEFAULT_LAYOUT)
-            children.append(hbox)
-            titles.append('Console')
-            if rows_and_columns is not None:
+            tabs.add('console', 'Console', lambda: self._render_opencypher_table(
+                oc_table if oc_table is not None else opencypher_get_columns(res, args.mode == 'bolt'), stats))
+            if args.mode == 'query':
+                tabs.add('graph', 'Graph', lambda: self._render_opencypher_graph(res, args, stats))
+            tabs.add('json', 'JSON', lambda: print(json.dumps(res, indent=2)))
+            if oc_metadata is not None:
+                tabs.add('metadata', 'Query Metadata', lambda: display(HTML(oc_metadata.to_html())))
+            tabs.display()
+
+        store_to_ns(args.store_to, res, local_ns)
+
+    @staticmethod
+    def _render_opencypher_table(table: OpenCypherColumns, stats: PipelineStats):
+        # some issues with displaying a datatable when not wrapped in an hbox
+        table_output = widgets.Output(layout=DEFAULT_LAYOUT)
+        display(widgets.HBox([table_output], layout=DEFAULT_LAYOUT))
+        if len(table.columns) > 0:
+            with stats.stage('table') as stage:
                 table_id = f"table-{str(uuid.uuid4())[:8]}"
-                table_html = opencypher_table_template.render(columns=rows_and_columns['columns'],
-                                                              rows=rows_and_columns['rows'], guid=table_id)
-
-            # Display Graph Tab (if exists)
-            if force_graph_output:
-                titles.append('Graph')
-                children.append(force_graph_output)
-
-            # Display JSON tab
-            json_output = widgets.Output(layout=DEFAULT_LAYOUT)
-            with json_output:
-                print(json.dumps(res, indent=2))
-            children.append(json_output)
-            titles.append('JSON')
-
-            # Display Query Metadata Tab
-            metadata_output = widgets.Output(layout=DEFAULT_LAYOUT)
-            titles.append('Query Metadata')
-            children.append(metadata_output)
-
-            tab.children = children
-            for i in range(len(titles)):
-                tab.set_title(i, titles[i])
-
-            if table_html != "":
+                # the values are embedded in a script, which must not be ended early by a string in the results
+                values = table.to_json().replace('</', '<\\/')
+                table_html = opencypher_table_template.render(columns=table.columns, values=values,
+                                                              row_count=len(table), guid=table_id)
                 with table_output:
                     display(HTML(table_html))
+                stage['payload_bytes'] = len(table_html.encode('utf-8'))
 
-            with metadata_output:
-                display(HTML(oc_metadata.to_html()))
+    def _render_opencypher_graph(self, results, args, stats: PipelineStats):
+        from graph_notebook.network.opencypher.OCNetwork import OCNetwork
 
-        store_to_ns(args.store_to, res, local_ns)
+        try:
+            with stats.stage('network'):
+                gn = OCNetwork(group_by_property=args.group_by, display_property=args.display_property,
+                               edge_display_property=args.edge_display_property,
+                               label_max_length=args.label_max_length, ignore_groups=args.ignore_groups)
+                gn.add_results(results)
+        except (TypeError, ValueError) as network_creation_error:
+            logger.debug(f'Unable to create network from result. Skipping from result set: {results}')
+            logger.debug(f'Error: {network_creation_error}')
+            print(NO_GRAPH_MSG)
+            return
+        self._display_network(gn, args, stats)
 
     def handle_opencypher_status(self, line, local_ns):
         """
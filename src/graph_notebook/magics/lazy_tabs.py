@@ -0,0 +1,93 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import argparse
+
+from IPython.display import display
+
+from graph_notebook.lazy_import import lazy_import
+
+widgets = lazy_import('ipywidgets')
+
+TAB_NAMES = ['explain', 'profile', 'console', 'table', 'graph', 'raw', 'json', 'metadata']
+
+
+def parse_tab_names(value: str) -> list:
+    """
+    Parses the comma separated tab names given to the --tabs option of the query magics.
+    """
+    names = [name.strip().lower() for name in value.split(',') if name.strip() != '']
+    unknown = [name for name in names if name not in TAB_NAMES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f'unknown tab {", ".join(unknown)}, valid tabs are {", ".join(TAB_NAMES)}')
+    return names
+
+
+class LazyTabs(object):
+    """
+    Shows the views of a query result as tabs, where each view is only rendered once its tab is first selected.
+    A view is a function which displays its content, and is called with the output of its tab captured, so that
+    results nobody looks at as a table, a graph or JSON are never rendered as one.
+
+    Views hold on to the result they render, so each view is dropped once it has been rendered, and every view is
+    dropped when the Tab widget is closed, letting the result be freed.
+    """
+
+    def __init__(self, names: list = None, layout: dict = None):
+        """
+        :param names: names of the tabs to show, or None to show every tab which is added
+        :param layout: layout of the output widget of each tab
+        """
+        self.names = names
+        self.layout = layout if layout is not None else {}
+        self.views = []
+        self.tab = None
+        self.outputs = []
+        self.rendered = set()
+
+    def add(self, name: str, title: str, render):
+        if self.names is None or name in self.names:
+            self.views.append((title, render))
+
+    def display(self):
+        """
+        Displays the tabs and renders the selected one.
+
+        :return: the Tab widget, or None if there are no tabs to show
+        """
+        if not self.views:
+            return None
+
+        self.outputs = [widgets.Output(layout=self.layout) for _ in self.views]
+        self.tab = widgets.Tab(children=self.outputs)
+        for i, (title, _) in enumerate(self.views):
+            self.tab.set_title(i, title)
+        self.tab.observe(lambda change: self.render(change['new']), names='selected_index')
+        self.tab.observe(self._on_comm_change, names='comm')
+        display(self.tab)
+        self.render(self.tab.selected_index if self.tab.selected_index is not None else 0)
+        return self.tab
+
+    def render(self, index: int):
+        if index is None or index in self.rendered or index >= len(self.views):
+            return
+        self.rendered.add(index)
+        title, view = self.views[index]
+        self.views[index] = (title, None)
+        # errors are shown in the output of the tab rather than raised into the widget event loop
+        with self.outputs[index]:
+            view()
+
+    def release(self):
+        """
+        Drops every view which has not been rendered yet, along with the results they hold on to.
+        """
+        self.views = [(title, None) for title, _ in self.views]
+        self.rendered.update(range(len(self.views)))
+
+    def _on_comm_change(self, change):
+        # the comm of a widget is cleared when it is closed
+        if change['new'] is None:
+            self.release()
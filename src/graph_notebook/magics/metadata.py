@@ -6,10 +6,13 @@ SPDX-License-Identifier: Apache-2.0
 import json
 import sys
 import re
+import time
+import tracemalloc
+from contextlib import contextmanager
 from typing import List
 from requests import Response
-from graph_notebook.visualization.template_retriever import retrieve_template
-pre_container_template = retrieve_template("pre_container.html")
+from graph_notebook.visualization.template_retriever import LazyTemplate
+pre_container_template = LazyTemplate("pre_container.html")
 
 
 # class for individual metadata metric
@@ -23,10 +26,81 @@ class Metric(object):
         self.value = value
 
 
+# stages of handling a query result, in the order they run
+PIPELINE_STAGES = ['receive', 'decode', 'network', 'table', 'widget']
+
+
+class PipelineStats(object):
+    """
+    Records where the kernel spends its time and memory while handling a query result, stage by stage: receiving
+    the response, decoding it, building the network of the graph, rendering the table and serializing the graph
+    widget. Each stage records its time, and the bytes it received or sent to the front-end where they are known.
+    With trace_memory, each stage also records the peak memory it allocated, traced with tracemalloc, which slows
+    the stages down.
+
+    The table and the graph are only rendered once their tab is opened, so their stages are recorded then.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Times the code run in the with block as the given stage. The record of the stage is yielded, so that the
+        bytes of its payload can be filled in.
+
+        Ex.
+            with stats.stage('table') as stage:
+                html = template.render(rows=rows)
+                stage['payload_bytes'] = len(html.encode('utf-8'))
+        """
+        record = {'stage': name, 'time_ms': None, 'peak_bytes': None, 'payload_bytes': None}
+        started_tracing = False
+        baseline = 0
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            elif hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['time_ms'] = (time.perf_counter() - start) * 1000
+            if self.trace_memory:
+                record['peak_bytes'] = tracemalloc.get_traced_memory()[1] - baseline
+                if started_tracing:
+                    tracemalloc.stop()
+            self.stages.append(record)
+
+    def to_dict(self) -> dict:
+        """
+        :return: a dict of stage name to its record, e.g.
+                 {'receive': {'time_ms': 12.5, 'peak_bytes': None, 'payload_bytes': 5120}}
+        """
+        return {record['stage']: {k: v for k, v in record.items() if k != 'stage'} for record in self.stages}
+
+    def format_table(self) -> str:
+        rows = [['Stage', 'Time (ms)', 'Peak memory (bytes)', 'Payload (bytes)']]
+        for record in sorted(self.stages, key=lambda r: PIPELINE_STAGES.index(r['stage'])
+                             if r['stage'] in PIPELINE_STAGES else len(PIPELINE_STAGES)):
+            rows.append([record['stage'], f"{record['time_ms']:.2f}",
+                         'N/A' if record['peak_bytes'] is None else str(record['peak_bytes']),
+                         'N/A' if record['payload_bytes'] is None else str(record['payload_bytes'])])
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return '\n'.join(' | '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
+                         for row in rows) + '\n'
+
+
 # class for complete metadata object to output
 class Metadata(object):
     def __init__(self):
         self.metrics = {}
+        self.stages = None
 
     def insert_metric(self, new_metric: Metric):
         self.metrics[new_metric.name] = new_metric
@@ -38,11 +112,24 @@ class Metadata(object):
     def set_metric_value(self, metric_name, value):
         self.metrics[metric_name].set_value(value)
 
+    def get_metric_value(self, metric_name, default=None):
+        # metrics which were never populated still hold their "N/A" placeholder
+        if metric_name not in self.metrics or self.metrics[metric_name].value == "N/A":
+            return default
+        return self.metrics[metric_name].value
+
     def set_request_metrics(self, res: Response):
         self.set_metric_value('request_time', 1000 * res.elapsed.total_seconds())
         self.set_metric_value('status', res.status_code)
         self.set_metric_value('status_ok', res.ok)
         self.set_metric_value('resp_size', sys.getsizeof(res.content))
+        self.set_transfer_metrics(res)
+
+    def set_transfer_metrics(self, res: Response):
+        if 'wire_size' in self.metrics:
+            self.set_metric_value('wire_size', get_wire_size(res))
+        if 'decoded_size' in self.metrics:
+            self.set_metric_value('decoded_size', len(res.content))
 
     def to_dict(self):
         metadata_dict = {}
@@ -64,7 +151,26 @@ class Metadata(object):
         return out_string
 
     def to_html(self):
-        return pre_container_template.render(content=self.format_dict())
+        content = self.format_dict()
+        if self.stages is not None and self.stages.stages:
+            content += '\n' + self.stages.format_table()
+        return pre_container_template.render(content=content)
+
+
+def get_wire_size(res: Response):
+    """
+    Returns the number of bytes read off the connection for a response, before any content decoding.
+    For a compressed response this is smaller than the length of the decoded res.content.
+    """
+    try:
+        return res.raw.tell()
+    except (AttributeError, OSError, ValueError):
+        return "N/A"
+
+
+def create_transfer_metrics() -> List[Metric]:
+    return [Metric('wire_size', 'Response size on wire (bytes)'),
+            Metric('decoded_size', 'Response size decoded (bytes)')]
 
 
 def set_profile_metric_value(metadata: Metadata, metric_name: str, metric_type: str, metric_value: str):
@@ -132,7 +238,7 @@ def set_gremlin_profile_metrics(gremlin_metadata: Metadata, profile_str: str) ->
     return gremlin_metadata
 
 
-def create_propertygraph_metadata_obj(q_mode: str) -> Metadata:
+def create_propertygraph_metadata_obj(q_mode: str, transfer_metrics: bool = False) -> Metadata:
     metadata_obj = Metadata()
     mode_metric = Metric('mode', 'Query mode', q_mode)
     query_time = Metric('query_time', 'Query execution time (ms)')
@@ -154,16 +260,20 @@ def create_propertygraph_metadata_obj(q_mode: str) -> Metadata:
     seri_duplication_ratio_metric = Metric('seri_duplication_ratio', '[Serialization] Duplication ratio')
     seri_terms_materialized_metric = Metric('seri_terms_materialized', '[Serialization] # of terms materialized')
     if q_mode == 'explain':
-        metadata_obj.bulk_insert_metrics([mode_metric, request_time, status_metric, status_ok_metric,
-                                          predicates, resp_size_metric])
+        metadata_obj.bulk_insert_metrics([mode_metric, request_time, *create_transfer_metrics(), status_metric,
+                                          status_ok_metric, predicates, resp_size_metric])
     elif q_mode == 'profile':
-        metadata_obj.bulk_insert_metrics([mode_metric, query_time, request_time, status_metric, status_ok_metric,
-                                          predicates, results_metric, resp_size_metric, seri_time_metric,
+        metadata_obj.bulk_insert_metrics([mode_metric, query_time, request_time, *create_transfer_metrics(),
+                                          status_metric, status_ok_metric, predicates, results_metric,
+                                          resp_size_metric, seri_time_metric,
                                           seri_type_metric, results_size_metric, query_total_index_ops_metric,
                                           query_unique_index_ops_metric, query_duplication_ratio_metric,
                                           query_terms_materialized_metric, seri_total_index_ops_metric,
                                           seri_unique_index_ops_metric, seri_duplication_ratio_metric,
                                           seri_terms_materialized_metric])
+    elif transfer_metrics:
+        metadata_obj.bulk_insert_metrics([mode_metric, request_time, *create_transfer_metrics(), results_metric,
+                                          resp_size_metric])
     else:
         metadata_obj.bulk_insert_metrics([mode_metric, request_time, results_metric, resp_size_metric])
     return metadata_obj
@@ -178,11 +288,11 @@ def create_sparql_metadata_obj(q_mode: str) -> Metadata:
     results_metric = Metric('results', '# of results')
     resp_size_metric = Metric('resp_size', 'Response content size (bytes)')
     if q_mode == 'explain':
-        metadata_obj.bulk_insert_metrics([mode_metric, request_time_metric, status_metric, status_ok_metric,
-                                          resp_size_metric])
+        metadata_obj.bulk_insert_metrics([mode_metric, request_time_metric, *create_transfer_metrics(),
+                                          status_metric, status_ok_metric, resp_size_metric])
     else:
-        metadata_obj.bulk_insert_metrics([mode_metric, request_time_metric, status_metric, status_ok_metric,
-                                          results_metric, resp_size_metric])
+        metadata_obj.bulk_insert_metrics([mode_metric, request_time_metric, *create_transfer_metrics(),
+                                          status_metric, status_ok_metric, results_metric, resp_size_metric])
     return metadata_obj
 
 
@@ -216,12 +326,16 @@ def build_gremlin_metadata_from_query(query_type: str, results: any, res: Respon
 
 
 def build_opencypher_metadata_from_query(query_type: str, results: any, res: Response = None, query_time: float = None) -> Metadata:
-    return build_propertygraph_metadata_from_default_query(results=results['results'], query_time=query_time)
+    return build_propertygraph_metadata_from_default_query(results=results['results'], query_time=query_time, res=res)
 
 
-def build_propertygraph_metadata_from_default_query(results: any, query_time: float = None) -> Metadata:
-    propertygraph_metadata = create_propertygraph_metadata_obj('query')
+def build_propertygraph_metadata_from_default_query(results: any, query_time: float = None,
+                                                    res: Response = None) -> Metadata:
+    # only queries sent over http have a response we can report transfer sizes for
+    propertygraph_metadata = create_propertygraph_metadata_obj('query', transfer_metrics=res is not None)
     propertygraph_metadata.set_metric_value('request_time', query_time)
     propertygraph_metadata.set_metric_value('resp_size', sys.getsizeof(results))
     propertygraph_metadata.set_metric_value('results', len(results))
+    if res is not None:
+        propertygraph_metadata.set_transfer_metrics(res)
     return propertygraph_metadata
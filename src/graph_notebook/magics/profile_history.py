@@ -0,0 +1,191 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import statistics
+import time
+from contextlib import contextmanager
+
+from graph_notebook.magics.metadata import Metadata
+
+DEFAULT_PROFILE_HISTORY_LOCATION = os.path.expanduser('~/graph_notebook_profile_history.db')
+REGRESSION_THRESHOLD = 1.25
+
+# maps a column of the runs table to the Metadata metric it is read from
+RUN_METRIC_COLUMNS = {
+    'wall_time': 'request_time',
+    'query_time': 'query_time',
+    'seri_time': 'seri_time',
+    'index_ops': 'query_total_index_ops',
+    'unique_index_ops': 'query_unique_index_ops',
+    'duplication_ratio': 'query_duplication_ratio',
+    'resp_size': 'resp_size',
+    'results': 'results'
+}
+
+CREATE_RUNS_TABLE = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL,
+    language TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    query TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    wall_time REAL,
+    query_time REAL,
+    seri_time REAL,
+    index_ops INTEGER,
+    unique_index_ops INTEGER,
+    duplication_ratio REAL,
+    resp_size INTEGER,
+    results INTEGER
+)
+'''
+CREATE_FINGERPRINT_INDEX = 'CREATE INDEX IF NOT EXISTS runs_fingerprint ON runs (fingerprint, timestamp)'
+
+whitespace_regex = re.compile(r'\s+')
+
+
+def query_fingerprint(language: str, query: str) -> str:
+    """
+    Generates a stable key for a query so that repeated runs of the same query can be grouped together.
+    Whitespace differences are ignored.
+    """
+    normalized = whitespace_regex.sub(' ', query).strip()
+    hashed = hashlib.sha1(f'{language.lower()}:{normalized}'.encode('utf-8'))
+    return hashed.hexdigest()[:16]
+
+
+def detect_regression(wall_times: list, threshold: float = REGRESSION_THRESHOLD):
+    """
+    Compares the most recent wall time against the median of all earlier runs.
+
+    :return: the ratio of the latest run to the earlier median, or None if there is not enough history
+    """
+    values = [t for t in wall_times if t is not None]
+    if len(values) < 2:
+        return None
+    baseline = statistics.median(values[:-1])
+    if baseline <= 0:
+        return None
+    ratio = values[-1] / baseline
+    return ratio if ratio >= threshold else None
+
+
+def sparkline_points(values: list, width: int = 120, height: int = 24) -> str:
+    """
+    Converts a series of values into the points attribute of an svg polyline.
+    """
+    values = [v for v in values if v is not None]
+    if not values:
+        return ''
+    if len(values) == 1:
+        values = values * 2
+    low = min(values)
+    span = (max(values) - low) or 1
+    step = width / (len(values) - 1)
+    points = []
+    for i, v in enumerate(values):
+        y = height - ((v - low) / span) * height
+        points.append(f'{round(i * step, 1)},{round(y, 1)}')
+    return ' '.join(points)
+
+
+class ProfileHistory(object):
+    """
+    Persists the metrics of every explain, profile and timed query run into a local SQLite database,
+    keyed by a fingerprint of the query text, so that runs can be compared over time.
+    """
+
+    def __init__(self, path: str = DEFAULT_PROFILE_HISTORY_LOCATION):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(CREATE_RUNS_TABLE)
+            conn.execute(CREATE_FINGERPRINT_INDEX)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, language: str, mode: str, query: str, metadata: Metadata, timestamp: float = None) -> str:
+        fingerprint = query_fingerprint(language, query)
+        row = {
+            'fingerprint': fingerprint,
+            'language': language,
+            'mode': mode,
+            'query': query,
+            'timestamp': timestamp if timestamp is not None else time.time()
+        }
+        for column, metric_name in RUN_METRIC_COLUMNS.items():
+            row[column] = metadata.get_metric_value(metric_name)
+
+        columns = ', '.join(row.keys())
+        placeholders = ', '.join('?' for _ in row)
+        with self._connect() as conn:
+            conn.execute(f'INSERT INTO runs ({columns}) VALUES ({placeholders})', list(row.values()))
+        return fingerprint
+
+    def runs(self, fingerprint: str = '', language: str = '', mode: str = '', limit: int = None) -> list:
+        clauses = []
+        params = []
+        if fingerprint != '':
+            clauses.append('fingerprint = ?')
+            params.append(fingerprint)
+        if language != '':
+            clauses.append('language = ?')
+            params.append(language)
+        if mode != '':
+            clauses.append('mode = ?')
+            params.append(mode)
+        where = f'WHERE {" AND ".join(clauses)}' if clauses else ''
+        sql = f'SELECT * FROM runs {where} ORDER BY timestamp ASC, id ASC'
+        with self._connect() as conn:
+            rows = [dict(r) for r in conn.execute(sql, params)]
+        if limit is not None:
+            rows = rows[-limit:]
+        return rows
+
+    def most_expensive(self, limit: int = 10, language: str = '', mode: str = '') -> list:
+        """
+        Ranks query fingerprints by their mean wall time, most expensive first. Explain, profile and query runs of
+        the same query take different times, so the runs of each mode are ranked, and checked for regressions,
+        separately.
+        """
+        grouped = {}
+        for run in self.runs(language=language, mode=mode):
+            grouped.setdefault((run['fingerprint'], run['mode']), []).append(run)
+
+        ranking = []
+        for (fingerprint, run_mode), runs in grouped.items():
+            wall_times = [r['wall_time'] for r in runs if r['wall_time'] is not None]
+            latest = runs[-1]
+            ranking.append({
+                'fingerprint': fingerprint,
+                'language': latest['language'],
+                'mode': run_mode,
+                'query': latest['query'],
+                'runs': len(runs),
+                'mean_wall_time': statistics.mean(wall_times) if wall_times else None,
+                'max_wall_time': max(wall_times) if wall_times else None,
+                'last_wall_time': latest['wall_time'],
+                'last_index_ops': latest['index_ops'],
+                'regression': detect_regression(wall_times),
+                'wall_times': wall_times
+            })
+        ranking.sort(key=lambda r: r['mean_wall_time'] if r['mean_wall_time'] is not None else -1, reverse=True)
+        return ranking[:limit]
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM runs')
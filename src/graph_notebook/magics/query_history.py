@@ -0,0 +1,302 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import datetime
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_HISTORY_LOCATION = os.path.expanduser('~/graph_notebook_query_history.db')
+DEFAULT_QUERY_HISTORY_MAX_ENTRIES = 500
+DEFAULT_QUERY_HISTORY_MAX_BYTES = 256 * 1024 * 1024  # compressed size of all stored results
+DEFAULT_QUERY_HISTORY_MAX_RESULT_BYTES = 64 * 1024 * 1024  # larger results are not stored
+
+RESULT_FORMAT_HTTP = 'http'
+RESULT_FORMAT_PICKLE = 'pickle'
+
+CREATE_ENTRIES_TABLE = '''
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    language TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    line TEXT NOT NULL,
+    query TEXT NOT NULL,
+    endpoint TEXT,
+    timestamp REAL NOT NULL,
+    last_accessed REAL NOT NULL,
+    query_time REAL,
+    result_hash TEXT NOT NULL,
+    result_format TEXT NOT NULL,
+    result_headers TEXT,
+    result_status INTEGER
+)
+'''
+CREATE_BLOBS_TABLE = '''
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    compressed_size INTEGER NOT NULL,
+    data BLOB NOT NULL
+)
+'''
+CREATE_LAST_ACCESSED_INDEX = 'CREATE INDEX IF NOT EXISTS entries_last_accessed ON entries (last_accessed, id)'
+CREATE_RESULT_HASH_INDEX = 'CREATE INDEX IF NOT EXISTS entries_result_hash ON entries (result_hash)'
+
+ENTRY_COLUMNS = ['id', 'language', 'mode', 'line', 'query', 'endpoint', 'timestamp', 'last_accessed', 'query_time',
+                 'result_hash', 'result_format']
+
+
+class ResultTooLargeError(Exception):
+    pass
+
+
+class CappedWriter(object):
+    """
+    Collects the bytes written to it, failing with ResultTooLargeError as soon as they add up to more than
+    max_bytes, so that pickling a result which is too large to keep stops early.
+    """
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes
+        self.buffer = io.BytesIO()
+
+    def write(self, data) -> int:
+        if self.max_bytes is not None and self.buffer.tell() + len(data) > self.max_bytes:
+            raise ResultTooLargeError(f'result is larger than {self.max_bytes} bytes')
+        return self.buffer.write(data)
+
+
+def encode_result(result, max_bytes: int = None) -> tuple:
+    """
+    Serializes a query result for storage. Responses of http queries are kept as their decoded body, everything
+    else (such as Gremlin vertices, edges and paths) is pickled.
+
+    :param max_bytes: size above which the result is not serialized
+    :return: the format, the serialized result, and the headers and status code of an http response, or None if
+             the result is larger than max_bytes
+    """
+    if isinstance(result, Response):
+        if max_bytes is not None and len(result.content) > max_bytes:
+            return None
+        headers = {k: v for k, v in result.headers.items() if k.lower() == 'content-type'}
+        return RESULT_FORMAT_HTTP, result.content, headers, result.status_code
+
+    writer = CappedWriter(max_bytes)
+    try:
+        pickle.Pickler(writer, protocol=pickle.HIGHEST_PROTOCOL).dump(result)
+    except ResultTooLargeError:
+        return None
+    return RESULT_FORMAT_PICKLE, writer.buffer.getvalue(), None, None
+
+
+def decode_result(result_format: str, data: bytes, headers: dict = None, status_code: int = None,
+                  query_time: float = None):
+    if result_format == RESULT_FORMAT_PICKLE:
+        # only results recorded by this notebook server's own history are ever unpickled.
+        return pickle.loads(data)
+
+    res = Response()
+    res._content = data
+    res.status_code = status_code
+    res.headers = CaseInsensitiveDict(headers or {})
+    res.encoding = 'utf-8'
+    res.elapsed = datetime.timedelta(milliseconds=query_time or 0)
+    return res
+
+
+class QueryHistory(object):
+    """
+    Keeps the text, endpoint, timing and result of every query run in a local SQLite database, so that a result can
+    be shown again without sending the query to the database. Results are compressed, and stored once per distinct
+    content no matter how many runs returned it. Once the history holds more than max_entries runs, or more than
+    max_bytes of compressed results, the least recently used runs are evicted.
+
+    The magics record runs with record_in_background, so that serializing, compressing and writing a large result
+    does not hold up the output of the query.
+    """
+
+    def __init__(self, path: str = DEFAULT_QUERY_HISTORY_LOCATION,
+                 max_entries: int = DEFAULT_QUERY_HISTORY_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_QUERY_HISTORY_MAX_BYTES,
+                 max_result_bytes: int = DEFAULT_QUERY_HISTORY_MAX_RESULT_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_result_bytes = max_result_bytes
+        self._executor = None
+        self._pending = None
+        with self._connect() as conn:
+            conn.execute(CREATE_ENTRIES_TABLE)
+            conn.execute(CREATE_BLOBS_TABLE)
+            conn.execute(CREATE_LAST_ACCESSED_INDEX)
+            conn.execute(CREATE_RESULT_HASH_INDEX)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, language: str, mode: str, line: str, query: str, endpoint: str, result,
+               query_time: float = None, timestamp: float = None):
+        """
+        :return: the id of the new entry, or None if the result is too large to be kept
+        """
+        encoded = encode_result(result, self.max_result_bytes)
+        if encoded is None:
+            return None
+        result_format, data, headers, status_code = encoded
+        result_hash = hashlib.sha256(result_format.encode('utf-8') + b':' + data).hexdigest()
+        compressed = zlib.compress(data)
+        if len(compressed) > self.max_bytes:
+            return None
+
+        timestamp = timestamp if timestamp is not None else time.time()
+        with self._connect() as conn:
+            conn.execute('INSERT OR IGNORE INTO blobs (hash, size, compressed_size, data) VALUES (?, ?, ?, ?)',
+                         [result_hash, len(data), len(compressed), sqlite3.Binary(compressed)])
+            cursor = conn.execute('INSERT INTO entries (language, mode, line, query, endpoint, timestamp, '
+                                  'last_accessed, query_time, result_hash, result_format, result_headers, '
+                                  'result_status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                  [language, mode, line, query, endpoint, timestamp, timestamp, query_time,
+                                   result_hash, result_format, json.dumps(headers) if headers is not None else None,
+                                   status_code])
+            entry_id = cursor.lastrowid
+            self._evict(conn)
+        return entry_id
+
+    def record_in_background(self, language: str, mode: str, line: str, query: str, endpoint: str, result,
+                             query_time: float = None):
+        """
+        Records a run like record, on a background thread. Runs are recorded one at a time, in the order they were
+        submitted, and a run which cannot be recorded is only logged.
+
+        :return: a Future of the id of the new entry
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='query-history')
+        future = self._executor.submit(self.record, language, mode, line, query, endpoint, result, query_time,
+                                       time.time())
+        future.add_done_callback(_log_record_error)
+        self._pending = future
+        return future
+
+    def flush(self):
+        """
+        Waits for the runs being recorded in the background.
+        """
+        if self._pending is not None:
+            wait([self._pending])
+
+    def _evict(self, conn):
+        count = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        size = conn.execute('SELECT COALESCE(SUM(compressed_size), 0) FROM blobs').fetchone()[0]
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+
+        for row in conn.execute('SELECT id, result_hash FROM entries ORDER BY last_accessed ASC, id ASC').fetchall():
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM entries WHERE id = ?', [row['id']])
+            count -= 1
+            if conn.execute('SELECT 1 FROM entries WHERE result_hash = ? LIMIT 1', [row['result_hash']]).fetchone():
+                continue
+            size -= conn.execute('SELECT compressed_size FROM blobs WHERE hash = ?',
+                                 [row['result_hash']]).fetchone()[0]
+            conn.execute('DELETE FROM blobs WHERE hash = ?', [row['result_hash']])
+
+    def entries(self, language: str = '', limit: int = None) -> list:
+        """
+        Lists the recorded runs, most recent first, without their results.
+        """
+        self.flush()
+        columns = ', '.join(f'entries.{c}' for c in ENTRY_COLUMNS)
+        sql = f'SELECT {columns}, blobs.size AS result_size FROM entries JOIN blobs ON entries.result_hash = blobs.hash'
+        params = []
+        if language != '':
+            sql += ' WHERE entries.language = ?'
+            params.append(language)
+        sql += ' ORDER BY entries.timestamp DESC, entries.id DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        with self._connect() as conn:
+            return [dict(r) for r in conn.execute(sql, params)]
+
+    def get(self, entry_id: int):
+        """
+        Reads a recorded run along with its result, which is deserialized into the 'result' key.
+
+        :return: the entry, or None if there is no entry with the given id
+        """
+        self.flush()
+        with self._connect() as conn:
+            row = conn.execute('SELECT entries.*, blobs.data, blobs.size AS result_size FROM entries '
+                               'JOIN blobs ON entries.result_hash = blobs.hash WHERE entries.id = ?',
+                               [entry_id]).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE entries SET last_accessed = ? WHERE id = ?', [time.time(), entry_id])
+
+        entry = {c: row[c] for c in ENTRY_COLUMNS + ['result_size']}
+        headers = json.loads(row['result_headers']) if row['result_headers'] is not None else None
+        entry['result'] = decode_result(row['result_format'], zlib.decompress(row['data']), headers,
+                                        row['result_status'], row['query_time'])
+        return entry
+
+    def clear(self):
+        self.flush()
+        with self._connect() as conn:
+            conn.execute('DELETE FROM entries')
+            conn.execute('DELETE FROM blobs')
+
+
+def _log_record_error(future):
+    e = future.exception()
+    if e is not None:
+        logger.debug(f'Unable to record query result in query history: {e}')
+
+
+class SnapshotClient(object):
+    """
+    Stands in for the Client while a recorded run is shown again, answering the query with the recorded result.
+    Every other request fails, so a re-rendered query never reaches the database.
+    """
+
+    def __init__(self, result, host: str = '', port: int = None):
+        self.result = result
+        self.host = host
+        self.port = port
+
+    def _replay(self, *args, **kwargs):
+        return self.result
+
+    sparql = _replay
+    sparql_explain = _replay
+    gremlin_query = _replay
+    gremlin_explain = _replay
+    gremlin_profile = _replay
+    opencypher_http = _replay
+    opencyper_bolt = _replay
+
+    def __getattr__(self, name):
+        raise RuntimeError(f'{name} is not available while showing a result from the query history')
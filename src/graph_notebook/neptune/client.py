@@ -5,22 +5,40 @@ SPDX-License-Identifier: Apache-2.0
 
 import json
 import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
 
 import requests
-from SPARQLWrapper import SPARQLWrapper
-from boto3 import Session
-from botocore.session import Session as botocoreSession
-from botocore.auth import SigV4Auth
-from botocore.awsrequest import AWSRequest
-from gremlin_python.driver import client
-from neo4j import GraphDatabase
-from tornado import httpclient
+from requests.adapters import HTTPAdapter
 
-import graph_notebook.neptune.gremlin.graphsonV3d0_MapType_objectify_patch  # noqa F401
+from graph_notebook.neptune.routing import Endpoint, EndpointRouter, parse_endpoint, is_read_only_gremlin, \
+    is_read_only_opencypher, is_read_only_sparql
 
 DEFAULT_SPARQL_CONTENT_TYPE = 'application/x-www-form-urlencoded'
 DEFAULT_PORT = 8182
 DEFAULT_REGION = 'us-east-1'
+DEFAULT_QUERY_PLAN_WORKERS = 4
+DEFAULT_BATCH_CONCURRENCY = 8
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 0.5  # seconds
+DEFAULT_MAX_RETRY_BACKOFF = 20  # seconds
+DEFAULT_HEALTH_CHECK_TIMEOUT = 2  # seconds
+DEFAULT_WARM_CONNECTION_MAX_AGE = 300  # seconds a warmed up Gremlin connection is kept for the next query
+WARM_UP_GREMLIN_QUERY = 'g.inject(0)'
+COMPRESSED_ENCODINGS = 'gzip, deflate'
+
+# The Gremlin, openCypher and AWS libraries are imported by the methods which use them, so that importing the client
+# (and with it the magics) stays fast.
+if TYPE_CHECKING:
+    from boto3 import Session
+    from gremlin_python.driver import client
 
 NEPTUNE_SERVICE_NAME = 'neptune-db'
 logger = logging.getLogger('client')
@@ -74,10 +92,171 @@ STREAM_TRIM = 'TRIM_HORIZON'
 STREAM_EXCEPTION_NOT_FOUND = 'StreamRecordsNotFoundException'
 STREAM_EXCEPTION_NOT_ENABLED = 'UnsupportedOperationException'
 
+# Requests answered with these status codes were not processed by the server, so retrying them is safe for any method.
+THROTTLED_STATUS_CODES = [429, 503]
+# These are only retried for methods which are safe to repeat.
+RETRYABLE_STATUS_CODES = [502, 504]
+IDEMPOTENT_METHODS = ['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE']
+
+BATCH_LANGUAGES = ['gremlin', 'opencypher', 'sparql']
+
+SPARQL_QUERY_FORMS = ['SELECT', 'CONSTRUCT', 'ASK', 'DESCRIBE']
+SPARQL_UPDATE_OPERATIONS = ['INSERT', 'DELETE', 'CREATE', 'CLEAR', 'DROP', 'LOAD', 'COPY', 'MOVE', 'ADD']
+# matches SPARQLWrapper, which treats anything it cannot classify as a query
+DEFAULT_SPARQL_QUERY_TYPE = 'SELECT'
+
+
+def get_sparql_query_type(query: str) -> str:
+    """
+    Classifies a SPARQL request by the first query form or update operation keyword it contains, skipping over
+    comments, IRIs and the prologue (BASE and PREFIX declarations, and the WITH clause of an update).
+    Only the start of the request is scanned, so this stays cheap for multi-megabyte INSERT DATA payloads.
+
+    :return: one of SPARQL_QUERY_FORMS or SPARQL_UPDATE_OPERATIONS, or DEFAULT_SPARQL_QUERY_TYPE if none is found.
+    """
+    i = 0
+    n = len(query)
+    while i < n:
+        c = query[i]
+        if c == '#':
+            end = query.find('\n', i)
+            i = n if end == -1 else end + 1
+        elif c == '<':
+            end = query.find('>', i)
+            i = n if end == -1 else end + 1
+        elif c.isalpha():
+            start = i
+            while i < n and (query[i].isalnum() or query[i] in '_-.:'):
+                i += 1
+            word = query[start:i].upper()
+            if word in SPARQL_QUERY_FORMS or word in SPARQL_UPDATE_OPERATIONS:
+                return word
+        else:
+            i += 1
+    return DEFAULT_SPARQL_QUERY_TYPE
+
+
+def sparql_term(value, iri: bool = False) -> str:
+    """
+    Renders a value bound to a SPARQL variable as an RDF term for use in a VALUES block.
+    """
+    if iri:
+        return f'<{value}>'
+    if type(value) is bool:
+        return 'true' if value else 'false'
+    if type(value) in [int, float]:
+        return str(value)
+    escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+    return f'"{escaped}"'
+
+
+sparql_iri_regex = re.compile(r'<[^<>"{}|^`\\\s]*>')
+sparql_word_regex = re.compile(r'[A-Za-z_][\w\-.:]*')
+
+
+def sparql_tokens(query: str):
+    """
+    Splits a SPARQL query into its keywords and braces, skipping over comments, string literals, IRIs and
+    variables, so that words inside them are not mistaken for keywords.
+
+    :return: a generator of (token, start, end) tuples, where keywords are upper cased
+    """
+    i = 0
+    n = len(query)
+    while i < n:
+        c = query[i]
+        if c == '#':
+            end = query.find('\n', i)
+            i = n if end == -1 else end + 1
+        elif c in '"\'':
+            quote = query[i:i + 3] if query.startswith(c * 3, i) else c
+            i += len(quote)
+            while i < n and not query.startswith(quote, i):
+                i += 2 if query[i] == '\\' else 1
+            i += len(quote)
+        elif c == '<' and sparql_iri_regex.match(query, i):
+            i = sparql_iri_regex.match(query, i).end()
+        elif c in '?$':
+            m = sparql_word_regex.match(query, i + 1)
+            i = m.end() if m else i + 1
+        elif c.isalpha() or c == '_':
+            m = sparql_word_regex.match(query, i)
+            yield m.group(0).upper(), i, m.end()
+            i = m.end()
+        else:
+            if c in '{}*':
+                yield c, i, i + 1
+            i += 1
+
+
+def add_sparql_values_block(query: str, bindings: dict) -> str:
+    """
+    Adds an inline VALUES block for the given bindings at the start of the outermost WHERE group of a query,
+    where the bound variables are in scope of every pattern and FILTER of the query.
+
+    A VALUES block does not reach into subqueries, and adds its variables to the results of SELECT * and
+    DESCRIBE *, so such queries cannot be bound this way, and neither can a CONSTRUCT WHERE template.
+
+    :return: the query with the VALUES block, or None if the query has no WHERE group to add it to, or cannot
+             be bound with one.
+    """
+    if not bindings:
+        return query
+    depth = 0
+    previous = None
+    anchor = None
+    where_pending = False
+    for token, start, end in sparql_tokens(query):
+        if token == '{':
+            if where_pending and anchor is None:
+                anchor = end
+            depth += 1
+        elif token == '}':
+            depth -= 1
+        elif token == 'SELECT' and depth > 0:
+            return None
+        elif token == '*' and previous in ['SELECT', 'DISTINCT', 'REDUCED', 'DESCRIBE'] and depth == 0:
+            return None
+        elif token == 'WHERE' and depth == 0:
+            if previous == 'CONSTRUCT':
+                return None
+            where_pending = True
+        if token != '{':
+            where_pending = where_pending and token == 'WHERE'
+        previous = token
+    if anchor is None:
+        return None
+    names = ' '.join(f'?{name}' for name in bindings)
+    terms = ' '.join(bindings.values())
+    values_block = f' VALUES ({names}) {{ ({terms}) }}'
+    return query[:anchor] + values_block + query[anchor:]
+
+
+def batch_rows(rows) -> list:
+    """
+    Accepts the rows of a batch as a list of dicts or as a pandas DataFrame, without importing pandas.
+    """
+    if hasattr(rows, 'to_dict'):
+        return rows.to_dict('records')
+    return list(rows)
+
 
 class Client(object):
     def __init__(self, host: str, port: int = DEFAULT_PORT, ssl: bool = True, region: str = DEFAULT_REGION,
-                 sparql_path: str = '/sparql', auth=None, session: Session = None):
+                 sparql_path: str = '/sparql', auth=None, session: 'Session' = None,
+                 pool_size: int = DEFAULT_POOL_SIZE, connect_timeout: float = None, read_timeout: float = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+                 compression: bool = True, readers: list = None):
+        """
+        :param pool_size: maximum number of keep-alive connections kept open to the host
+        :param connect_timeout: seconds to wait for a connection to be established, or None to wait forever
+        :param read_timeout: seconds to wait between bytes of the response, or None to wait forever
+        :param max_retries: number of times a throttled, failed idempotent, or unconnectable request is retried
+        :param retry_backoff: base delay in seconds for the jittered exponential backoff between retries
+        :param compression: ask query endpoints for gzip or deflate compressed responses
+        :param readers: reader endpoints, as "host" or "host:port", to load balance read-only queries across.
+                        The host is the writer, and receives every mutation as well as every other request.
+        """
         self.host = host
         self.port = port
         self.ssl = ssl
@@ -85,11 +264,25 @@ class Client(object):
         self.region = region
         self._auth = auth
         self._session = session
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.compression = compression
 
         self._http_protocol = 'https' if self.ssl else 'http'
         self._ws_protocol = 'wss' if self.ssl else 'ws'
 
         self._http_session = None
+        # Gremlin connections opened by warm_up, by (host, port), along with the time they were opened
+        self._warm_gremlin_connections = {}
+        # set by close, so that a warm up still running in the background does not open anything after it
+        self._closed = False
+        self._warm_lock = threading.Lock()
+
+        self.readers = [parse_endpoint(r, port) for r in (readers if readers is not None else [])]
+        self.router = EndpointRouter(Endpoint(host, port), self.readers, health_check=self._endpoint_healthy)
 
     def get_uri_with_port(self):
         uri = f'{self._http_protocol}://{self.host}:{self.port}'
@@ -100,7 +293,7 @@ class Client(object):
             headers = {}
 
         data = {'query': query}
-        return self.do_sparql_request(data, headers, explain, path=path)
+        return self.do_sparql_request(data, headers, explain, path=path, read_only=True)
 
     def sparql_update(self, update: str, headers=None, explain: str = '', path: str = '') -> requests.Response:
         if headers is None:
@@ -109,9 +302,11 @@ class Client(object):
         data = {'update': update}
         return self.do_sparql_request(data, headers, explain, path=path)
 
-    def do_sparql_request(self, data: dict, headers=None, explain: str = '', path: str = ''):
+    def do_sparql_request(self, data: dict, headers=None, explain: str = '', path: str = '',
+                          read_only: bool = False):
         if 'content-type' not in headers:
             headers['content-type'] = DEFAULT_SPARQL_CONTENT_TYPE
+        self._accept_compressed(headers)
 
         explain = explain.lower()
         if explain != '':
@@ -121,33 +316,34 @@ class Client(object):
                 data['explain'] = explain
 
         sparql_path = path if path != '' else self.sparql_path
-        uri = f'{self._http_protocol}://{self.host}:{self.port}/{sparql_path}'
-        req = self._prepare_request('POST', uri, data=data, headers=headers)
-        res = self._http_session.send(req)
-        return res
+        return self._send_routed('POST', sparql_path, read_only, data=data, headers=headers)
 
-    def sparql(self, query: str, headers=None, explain: str = '', path: str = '') -> requests.Response:
+    def sparql(self, query: str, headers=None, explain: str = '', path: str = '',
+               query_type: str = None) -> requests.Response:
+        """
+        :param query_type: the type of the query, as returned by get_sparql_query_type. Callers which have already
+                           classified the query can pass it in to avoid classifying it again.
+        """
         if headers is None:
             headers = {}
 
-        s = SPARQLWrapper('')
-        s.setQuery(query)
-        query_type = s.queryType.upper()
-        if query_type in ['SELECT', 'CONSTRUCT', 'ASK', 'DESCRIBE']:
+        if query_type is None:
+            query_type = get_sparql_query_type(query)
+        if is_read_only_sparql(query_type):
             return self.sparql_query(query, headers, explain, path=path)
         else:
             return self.sparql_update(query, headers, explain, path=path)
 
     # TODO: enum/constants for supported types
     def sparql_explain(self, query: str, explain: str = 'dynamic', output_format: str = 'text/html',
-                       headers=None, path: str = '') -> requests.Response:
+                       headers=None, path: str = '', query_type: str = None) -> requests.Response:
         if headers is None:
             headers = {}
 
         if 'Accept' not in headers:
             headers['Accept'] = output_format
 
-        return self.sparql(query, headers, explain, path=path)
+        return self.sparql(query, headers, explain, path=path, query_type=query_type)
 
     def sparql_status(self, query_id: str = ''):
         return self._query_status('sparql', query_id=query_id)
@@ -157,35 +353,124 @@ class Client(object):
             raise ValueError('query_id must be a non-empty string')
         return self._query_status('sparql', query_id=query_id, silent=silent, cancelQuery=True)
 
-    def get_gremlin_connection(self) -> client.Client:
-        uri = f'{self._http_protocol}://{self.host}:{self.port}/gremlin'
+    def get_gremlin_connection(self, pool_size: int = None, endpoint: Endpoint = None) -> 'client.Client':
+        if endpoint is None:
+            endpoint = self.router.writer
+        if pool_size is None:
+            warm_connection = self._take_warm_gremlin_connection(endpoint)
+            if warm_connection is not None:
+                return warm_connection
+        return self._open_gremlin_connection(pool_size, endpoint)
+
+    def _open_gremlin_connection(self, pool_size: int, endpoint: Endpoint) -> 'client.Client':
+        from gremlin_python.driver import client
+        from tornado import httpclient
+        import graph_notebook.neptune.gremlin.graphsonV3d0_MapType_objectify_patch  # noqa F401
+
+        uri = self._endpoint_url(endpoint, 'gremlin')
         request = self._prepare_request('GET', uri)
 
-        ws_url = f'{self._ws_protocol}://{self.host}:{self.port}/gremlin'
+        ws_url = f'{self._ws_protocol}://{endpoint.host}:{endpoint.port}/gremlin'
         ws_request = httpclient.HTTPRequest(ws_url, headers=dict(request.headers))
+        if pool_size is not None:
+            return client.Client(ws_request, 'g', pool_size=pool_size)
         return client.Client(ws_request, 'g')
 
-    def gremlin_query(self, query, bindings=None):
-        c = self.get_gremlin_connection()
+    def _take_warm_gremlin_connection(self, endpoint: Endpoint):
+        with self._warm_lock:
+            warm = self._warm_gremlin_connections.pop((endpoint.host, endpoint.port), None)
+        if warm is None:
+            return None
+        connection, opened_at = warm
+        if time.monotonic() - opened_at > DEFAULT_WARM_CONNECTION_MAX_AGE:
+            # the server may have closed an idle connection by now, and IAM signatures expire
+            connection.close()
+            return None
+        return connection
+
+    def warm_up(self, gremlin: bool = True) -> dict:
+        """
+        Does the work which would otherwise delay the first query: resolves IAM credentials, and then opens a
+        keep-alive connection to the writer and every reader, and a Gremlin WebSocket connection to the writer,
+        in parallel. The Gremlin connection is used by the next Gremlin query sent to the writer.
+
+        :param gremlin: open a Gremlin connection as well
+        :return: a dict of the seconds each step took, or of the exception it failed with
+        """
+        steps = {}
+
+        def timed(name, fn, *args):
+            start = time.monotonic()
+            try:
+                fn(*args)
+                steps[name] = time.monotonic() - start
+            except Exception as e:
+                logger.debug(f'Warm up step {name} failed: {e}')
+                steps[name] = e
+
+        # signing the requests below needs the credentials, so they are resolved first
+        if self.iam_enabled:
+            timed('credentials', self._resolve_credentials)
+
+        endpoints = [self.router.writer] + self.readers
+        with self._warm_lock:
+            if self._closed:
+                return steps
+            session = self._ensure_http_session()
+        with ThreadPoolExecutor(max_workers=len(endpoints) + 1) as executor:
+            for endpoint in endpoints:
+                executor.submit(timed, f'http {endpoint}', self._endpoint_healthy, endpoint, session)
+            if gremlin:
+                executor.submit(timed, 'gremlin', self._warm_gremlin_connection, self.router.writer)
+        return steps
+
+    def _resolve_credentials(self):
+        credentials = self._session.get_credentials()
+        if credentials is not None:
+            credentials.get_frozen_credentials()
+
+    def _warm_gremlin_connection(self, endpoint: Endpoint):
+        connection = self._open_gremlin_connection(1, endpoint)
         try:
-            result = c.submit(query, bindings)
-            future_results = result.all()
-            results = future_results.result()
-            c.close()
-            return results
-        except Exception as e:
-            c.close()
-            raise e
-
-    def gremlin_http_query(self, query, headers=None) -> requests.Response:
+            # the driver only connects once the first request is written
+            connection.submit(WARM_UP_GREMLIN_QUERY).all().result()
+        except Exception:
+            connection.close()
+            raise
+
+        with self._warm_lock:
+            if self._closed:
+                # nothing would ever take, or close, a connection kept by a closed client
+                previous = (connection, None)
+            else:
+                previous = self._warm_gremlin_connections.pop((endpoint.host, endpoint.port), None)
+                self._warm_gremlin_connections[(endpoint.host, endpoint.port)] = (connection, time.monotonic())
+        if previous is not None:
+            previous[0].close()
+
+    def gremlin_query(self, query, bindings=None):
+        with self._routed(is_read_only_gremlin(query)) as endpoint:
+            c = self.get_gremlin_connection(endpoint=endpoint)
+            try:
+                result = c.submit(query, bindings)
+                future_results = result.all()
+                results = future_results.result()
+                c.close()
+                return results
+            except Exception as e:
+                c.close()
+                raise e
+
+    def gremlin_http_query(self, query, headers=None, bindings: dict = None) -> requests.Response:
         if headers is None:
             headers = {}
 
-        uri = f'{self._http_protocol}://{self.host}:{self.port}/gremlin'
+        self._accept_compressed(headers)
         data = {'gremlin': query}
-        req = self._prepare_request('POST', uri, data=json.dumps(data), headers=headers)
-        res = self._http_session.send(req)
-        return res
+        if bindings:
+            data['bindings'] = bindings
+        return self._send_routed('POST', 'gremlin', is_read_only_gremlin(query), data=json.dumps(data),
+                                 headers=headers)
 
 
     def gremlin_status(self, query_id: str = '', include_waiting: bool = False):
@@ -199,44 +484,224 @@ class Client(object):
             raise ValueError('query_id must be a non-empty string')
         return self._query_status('gremlin', query_id=query_id, cancelQuery=True)
 
-    def gremlin_explain(self, query: str, args={}) -> requests.Response:
-        return self._gremlin_query_plan(query=query, plan_type='explain', args=args)
+    def gremlin_explain(self, query: str, args={}, bindings: dict = None) -> requests.Response:
+        return self._gremlin_query_plan(query=query, plan_type='explain', args=args, bindings=bindings)
 
-    def gremlin_profile(self, query: str, args={}) -> requests.Response:
-        return self._gremlin_query_plan(query=query, plan_type='profile', args=args)
+    def gremlin_profile(self, query: str, args={}, bindings: dict = None) -> requests.Response:
+        return self._gremlin_query_plan(query=query, plan_type='profile', args=args, bindings=bindings)
 
-    def _gremlin_query_plan(self, query: str, plan_type: str, args: dict, ) -> requests.Response:
-        url = f'{self._http_protocol}://{self.host}:{self.port}/gremlin/{plan_type}'
+    def _gremlin_query_plan(self, query: str, plan_type: str, args: dict, bindings: dict = None) -> requests.Response:
         data = {'gremlin': query}
+        if bindings:
+            data['bindings'] = bindings
         if args:
             for param, value in args.items():
                 data[param] = value
-        req = self._prepare_request('POST', url, data=json.dumps(data))
-        res = self._http_session.send(req)
-        return res
+        # a profile runs the query, so mutations must still be profiled on the writer.
+        return self._send_routed('POST', f'gremlin/{plan_type}', is_read_only_gremlin(query), data=json.dumps(data))
+
+    def gremlin_query_plans(self, queries: list, plan_type: str = 'profile', args: dict = None,
+                            max_workers: int = DEFAULT_QUERY_PLAN_WORKERS, bindings: dict = None) -> list:
+        """
+        Submits explain or profile requests for several queries concurrently, sharing the pooled http session.
+
+        :return: a list in the same order as :param queries, where each entry is either the response for that
+                 query or the exception that was raised while requesting it.
+        """
+        if plan_type not in ['explain', 'profile']:
+            raise ValueError('plan_type must be one of "explain" or "profile"')
+        if args is None:
+            args = {}
+
+        # the session must exist before the workers start so that they all share its connection pool.
+        self._ensure_http_session()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = [executor.submit(self._gremlin_query_plan, query=q, plan_type=plan_type, args=args,
+                                       bindings=bindings) for q in queries]
+
+        results = []
+        for f in futures:
+            exception = f.exception()
+            results.append(exception if exception is not None else f.result())
+        return results
+
+    def execute_batch(self, template: str, rows, language: str = 'gremlin',
+                      concurrency: int = DEFAULT_BATCH_CONCURRENCY, sparql_path: str = ''):
+        """
+        Runs the same parameterized query once for every row, with at most :param concurrency requests in flight.
+        Gremlin rows are sent as bindings over a pool of WebSocket connections, openCypher rows as query parameters
+        and SPARQL rows in a VALUES block, see add_sparql_values_block. String values of SPARQL rows are bound as
+        literals, unless they are wrapped in <> in which case they are bound as IRIs.
+
+        Ex. client.execute_batch('g.V(vid).valueMap()', [{'vid': '1'}, {'vid': '2'}])
 
-    def opencypher_http(self, query: str, headers: dict = None) -> requests.Response:
+        :param rows: a list of dicts, or a pandas DataFrame, mapping parameter names to values
+        :return: a generator yielding one dict per row, in the same order as the rows, as soon as it is available:
+                 {'index': 0, 'params': {...}, 'result': ..., 'error': None, 'time': 12.5}
+                 An error on one row is reported under 'error' and does not stop the rest of the batch.
+        """
+        if language not in BATCH_LANGUAGES:
+            raise ValueError(f'language must be one of {BATCH_LANGUAGES}')
+        concurrency = max(1, concurrency)
+
+        gremlin_connection = None
+        gremlin_endpoint = None
+        if language == 'gremlin':
+            gremlin_connection, gremlin_endpoint = self._open_routed_gremlin_connection(
+                is_read_only_gremlin(template), concurrency)
+        else:
+            # the session must exist before the workers start so that they all share its connection pool.
+            self._ensure_http_session()
+
+        def run(params: dict):
+            if language != 'sparql':
+                return self._run_query(language, template, params, gremlin_connection=gremlin_connection)
+            bindings = {}
+            for name, value in params.items():
+                iri = type(value) is str and value.startswith('<') and value.endswith('>')
+                bindings[name] = sparql_term(value[1:-1] if iri else value, iri=iri)
+            query = add_sparql_values_block(template, bindings)
+            if query is None:
+                raise ValueError('SPARQL batch templates must have a WHERE clause to bind the row values to, and no '
+                                 'subquery or SELECT *')
+            return self._run_query(language, query, sparql_path=sparql_path)
+
+        def timed_run(params: dict):
+            start = time.time()
+            result = run(params)
+            return result, (time.time() - start) * 1000
+
+        def collect(index, params, future):
+            entry = {'index': index, 'params': params, 'result': None, 'error': None, 'time': None}
+            try:
+                entry['result'], entry['time'] = future.result()
+            except Exception as e:
+                entry['error'] = e
+            return entry
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                # keep a bounded window of submitted rows so that large batches are not all queued at once
+                pending = deque()
+                for index, params in enumerate(batch_rows(rows)):
+                    pending.append((index, params, executor.submit(timed_run, params)))
+                    if len(pending) >= concurrency * 2:
+                        yield collect(*pending.popleft())
+                while pending:
+                    yield collect(*pending.popleft())
+        finally:
+            if gremlin_connection is not None:
+                gremlin_connection.close()
+                self.router.release(gremlin_endpoint)
+
+    def execute_parallel(self, queries: list, concurrency: int = DEFAULT_BATCH_CONCURRENCY, sparql_path: str = ''):
+        """
+        Runs independent queries concurrently, with at most :param concurrency requests in flight. Gremlin queries
+        share a pool of WebSocket connections, and the rest share the pooled http session.
+
+        Ex. client.execute_parallel([('gremlin', 'g.V().count()'), ('opencypher', 'MATCH (n) RETURN count(n)')])
+
+        :param queries: a list of (language, query) tuples
+        :return: a generator yielding one dict per query as soon as it has finished, in the order they finish:
+                 {'index': 0, 'language': 'gremlin', 'query': '...', 'result': ..., 'error': None, 'time': 12.5}
+                 An error on one query is reported under 'error' and does not stop the others.
+        """
+        for language, _ in queries:
+            if language not in BATCH_LANGUAGES:
+                raise ValueError(f'language must be one of {BATCH_LANGUAGES}')
+        concurrency = max(1, min(concurrency, len(queries)))
+
+        gremlin_queries = [query for language, query in queries if language == 'gremlin']
+        gremlin_connection = None
+        gremlin_endpoint = None
+        if gremlin_queries:
+            gremlin_connection, gremlin_endpoint = self._open_routed_gremlin_connection(
+                all(is_read_only_gremlin(q) for q in gremlin_queries), min(concurrency, len(gremlin_queries)))
+        if len(gremlin_queries) < len(queries):
+            # the session must exist before the workers start so that they all share its connection pool.
+            self._ensure_http_session()
+
+        def timed_run(language: str, query: str):
+            start = time.time()
+            result = self._run_query(language, query, gremlin_connection=gremlin_connection, sparql_path=sparql_path)
+            return result, (time.time() - start) * 1000
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = {executor.submit(timed_run, language, query): index
+                           for index, (language, query) in enumerate(queries)}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    language, query = queries[index]
+                    entry = {'index': index, 'language': language, 'query': query, 'result': None, 'error': None,
+                             'time': None}
+                    try:
+                        entry['result'], entry['time'] = future.result()
+                    except Exception as e:
+                        entry['error'] = e
+                    yield entry
+        finally:
+            if gremlin_connection is not None:
+                gremlin_connection.close()
+                self.router.release(gremlin_endpoint)
+
+    def _open_routed_gremlin_connection(self, read_only: bool, pool_size: int):
+        """
+        Opens a pooled gremlin connection for execute_batch and execute_parallel to the endpoint chosen by the
+        router. The caller releases the endpoint once it closes the connection, unless the connection cannot be
+        opened, in which case it is released here.
+
+        :return: a tuple of the connection and its endpoint
+        """
+        endpoint = self.router.acquire(read_only)
+        try:
+            return self.get_gremlin_connection(pool_size=pool_size, endpoint=endpoint), endpoint
+        except Exception:
+            self.router.release(endpoint)
+            raise
+
+    def _run_query(self, language: str, query: str, params: dict = None, gremlin_connection=None,
+                   sparql_path: str = ''):
+        """
+        Runs a query for execute_batch and execute_parallel, returning its deserialized result.
+        """
+        if language == 'gremlin':
+            return gremlin_connection.submit(query, params).all().result()
+        elif language == 'opencypher':
+            res = self.opencypher_http(query, parameters=params)
+            res.raise_for_status()
+            return res.json()
+        res = self.sparql(query, headers={'Accept': 'application/sparql-results+json'}, path=sparql_path)
+        res.raise_for_status()
+        try:
+            return res.json()
+        except ValueError:
+            # updates do not always answer with json
+            return res.content.decode('utf-8')
+
+    def opencypher_http(self, query: str, headers: dict = None, parameters: dict = None) -> requests.Response:
         if headers is None:
             headers = {}
 
         if 'content-type' not in headers:
             headers['content-type'] = 'application/x-www-form-urlencoded'
+        self._accept_compressed(headers)
 
-        url = f'{self._http_protocol}://{self.host}:{self.port}/openCypher'
         data = {
             'query': query
         }
+        if parameters:
+            data['parameters'] = json.dumps(parameters)
 
-        req = self._prepare_request('POST', url, data=data, headers=headers)
-        res = self._http_session.send(req)
-        return res
+        return self._send_routed('POST', 'openCypher', is_read_only_opencypher(query), data=data, headers=headers)
 
     def opencyper_bolt(self, query: str, **kwargs):
-        driver = self.get_opencypher_driver()
-        with driver.session() as session:
-            res = session.run(query, kwargs)
-            data = res.data()
-        driver.close()
+        with self._routed(is_read_only_opencypher(query)) as endpoint:
+            driver = self.get_opencypher_driver(endpoint=endpoint)
+            with driver.session() as session:
+                res = session.run(query, kwargs)
+                data = res.data()
+            driver.close()
         return data
 
     def opencypher_status(self, query_id: str = ''):
@@ -248,8 +713,12 @@ class Client(object):
 
         return self._query_status('openCypher', query_id=query_id, cancelQuery=True, silent=silent)
 
-    def get_opencypher_driver(self, user: str = 'neo4j', password: str = 'password'):
-        url = f'bolt://{self.host}:{self.port}'
+    def get_opencypher_driver(self, user: str = 'neo4j', password: str = 'password', endpoint: Endpoint = None):
+        from neo4j import GraphDatabase
+
+        if endpoint is None:
+            endpoint = self.router.writer
+        url = f'bolt://{endpoint.host}:{endpoint.port}'
 
         if self._session:
             method = 'POST'
@@ -272,13 +741,13 @@ class Client(object):
         for k, v in kwargs.items():
             params[k] = v
         req = self._prepare_request('GET', url, params=params,data='')
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res.json()
 
     def status(self) -> requests.Response:
         url = f'{self._http_protocol}://{self.host}:{self.port}/status'
         req = self._prepare_request('GET', url, data='')
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def load(self, source: str, source_format: str, iam_role_arn: str = None, **kwargs) -> requests.Response:
@@ -302,7 +771,7 @@ class Client(object):
         url = f'{self._http_protocol}://{self.host}:{self.port}/loader'
         raw = json.dumps(payload)
         req = self._prepare_request('POST', url, data=raw, headers={'content-type': 'application/json'})
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def load_status(self, load_id: str = '', **kwargs) -> requests.Response:
@@ -315,14 +784,14 @@ class Client(object):
 
         url = f'{self._http_protocol}://{self.host}:{self.port}/loader'
         req = self._prepare_request('GET', url, params=params)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def cancel_load(self, load_id: str) -> requests.Response:
         url = f'{self._http_protocol}://{self.host}:{self.port}/loader'
         params = {'loadId': load_id}
         req = self._prepare_request('DELETE', url, params=params)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def initiate_reset(self) -> requests.Response:
@@ -331,7 +800,7 @@ class Client(object):
         }
         url = f'{self._http_protocol}://{self.host}:{self.port}/system'
         req = self._prepare_request('POST', url, data=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def perform_reset(self, token: str) -> requests.Response:
@@ -341,7 +810,7 @@ class Client(object):
         }
         url = f'{self._http_protocol}://{self.host}:{self.port}/system'
         req = self._prepare_request('POST', url, data=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def dataprocessing_start(self, s3_input_uri: str, s3_output_uri: str, **kwargs) -> requests.Response:
@@ -355,7 +824,7 @@ class Client(object):
 
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/dataprocessing'
         req = self._prepare_request('POST', url, data=json.dumps(data), headers={'content-type': 'application/json'})
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def dataprocessing_job_status(self, job_id: str, neptune_iam_role_arn: str = '') -> requests.Response:
@@ -364,7 +833,7 @@ class Client(object):
         if neptune_iam_role_arn != '':
             data['neptuneIamRoleArn'] = neptune_iam_role_arn
         req = self._prepare_request('GET', url, params=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def dataprocessing_list(self, max_items: int = 10, neptune_iam_role_arn: str = '') -> requests.Response:
@@ -376,7 +845,7 @@ class Client(object):
         if neptune_iam_role_arn != '':
             data['neptuneIamRoleArn'] = neptune_iam_role_arn
         req = self._prepare_request('GET', url, params=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def dataprocessing_stop(self, job_id: str, clean=False, neptune_iam_role_arn: str = '') -> requests.Response:
@@ -388,7 +857,7 @@ class Client(object):
             data['neptuneIamRoleArn'] = neptune_iam_role_arn
 
         req = self._prepare_request('DELETE', url, params=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def modeltraining_start(self, data_processing_job_id: str, train_model_s3_location: str,
@@ -410,7 +879,7 @@ class Client(object):
 
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/modeltraining'
         req = self._prepare_request('POST', url, data=json.dumps(data), headers={'content-type': 'application/json'})
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def modeltraining_list(self, max_items: int = 10, neptune_iam_role_arn: str = '') -> requests.Response:
@@ -423,14 +892,14 @@ class Client(object):
 
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/modeltraining'
         req = self._prepare_request('GET', url, params=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def modeltraining_job_status(self, training_job_id: str, neptune_iam_role_arn: str = '') -> requests.Response:
         data = {} if neptune_iam_role_arn == '' else {'neptuneIamRoleArn': neptune_iam_role_arn}
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/modeltraining/{training_job_id}'
         req = self._prepare_request('GET', url, params=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def modeltraining_stop(self, training_job_id: str, neptune_iam_role_arn: str = '',
@@ -444,7 +913,7 @@ class Client(object):
 
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/modeltraining/{training_job_id}'
         req = self._prepare_request('DELETE', url, params=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def modeltransform_create(self, output_s3_location: str, dataprocessing_job_id: str = '',
@@ -478,7 +947,7 @@ class Client(object):
 
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/modeltransform'
         req = self._prepare_request('POST', url, data=json.dumps(data), headers=headers)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def modeltransform_status(self, job_id: str, iam_role: str = '') -> requests.Response:
@@ -488,7 +957,7 @@ class Client(object):
 
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/modeltransform/{job_id}'
         req = self._prepare_request('GET', url, params=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def modeltransform_list(self, iam_role: str = '', max_items: int = 10) -> requests.Response:
@@ -501,7 +970,7 @@ class Client(object):
 
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/modeltransform'
         req = self._prepare_request('GET', url, params=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def modeltransform_stop(self, job_id: str, iam_role: str = '', clean: bool = False) -> requests.Response:
@@ -513,7 +982,7 @@ class Client(object):
 
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/modeltransform/{job_id}'
         req = self._prepare_request('DELETE', url, params=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def endpoints_create(self, model_training_job_id: str = '', model_transform_job_id: str = '',
@@ -533,21 +1002,21 @@ class Client(object):
 
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/endpoints'
         req = self._prepare_request('POST', url, data=json.dumps(data), headers={'content-type': 'application/json'})
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def endpoints_status(self, endpoint_id: str, neptune_iam_role_arn: str = '') -> requests.Response:
         data = {} if neptune_iam_role_arn == '' else {'neptuneIamRoleArn': neptune_iam_role_arn}
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/endpoints/{endpoint_id}'
         req = self._prepare_request('GET', url, params=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def endpoints_delete(self, endpoint_id: str, neptune_iam_role_arn: str = '') -> requests.Response:
         data = {} if neptune_iam_role_arn == '' else {'neptuneIamRoleArn': neptune_iam_role_arn}
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/endpoints/{endpoint_id}'
         req = self._prepare_request('DELETE', url, params=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def endpoints(self, max_items: int = 10, neptune_iam_role_arn: str = '') -> requests.Response:
@@ -559,21 +1028,21 @@ class Client(object):
 
         url = f'{self._http_protocol}://{self.host}:{self.port}/ml/endpoints'
         req = self._prepare_request('GET', url, params=data)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def export(self, host: str, params: dict, ssl: bool = True) -> requests.Response:
         protocol = 'https' if ssl else 'http'
         url = f'{protocol}://{host}/{EXPORT_ACTION}'
         req = self._prepare_request('POST', url, data=json.dumps(params), service="execute-api")
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def export_status(self, host, job_id, ssl: bool = True) -> requests.Response:
         protocol = 'https' if ssl else 'http'
         url = f'{protocol}://{host}/{EXPORT_ACTION}/{job_id}'
         req = self._prepare_request('GET', url, service="execute-api")
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
     def _query_status(self, language: str, *, query_id: str = '', **kwargs) -> requests.Response:
@@ -589,9 +1058,63 @@ class Client(object):
         }
         url = f'{self._http_protocol}://{self.host}:{self.port}/{language}/status'
         req = self._prepare_request('POST', url, data=data, headers=headers)
-        res = self._http_session.send(req)
+        res = self._http_send(req)
         return res
 
+    def check_endpoint_health(self) -> dict:
+        """
+        Probes the status endpoint of every reader, putting back any which have recovered.
+
+        :return: a dict of each reader to whether it is healthy
+        """
+        return self.router.check_health()
+
+    def _endpoint_healthy(self, endpoint: Endpoint, session: requests.Session = None) -> bool:
+        """
+        :param session: session to send the request on, rather than the session of the client
+        """
+        if session is None:
+            session = self._ensure_http_session()
+        req = self._prepare_request('GET', self._endpoint_url(endpoint, 'status'), data='')
+        # sent without retries, an unhealthy reader should be found out quickly
+        res = session.send(req, timeout=DEFAULT_HEALTH_CHECK_TIMEOUT)
+        res.close()
+        return res.status_code < 500
+
+    def _endpoint_url(self, endpoint: Endpoint, path: str) -> str:
+        return f'{self._http_protocol}://{endpoint.host}:{endpoint.port}/{path}'
+
+    @contextmanager
+    def _routed(self, read_only: bool):
+        endpoint = self.router.acquire(read_only)
+        try:
+            yield endpoint
+        except OSError as e:
+            # connection failures from requests, the gremlin driver and the bolt driver are all OSErrors,
+            # while a slow query timing out says nothing about the health of the endpoint.
+            if not isinstance(e, requests.exceptions.ReadTimeout):
+                self.router.mark_unhealthy(endpoint)
+            raise
+        finally:
+            self.router.release(endpoint)
+
+    def _send_routed(self, method, path: str, read_only: bool, *, data=None, headers=None) -> requests.Response:
+        """
+        Sends a request to the endpoint chosen by the router. A read which cannot connect to a reader is sent again
+        to the next endpoint, since reads are always safe to repeat.
+        """
+        attempts = 1 + (len(self.readers) if read_only else 0)
+        for attempt in range(attempts):
+            try:
+                with self._routed(read_only) as endpoint:
+                    req = self._prepare_request(method, self._endpoint_url(endpoint, path), data=data,
+                                                headers=headers)
+                    return self._http_send(req)
+            except requests.exceptions.ConnectionError:
+                if endpoint is self.router.writer or attempt == attempts - 1:
+                    raise
+                logger.debug(f'reader {endpoint} is unavailable, sending {method} {path} to another endpoint')
+
     def _prepare_request(self, method, url, *, data=None, params=None, headers=None, service=NEPTUNE_SERVICE_NAME):
         self._ensure_http_session()
         request = requests.Request(method=method, url=url, data=data, params=params, headers=headers, auth=self._auth)
@@ -603,6 +1126,9 @@ class Client(object):
         return request.prepare()
 
     def _get_aws_request(self, method, url, *, data=None, params=None, headers=None, service=NEPTUNE_SERVICE_NAME):
+        from botocore.auth import SigV4Auth
+        from botocore.awsrequest import AWSRequest
+
         req = AWSRequest(method=method, url=url, data=data, params=params, headers=headers)
         if self.iam_enabled:
             credentials = self._session.get_credentials()
@@ -621,20 +1147,91 @@ class Client(object):
         else:
             return req
 
-    def _ensure_http_session(self):
+    def _accept_compressed(self, headers: dict):
+        """
+        Requests are prepared outside of the session, so they do not pick up its default Accept-Encoding header.
+        The header must be set here, before the request is signed, for the server to compress the response.
+        Decompression happens transparently as the response body is read.
+        """
+        if self.compression and not any(k.lower() == 'accept-encoding' for k in headers):
+            headers['Accept-Encoding'] = COMPRESSED_ENCODINGS
+
+    def _ensure_http_session(self) -> requests.Session:
         if not self._http_session:
             self._http_session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            self._http_session.mount('http://', adapter)
+            self._http_session.mount('https://', adapter)
+        return self._http_session
+
+    def _http_send(self, req: requests.PreparedRequest) -> requests.Response:
+        """
+        Sends a prepared request on the pooled session, retrying with jittered exponential backoff when the
+        request is throttled, could not connect, or failed in a way that is safe to repeat for its method.
+        """
+        if self.connect_timeout is None and self.read_timeout is None:
+            timeout = None
+        else:
+            timeout = (self.connect_timeout, self.read_timeout)
+        idempotent = req.method.upper() in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            try:
+                res = self._http_session.send(req, timeout=timeout)
+            except requests.exceptions.ConnectTimeout:
+                # the request never reached the server
+                if attempt >= self.max_retries:
+                    raise
+                retry_after = None
+            except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout):
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                retry_after = None
+            else:
+                retryable = res.status_code in THROTTLED_STATUS_CODES or \
+                    (idempotent and res.status_code in RETRYABLE_STATUS_CODES)
+                if not retryable or attempt >= self.max_retries:
+                    return res
+                retry_after = res.headers.get('Retry-After')
+                res.close()
+
+            delay = self._retry_delay(attempt, retry_after)
+            logger.debug(f'retrying {req.method} {req.url} in {delay:.2f}s (attempt {attempt + 1})')
+            time.sleep(delay)
+            attempt += 1
+
+    def _retry_delay(self, attempt: int, retry_after: str = None) -> float:
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), DEFAULT_MAX_RETRY_BACKOFF)
+            except ValueError:
+                pass
+        # full jitter, so that concurrent requests which were throttled together do not retry together.
+        return random.uniform(0, min(DEFAULT_MAX_RETRY_BACKOFF, self.retry_backoff * (2 ** attempt)))
 
-    def set_session(self, session: Session):
+    def set_session(self, session: 'Session'):
         self._session = session
 
     def close(self):
-        if self._http_session:
-            self._http_session.close()
+        with self._warm_lock:
+            self._closed = True
+            http_session = self._http_session
             self._http_session = None
+            warm_connections = list(self._warm_gremlin_connections.values())
+            self._warm_gremlin_connections = {}
+        if http_session:
+            http_session.close()
+        for connection, _ in warm_connections:
+            connection.close()
 
     @property
     def iam_enabled(self):
+        if self._session is None:
+            return False
+        from boto3 import Session
+        from botocore.session import Session as botocoreSession
+
         return type(self._session) in [Session, botocoreSession]
 
 
@@ -664,9 +1261,31 @@ class ClientBuilder(object):
         self.args['region'] = region
         return ClientBuilder(self.args)
 
-    def with_iam(self, session: Session):
+    def with_iam(self, session: 'Session'):
         self.args['session'] = session
         return ClientBuilder(self.args)
 
+    def with_pool_size(self, pool_size: int):
+        self.args['pool_size'] = pool_size
+        return ClientBuilder(self.args)
+
+    def with_timeouts(self, connect_timeout: float = None, read_timeout: float = None):
+        self.args['connect_timeout'] = connect_timeout
+        self.args['read_timeout'] = read_timeout
+        return ClientBuilder(self.args)
+
+    def with_retries(self, max_retries: int, retry_backoff: float = DEFAULT_RETRY_BACKOFF):
+        self.args['max_retries'] = max_retries
+        self.args['retry_backoff'] = retry_backoff
+        return ClientBuilder(self.args)
+
+    def with_compression(self, compression: bool):
+        self.args['compression'] = compression
+        return ClientBuilder(self.args)
+
+    def with_readers(self, readers: list):
+        self.args['readers'] = readers
+        return ClientBuilder(self.args)
+
     def build(self) -> Client:
         return Client(**self.args)
@@ -0,0 +1,151 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import re
+import threading
+import time
+from typing import Callable
+
+DEFAULT_UNHEALTHY_COOLDOWN = 5  # seconds
+DEFAULT_MAX_UNHEALTHY_COOLDOWN = 60  # seconds
+
+SPARQL_READ_QUERY_TYPES = ['SELECT', 'CONSTRUCT', 'ASK', 'DESCRIBE']
+
+# Gremlin steps which write to the graph. Matching is intentionally loose: a read which happens to mention one of
+# these (for example inside a string) is sent to the writer, which is always safe.
+GREMLIN_MUTATING_STEPS = re.compile(r'\b(addV|addE|property|drop|mergeV|mergeE|io|tx)\s*\(')
+OPENCYPHER_MUTATING_CLAUSES = re.compile(r'\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|LOAD\s+CSV|CALL)\b',
+                                         re.IGNORECASE)
+
+
+def is_read_only_gremlin(query: str) -> bool:
+    return GREMLIN_MUTATING_STEPS.search(query) is None
+
+
+def is_read_only_opencypher(query: str) -> bool:
+    # procedures may write, so any CALL is sent to the writer.
+    return OPENCYPHER_MUTATING_CLAUSES.search(query) is None
+
+
+def is_read_only_sparql(query_type: str) -> bool:
+    return query_type.upper() in SPARQL_READ_QUERY_TYPES
+
+
+def parse_endpoint(endpoint, default_port: int):
+    """
+    Ex. 'reader-1.example.com:8182' -> Endpoint('reader-1.example.com', 8182)
+        'reader-1.example.com'      -> Endpoint('reader-1.example.com', default_port)
+    """
+    if isinstance(endpoint, Endpoint):
+        return endpoint
+    host, _, port = str(endpoint).strip().rpartition(':')
+    if host == '' or not port.isdigit():
+        return Endpoint(str(endpoint).strip(), default_port)
+    return Endpoint(host, int(port))
+
+
+class Endpoint(object):
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.outstanding = 0
+        self.healthy = True
+        self.failures = 0
+        self.retry_at = 0.0
+
+    def __repr__(self):
+        return f'{self.host}:{self.port}'
+
+
+class EndpointRouter(object):
+    """
+    Chooses the endpoint for each request. Mutations, and anything not known to be read-only, go to the writer.
+    Reads are sent to the healthy reader with the fewest outstanding requests, taking turns between readers
+    which are tied, and fall back to the writer when there is no healthy reader.
+
+    A reader is marked unhealthy when a request to it cannot connect, and is left out for a cooldown which doubles
+    on each consecutive failure. Once the cooldown has passed, the reader is probed with :param health_check
+    before it is given requests again.
+    """
+
+    def __init__(self, writer: Endpoint, readers: list = None, health_check: Callable[[Endpoint], bool] = None,
+                 unhealthy_cooldown: float = DEFAULT_UNHEALTHY_COOLDOWN):
+        self.writer = writer
+        self.readers = readers if readers is not None else []
+        self.health_check = health_check
+        self.unhealthy_cooldown = unhealthy_cooldown
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def acquire(self, read_only: bool = False) -> Endpoint:
+        """
+        Picks an endpoint and counts the request against it. Every acquire must be followed by a release.
+        """
+        endpoint = self.writer
+        if read_only and self.readers:
+            self._probe_recovered_readers()
+            with self._lock:
+                healthy = [r for r in self.readers if r.healthy]
+                if healthy:
+                    start = self._next % len(healthy)
+                    self._next += 1
+                    rotated = healthy[start:] + healthy[:start]
+                    endpoint = min(rotated, key=lambda r: r.outstanding)
+
+        with self._lock:
+            endpoint.outstanding += 1
+        return endpoint
+
+    def release(self, endpoint: Endpoint):
+        with self._lock:
+            endpoint.outstanding = max(0, endpoint.outstanding - 1)
+
+    def mark_unhealthy(self, endpoint: Endpoint):
+        if endpoint is self.writer:
+            return
+        with self._lock:
+            endpoint.healthy = False
+            endpoint.failures += 1
+            cooldown = min(DEFAULT_MAX_UNHEALTHY_COOLDOWN, self.unhealthy_cooldown * (2 ** (endpoint.failures - 1)))
+            endpoint.retry_at = time.time() + cooldown
+
+    def mark_healthy(self, endpoint: Endpoint):
+        with self._lock:
+            endpoint.healthy = True
+            endpoint.failures = 0
+
+    def check_health(self) -> dict:
+        """
+        Probes every reader now, regardless of cooldowns.
+
+        :return: a dict of each reader to whether it is healthy
+        """
+        for reader in self.readers:
+            self._probe(reader)
+        return {str(r): r.healthy for r in self.readers}
+
+    def _probe_recovered_readers(self):
+        now = time.time()
+        with self._lock:
+            due = [r for r in self.readers if not r.healthy and r.retry_at <= now]
+            for reader in due:
+                # keeps concurrent requests from probing the same reader while this probe is running
+                reader.retry_at = now + self.unhealthy_cooldown
+        for reader in due:
+            self._probe(reader)
+
+    def _probe(self, reader: Endpoint):
+        if self.health_check is None:
+            healthy = True
+        else:
+            try:
+                healthy = self.health_check(reader)
+            except Exception:
+                healthy = False
+
+        if healthy:
+            self.mark_healthy(reader)
+        else:
+            self.mark_unhealthy(reader)
@@ -6,9 +6,11 @@ SPDX-License-Identifier: Apache-2.0
 from collections import defaultdict
 import collections
 import re
+from functools import lru_cache
 from networkx import MultiDiGraph
 from .Network import Network
-from typing import Tuple
+from .PropertyIndex import PropertyIndex
+from typing import Callable, Tuple
 from graph_notebook.decorators.decorators import check_if_dict_access_regex, get_variable_injection_dict_and_indices
 
 EVENT_ADD_NODE = 'add_node'
@@ -16,8 +18,80 @@ EVENT_ADD_NODE_DATA = 'add_node_data'
 EVENT_ADD_NODE_PROPERTY = 'add_node_property'
 EVENT_ADD_EDGE = 'add_edge'
 EVENT_ADD_EDGE_DATA = 'add_edge_data'
+EVENT_UPDATE_VISIBILITY = 'update_visibility'
+EVENT_UPDATE_NODES = 'update_nodes'
 
-VALID_EVENTS = [EVENT_ADD_NODE, EVENT_ADD_NODE_DATA, EVENT_ADD_NODE_PROPERTY, EVENT_ADD_EDGE, EVENT_ADD_EDGE_DATA]
+VALID_EVENTS = [EVENT_ADD_NODE, EVENT_ADD_NODE_DATA, EVENT_ADD_NODE_PROPERTY, EVENT_ADD_EDGE, EVENT_ADD_EDGE_DATA,
+                EVENT_UPDATE_VISIBILITY, EVENT_UPDATE_NODES]
+
+# the labels of a result repeat (a few node labels, a few hundred airport codes), so their titles and truncated
+# labels are kept in a cache shared by every network, keyed by the raw value and the maximum label length
+LABEL_CACHE_SIZE = 65536
+
+
+def edge_display_id(edge_key: tuple) -> str:
+    """
+    Converts a (from_id, to_id, edge_id) edge key into the id the edge is given by the front-end widget.
+    """
+    from_id, to_id, edge_id = edge_key
+    return f'{from_id}:{to_id}:{edge_id}'
+
+
+def _truncate(title: str, max_len: int) -> str:
+    return title if len(title) <= max_len else title[:max_len - 3] + '...'
+
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE, typed=True)
+def truncate_label(title: str, max_len: int) -> str:
+    """
+    Truncates a title to a label of at most max_len characters, ending it in '...' if it had to be cut.
+    """
+    return _truncate(title, max_len)
+
+
+def _format_label(value, max_len: int) -> Tuple[str, str]:
+    if isinstance(value, list) and len(value) > 1:
+        title = str(value)
+    else:
+        title = str(value).strip("[]'")
+    return title, _truncate(title, max_len)
+
+
+# typed, so that 1, 1.0 and True are formatted as themselves rather than as whichever of them was cached first
+@lru_cache(maxsize=LABEL_CACHE_SIZE, typed=True)
+def _format_hashable_label(value, max_len: int) -> Tuple[str, str]:
+    return _format_label(value, max_len)
+
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE, typed=True)
+def _format_single_list_label(value, max_len: int) -> Tuple[str, str]:
+    return _format_label([value], max_len)
+
+
+# typed only tells apart the types of the arguments themselves, so the types of the values in the list are part
+# of the key
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def _format_list_label(value: tuple, types: tuple, max_len: int) -> Tuple[str, str]:
+    return _format_label(list(value), max_len)
+
+
+def format_label(value, max_len: int) -> Tuple[str, str]:
+    """
+    Formats a property value into the title of a node or edge, and the label which is its title truncated
+    to max_len characters. Lists of one value are shown as that value.
+
+    :return: a tuple of the title and the label
+    """
+    try:
+        if type(value) is list:
+            # valueMap() results hold every property as a list, mostly of a single value
+            if len(value) == 1:
+                return _format_single_list_label(value[0], max_len)
+            return _format_list_label(tuple(value), tuple(map(type, value)), max_len)
+        return _format_hashable_label(value, max_len)
+    except TypeError:
+        # values which cannot be hashed, like maps, are formatted every time
+        return _format_label(value, max_len)
 
 
 class EventfulNetwork(Network):
@@ -42,16 +116,13 @@ class EventfulNetwork(Network):
             graph = MultiDiGraph()
         super().__init__(graph)
 
+        self.node_index = PropertyIndex(lambda: self.graph.nodes(data=True))
+        self.edge_index = PropertyIndex(lambda: ((e[:3], e[3]) for e in self.graph.edges(keys=True, data=True)))
+        self.hidden_nodes = set()
+        self.hidden_edges = set()
+
     def strip_and_truncate_label_and_title(self, old_label, max_len: int) -> Tuple[str, str]:
-        if isinstance(old_label, list) and len(old_label) > 1:
-            title = str(old_label)
-        else:
-            title = str(old_label).strip("[]'")
-        if len(title) <= max_len:
-            label = title
-        else:
-            label = title[:max_len - 3] + '...'
-        return title, label
+        return format_label(old_label, max_len)
 
     def single_subproperty_check_and_convert_to_tuple(self, property_with_index):
         """
@@ -117,6 +188,11 @@ class EventfulNetwork(Network):
         self.callbacks[event].append(callback)
 
     def dispatch_callbacks(self, event_name, data):
+        if event_name != EVENT_UPDATE_VISIBILITY:
+            # any change to the graph makes the property indexes stale
+            self.node_index.invalidate()
+            self.edge_index.invalidate()
+
         if event_name in self.callbacks:
             for c in self.callbacks[event_name]:
                 c(self, event_name, data)
@@ -175,3 +251,106 @@ class EventfulNetwork(Network):
         }
 
         self.dispatch_callbacks(EVENT_ADD_EDGE_DATA, d)
+
+    def find_nodes(self, key, value=None, predicate: Callable = None) -> set:
+        """
+        Finds nodes using an index over the given key of each node's data.
+
+        Ex. find_nodes('properties.country', 'US') or find_nodes('properties.runways', predicate=lambda r: r > 3)
+
+        :param key: the node field to match on. Nested fields are separated with a '.'
+        :param value: match nodes with this value
+        :param predicate: match nodes where the predicate is True for the value of the field
+        :return: the ids of the matching nodes
+        """
+        return self.node_index.find(key, value, predicate)
+
+    def find_edges(self, key, value=None, predicate: Callable = None) -> set:
+        """
+        Finds edges in the same way as find_nodes.
+
+        :return: the (from_id, to_id, edge_id) keys of the matching edges
+        """
+        return self.edge_index.find(key, value, predicate)
+
+    def hide_nodes(self, key, value=None, predicate: Callable = None):
+        self.set_visibility(hidden_nodes=self.hidden_nodes | self.find_nodes(key, value, predicate))
+
+    def filter_nodes(self, key, value=None, predicate: Callable = None):
+        """
+        Hides every node that does not match, leaving only the matching nodes visible.
+        """
+        self.set_visibility(hidden_nodes=set(self.graph.nodes) - self.find_nodes(key, value, predicate))
+
+    def hide_edges(self, key, value=None, predicate: Callable = None):
+        self.set_visibility(hidden_edges=self.hidden_edges | self.find_edges(key, value, predicate))
+
+    def filter_edges(self, key, value=None, predicate: Callable = None):
+        """
+        Hides every edge that does not match, leaving only the matching edges visible.
+        """
+        self.set_visibility(hidden_edges=set(self.graph.edges(keys=True)) - self.find_edges(key, value, predicate))
+
+    def show_all(self):
+        self.set_visibility(hidden_nodes=set(), hidden_edges=set())
+
+    def set_visibility(self, hidden_nodes: set = None, hidden_edges: set = None):
+        """
+        Replaces the set of hidden nodes and/or edges, and dispatches only the elements whose visibility changed.
+        The payload of the dispatched event looks like:
+
+        {
+            'hide_nodes': ['1'],
+            'show_nodes': ['2'],
+            'hide_edges': ['1:3:1_to_3'],
+            'show_edges': []
+        }
+        """
+        payload = {'hide_nodes': [], 'show_nodes': [], 'hide_edges': [], 'show_edges': []}
+        if hidden_nodes is not None:
+            payload['hide_nodes'] = list(hidden_nodes - self.hidden_nodes)
+            payload['show_nodes'] = list(self.hidden_nodes - hidden_nodes)
+            self.hidden_nodes = set(hidden_nodes)
+        if hidden_edges is not None:
+            payload['hide_edges'] = [edge_display_id(e) for e in hidden_edges - self.hidden_edges]
+            payload['show_edges'] = [edge_display_id(e) for e in self.hidden_edges - hidden_edges]
+            self.hidden_edges = set(hidden_edges)
+
+        if any(payload.values()):
+            self.dispatch_callbacks(EVENT_UPDATE_VISIBILITY, payload)
+
+    def update_nodes(self, updates: dict):
+        """
+        Overrides keys on many nodes at once, and dispatches them as a single event rather than one per node.
+        Ids of nodes which are not in the graph are ignored. The payload of the dispatched event looks like:
+
+        {
+            'nodes': [
+                {'node_id': '1', 'data': {'group': '0', 'value': 0.25}}
+            ]
+        }
+
+        :param updates: dict of node id to the key-value dictionary to update the node with
+        """
+        nodes = []
+        for node_id, data in updates.items():
+            node = self.graph.nodes.get(node_id)
+            if node is None:
+                continue
+            node.update(data)
+            nodes.append({'node_id': node_id, 'data': data})
+
+        if nodes:
+            self.dispatch_callbacks(EVENT_UPDATE_NODES, {'nodes': nodes})
+
+    def to_json(self) -> dict:
+        data = super().to_json()
+        if self.hidden_nodes:
+            for node in data['graph']['nodes']:
+                if node['id'] in self.hidden_nodes:
+                    node['hidden'] = True
+        if self.hidden_edges:
+            for link in data['graph']['links']:
+                if (link['source'], link['target'], link['key']) in self.hidden_edges:
+                    link['hidden'] = True
+        return data
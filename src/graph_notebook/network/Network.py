@@ -4,6 +4,7 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 import json
+from itertools import chain
 
 from networkx import MultiDiGraph
 from networkx.readwrite import json_graph
@@ -97,6 +98,109 @@ class Network:
             'graph': json_graph.node_link_data(self.graph)
         }
 
+    def node_ids(self) -> list:
+        """
+        Lists the ids of the nodes in the order they were added. The integer index a node is given by the
+        to_scipy_sparse, to_edge_list_arrays and to_pandas_edgelist exports is its position in this list.
+        """
+        return list(self.graph._node)
+
+    def to_edge_list_arrays(self, properties: list = None) -> dict:
+        """
+        Exports the edges as columns, read straight from the adjacency of the graph. Properties are looked up
+        on the edge and then in its 'properties', and are None on edges which do not have them.
+
+        :param properties: names of the edge properties to add a column for
+        :return: a dict of the 'source' and 'target' node indexes as numpy int64 arrays, and lists of the 'key'
+                 and 'label' of every edge and of each property
+        """
+        properties = properties if properties is not None else []
+        sources, targets, edges = self._edge_index_arrays()
+        data = list(chain.from_iterable(map(dict.values, edges)))
+        columns = {
+            'source': sources,
+            'target': targets,
+            'key': list(chain.from_iterable(edges)),
+            'label': [d.get('label') for d in data]
+        }
+        for name in properties:
+            columns[name] = _edge_property(data, name)
+        return columns
+
+    def to_scipy_sparse(self, weight: str = None):
+        """
+        Exports the graph as a square adjacency matrix, with a row and column for each node in the order of
+        node_ids(). Parallel edges are added together.
+
+        :param weight: name of a numeric edge property to use as the weight of each edge, missing values counting
+                       as 0, or None to weigh every edge 1
+        :return: a scipy.sparse csr_matrix
+        """
+        import numpy as np
+        import scipy.sparse
+
+        sources, targets, edges = self._edge_index_arrays()
+        if weight is None:
+            values = np.ones(len(sources))
+        else:
+            data = list(chain.from_iterable(map(dict.values, edges)))
+            values = np.array([0.0 if w is None else w for w in _edge_property(data, weight)], dtype=np.float64)
+        n = len(self.graph._node)
+        # duplicate entries of a coo_matrix are summed when it is converted
+        return scipy.sparse.coo_matrix((values, (sources, targets)), shape=(n, n)).tocsr()
+
+    def _edge_index_arrays(self) -> tuple:
+        """
+        Reads the edges straight from the adjacency of the graph, which for a MultiDiGraph is a dict of source to
+        a dict of target to a dict of edge key to edge data. It is flattened by chain and map rather than by loops,
+        as results can have millions of edges.
+
+        :return: a tuple of the source and target node indexes of every edge as numpy int64 arrays, and the list
+                 of the dicts of edge key to edge data between each source and target, in the same order
+        """
+        import numpy as np
+
+        adjacency = self.graph._adj
+        index = dict(zip(self.graph._node, range(len(self.graph._node))))
+        targets = list(chain.from_iterable(map(dict.keys, adjacency.values())))
+        edges = list(chain.from_iterable(map(dict.values, adjacency.values())))
+        parallel = np.fromiter(map(len, edges), dtype=np.int64, count=len(edges))
+        neighbors = np.fromiter(map(len, adjacency.values()), dtype=np.int64, count=len(adjacency))
+        # sources are in the same order as the nodes, as networkx adds every node to both
+        sources = np.repeat(np.arange(len(adjacency), dtype=np.int64), neighbors)
+        targets = np.array(list(map(index.__getitem__, targets)), dtype=np.int64)
+        return np.repeat(sources, parallel), np.repeat(targets, parallel), edges
+
+    def to_pandas_edgelist(self, properties: list = None):
+        """
+        Exports the edges as a pandas DataFrame with the 'source' and 'target' node ids, their indexes in
+        node_ids() as 'source_index' and 'target_index', the 'key' and 'label' of the edge, and a column for
+        each of the given properties.
+        """
+        import numpy as np
+        import pandas as pd
+
+        columns = self.to_edge_list_arrays(properties)
+        nodes = np.empty(len(self.graph._node), dtype=object)
+        nodes[:] = self.node_ids()
+        frame = {
+            'source': nodes[columns['source']],
+            'target': nodes[columns['target']],
+            'source_index': columns['source'],
+            'target_index': columns['target']
+        }
+        # keys and labels are given as object arrays so that pandas does not scan them for a better dtype,
+        # which it still does for the properties
+        for name in ['key', 'label']:
+            frame[name] = np.empty(len(columns[name]), dtype=object)
+            frame[name][:] = columns[name]
+        frame.update((name, columns[name]) for name in properties or [])
+        return pd.DataFrame(frame)
+
+
+def _edge_property(data: list, name: str) -> list:
+    return [d[name] if name in d else d.get('properties', {}).get(name) for d in data]
+
 
 def network_to_json(network: Network) -> str:
     return json.dumps(network.to_json())
@@ -0,0 +1,85 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from collections.abc import Hashable
+from typing import Callable, Iterable, Tuple
+
+KEY_SEPARATOR = '.'
+
+
+def get_field_values(data: dict, key) -> list:
+    """
+    Resolves a (possibly nested) key against the data of a node or an edge.
+
+    Ex. key="properties.country" against {'properties': {'country': ['US']}} -> ['US']
+
+    :param data: the attributes of a node or an edge
+    :param key: a dot separated path, or a tuple of path segments
+    :return: the values found under the key. Multi-valued (list) properties contribute each of their entries,
+             and an empty list is returned if the key is not present.
+    """
+    path = key.split(KEY_SEPARATOR) if isinstance(key, str) else list(key)
+    value = data
+    for segment in path:
+        if not isinstance(value, dict) or segment not in value:
+            return []
+        value = value[segment]
+
+    values = value if isinstance(value, (list, tuple, set)) else [value]
+    return [v if isinstance(v, Hashable) else str(v) for v in values]
+
+
+class PropertyIndex(object):
+    """
+    Inverted index from the values of a field to the elements of a network holding that value.
+
+    An index for a field is built the first time the field is queried, and kept until the index is invalidated.
+    Predicates are evaluated once per distinct value of a field rather than once per element.
+    """
+
+    def __init__(self, elements: Callable[[], Iterable[Tuple[Hashable, dict]]]):
+        """
+        :param elements: returns the (key, data) pairs of the elements to index, such as graph.nodes(data=True)
+        """
+        self.elements = elements
+        self.fields = {}
+
+    def invalidate(self):
+        self.fields.clear()
+
+    def field(self, key) -> dict:
+        index_key = key if isinstance(key, str) else tuple(key)
+        if index_key not in self.fields:
+            index = {}
+            for element_key, data in self.elements():
+                for value in get_field_values(data, key):
+                    index.setdefault(value, set()).add(element_key)
+            self.fields[index_key] = index
+        return self.fields[index_key]
+
+    def find(self, key, value=None, predicate: Callable = None) -> set:
+        """
+        :param key: the field to match on, for example "label", "group" or "properties.country"
+        :param value: only match elements with this value in the field
+        :param predicate: only match elements where predicate(value) is True for one of the values of the field
+        :return: the keys of every matched element. If neither a value nor a predicate is given,
+                 every element having the field is matched.
+        """
+        index = self.field(key)
+        if value is not None:
+            if not isinstance(value, Hashable):
+                value = str(value)
+            return set(index.get(value, set()))
+
+        matched = set()
+        for field_value, element_keys in index.items():
+            try:
+                if predicate is not None and not predicate(field_value):
+                    continue
+            except (TypeError, ValueError):
+                # values of mixed types, such as comparing a string to a number, are not a match
+                continue
+            matched.update(element_keys)
+        return matched
@@ -0,0 +1,183 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+
+Graph algorithms run on the graph of a rendered network, so that finding hubs, communities or paths in a result
+does not take more queries. Where scipy is installed, algorithms run on a sparse adjacency matrix of the graph,
+and otherwise on the networkx graph.
+"""
+
+import networkx as nx
+
+from graph_notebook.network.Network import Network
+
+PAGERANK_ALPHA = 0.85
+PAGERANK_MAX_ITER = 100
+PAGERANK_TOL = 1.0e-6
+
+
+def _scipy_sparse():
+    """
+    :return: the scipy.sparse module, or None if scipy is not installed
+    """
+    try:
+        import scipy.sparse
+        import scipy.sparse.csgraph  # noqa F401
+        return scipy.sparse
+    except ImportError:
+        return None
+
+
+def adjacency_matrix(graph: nx.MultiDiGraph):
+    """
+    Exports the graph as a sparse adjacency matrix, where parallel edges are counted in the weight of their entry.
+
+    :return: a tuple of the scipy.sparse csr_matrix and the list of node ids in the order of its rows
+    """
+    network = Network(graph)
+    return network.to_scipy_sparse(), network.node_ids()
+
+
+def pagerank(graph: nx.MultiDiGraph, alpha: float = PAGERANK_ALPHA, max_iter: int = PAGERANK_MAX_ITER,
+             tol: float = PAGERANK_TOL) -> dict:
+    """
+    Ranks the nodes by PageRank, following parallel edges as many times as there are of them.
+
+    :return: a dict of node id to rank, the ranks adding up to 1
+    """
+    n = len(graph)
+    if n == 0:
+        return {}
+    if _scipy_sparse() is None:
+        return _pagerank_python(graph, alpha, max_iter, tol)
+
+    import numpy as np
+
+    matrix, nodes = adjacency_matrix(graph)
+    out_degree = matrix.sum(axis=1).A1
+    dangling = out_degree == 0
+    out_degree[dangling] = 1.0
+    # row i of the transition matrix spreads the rank of node i evenly over its out edges
+    transition = matrix.multiply(1.0 / out_degree[:, None]).tocsr()
+    ranks = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        previous = ranks
+        ranks = alpha * (previous @ transition + previous[dangling].sum() / n) + (1 - alpha) / n
+        if np.abs(ranks - previous).sum() < n * tol:
+            break
+    return dict(zip(nodes, ranks.tolist()))
+
+
+def _pagerank_python(graph: nx.MultiDiGraph, alpha: float, max_iter: int, tol: float) -> dict:
+    n = len(graph)
+    out_degree = dict(graph.out_degree())
+    ranks = dict.fromkeys(graph, 1.0 / n)
+    for _ in range(max_iter):
+        previous = ranks
+        dangling_rank = sum(previous[node] for node, degree in out_degree.items() if degree == 0)
+        ranks = dict.fromkeys(graph, alpha * dangling_rank / n + (1 - alpha) / n)
+        for u, v in graph.edges():
+            ranks[v] += alpha * previous[u] / out_degree[u]
+        if sum(abs(ranks[node] - previous[node]) for node in ranks) < n * tol:
+            break
+    return ranks
+
+
+def degree_centrality(graph: nx.MultiDiGraph) -> dict:
+    """
+    :return: a dict of node id to the number of edges in and out of the node, divided by the number of other nodes
+    """
+    scale = 1.0 / (len(graph) - 1) if len(graph) > 1 else 1.0
+    return {node: degree * scale for node, degree in graph.degree()}
+
+
+def betweenness_centrality(graph: nx.MultiDiGraph, k: int = None, seed: int = None) -> dict:
+    """
+    :param k: number of source nodes to sample to estimate the centrality of large graphs, or None to use every node
+    :return: a dict of node id to the fraction of shortest paths between other nodes which pass through it
+    """
+    if k is not None and k >= len(graph):
+        k = None
+    # parallel edges do not change which paths are shortest
+    return nx.betweenness_centrality(nx.DiGraph(graph), k=k, seed=seed)
+
+
+def connected_components(graph: nx.MultiDiGraph) -> dict:
+    """
+    Finds the weakly connected components of the graph, numbered from the largest.
+
+    :return: a dict of node id to the number of its component
+    """
+    if _scipy_sparse() is None:
+        components = nx.weakly_connected_components(graph)
+    else:
+        from scipy.sparse.csgraph import connected_components as csgraph_components
+
+        matrix, nodes = adjacency_matrix(graph)
+        _, labels = csgraph_components(matrix, directed=True, connection='weak')
+        grouped = {}
+        for node, label in zip(nodes, labels.tolist()):
+            grouped.setdefault(label, []).append(node)
+        components = grouped.values()
+    return _number_groups(components)
+
+
+def communities(graph: nx.MultiDiGraph, seed: int = None) -> dict:
+    """
+    Finds communities of densely connected nodes with the Louvain method, treating edges as undirected and counting
+    parallel edges in their weight. Versions of networkx without Louvain fall back to greedy modularity.
+
+    :return: a dict of node id to the number of its community, numbered from the largest
+    """
+    undirected = nx.Graph()
+    undirected.add_nodes_from(graph)
+    for u, v in graph.edges():
+        if undirected.has_edge(u, v):
+            undirected[u][v]['weight'] += 1
+        else:
+            undirected.add_edge(u, v, weight=1)
+
+    louvain = getattr(nx.algorithms.community, 'louvain_communities', None)
+    if louvain is not None:
+        found = louvain(undirected, weight='weight', seed=seed)
+    else:
+        found = nx.algorithms.community.greedy_modularity_communities(undirected, weight='weight')
+    return _number_groups(found)
+
+
+def shortest_path(graph: nx.MultiDiGraph, source, target, directed: bool = True) -> list:
+    """
+    Finds a path with the fewest edges from source to target.
+
+    :return: the node ids of the path from source to target, or an empty list if target cannot be reached
+    """
+    for node in (source, target):
+        if node not in graph:
+            raise ValueError(f'node {node} is not in the graph')
+    if _scipy_sparse() is None:
+        try:
+            return nx.shortest_path(graph if directed else graph.to_undirected(as_view=True), source, target)
+        except nx.NetworkXNoPath:
+            return []
+
+    from scipy.sparse.csgraph import shortest_path as csgraph_shortest_path
+
+    matrix, nodes = adjacency_matrix(graph)
+    index = {node: i for i, node in enumerate(nodes)}
+    _, predecessors = csgraph_shortest_path(matrix, directed=directed, unweighted=True, indices=index[source],
+                                            return_predecessors=True)
+    path = [index[target]]
+    while path[-1] != index[source]:
+        previous = predecessors[path[-1]]
+        if previous < 0:
+            return []
+        path.append(previous)
+    return [nodes[i] for i in reversed(path)]
+
+
+def _number_groups(groups) -> dict:
+    numbered = {}
+    for i, group in enumerate(sorted(groups, key=len, reverse=True)):
+        for node in group:
+            numbered[node] = i
+    return numbered
@@ -9,7 +9,7 @@ import uuid
 import logging
 from enum import Enum
 
-from graph_notebook.network.EventfulNetwork import EventfulNetwork
+from graph_notebook.network.EventfulNetwork import EventfulNetwork, truncate_label
 from gremlin_python.process.traversal import T, Direction
 from gremlin_python.structure.graph import Path, Vertex, Edge
 from networkx import MultiDiGraph
@@ -21,6 +21,18 @@ T_LABEL = 'T.label'
 T_ID = 'T.id'
 DEFAULT_GRP = 'DEFAULT_GROUP'
 
+# Every attribute access on these enums goes through a descriptor, and hashing their members runs Python code,
+# so they are looked up once here.
+T_ID_KEY = T.id
+T_LABEL_KEY = T.label
+DIRECTION_IN = Direction.IN
+DIRECTION_OUT = Direction.OUT
+# the keys of Gremlin maps which are not strings, by the name display and group rules refer to them with
+ENUM_KEYS = {str(key): key for key in [T.id, T.label, T.key, T.value, Direction.IN, Direction.OUT, Direction.BOTH]}
+
+# classifications of path elements are cached per shape, up to this many distinct shapes per network
+MAX_CACHED_SHAPES = 1024
+
 INVALID_PATH_ERROR = ValueError("results must be a path with the pattern Vertex -> Edge -> Vertex.")
 INVALID_VERTEX_ERROR = ValueError("when adding a vertex, object must be of type Vertex or Dict")
 INVALID_VERTEX_PATH_PATTERN_ERROR = ValueError("found vertex pattern on an Edge object")
@@ -56,17 +68,17 @@ E_PATTERNS = [PathPattern.E, PathPattern.IN_E, PathPattern.OUT_E]
 
 def generate_id_from_dict(data: dict) -> str:
     # Handle cases where user requests '~label' in valueMap step, since json can't serialize non-string keys
-    if T.label in data.keys():
-        data['label'] = data[T.label]
-        del data[T.label]
+    if T_LABEL_KEY in data.keys():
+        data['label'] = data[T_LABEL_KEY]
+        del data[T_LABEL_KEY]
     for k in data.keys():
         if isinstance(data[k], dict):
-            if T.id in data[k]:
-                data[k]['id'] = data[k][T.id]
-                del data[k][T.id]
-            if T.label in data[k]:
-                data[k]['label'] = data[k][T.label]
-                del data[k][T.label]
+            if T_ID_KEY in data[k]:
+                data[k]['id'] = data[k][T_ID_KEY]
+                del data[k][T_ID_KEY]
+            if T_LABEL_KEY in data[k]:
+                data[k]['label'] = data[k][T_LABEL_KEY]
+                del data[k][T_LABEL_KEY]
     data_str = json.dumps(data, default=str)
     hashed = hashlib.md5(data_str.encode())
     generate_id = hashed.hexdigest()
@@ -82,14 +94,59 @@ def get_id(element):
     elif isinstance(element, Edge):
         return str(element.label)
     elif isinstance(element, dict):
-        if T.id in element:
-            return element[T.id]
+        if T_ID_KEY in element:
+            return element[T_ID_KEY]
         else:
             return generate_id_from_dict(element)
     else:
         return str(element)
 
 
+def find_key(d: dict, name: str):
+    """
+    Finds the key of a Gremlin map which a display or group rule names, such as T.label for 'T.label'.
+
+    :return: the key, or None if the map has no such key
+    """
+    key = ENUM_KEYS.get(name)
+    if key is not None and key in d:
+        return key
+    if name in d:
+        return name
+    return None
+
+
+def is_path_elementmap(element: dict) -> bool:
+    """
+    Tells apart an elementMap in a path from a valueMap, whose values are lists.
+    """
+    if T_ID_KEY not in element or T_LABEL_KEY not in element:
+        return False
+    for prop, value in element.items():
+        # T.id and/or T.label could be renamed by a project() step
+        if isinstance(value, str) and prop is not T_ID_KEY and prop is not T_LABEL_KEY:
+            return True
+        elif isinstance(value, dict):
+            if prop is DIRECTION_IN or prop is DIRECTION_OUT:
+                return True
+        elif isinstance(value, list):
+            return False
+        elif not isinstance(value, (str, list, dict)):
+            return True
+    return False
+
+
+def compile_display_rule(rule):
+    """
+    :return: the key name and optional list index of a display rule, or None if the rule cannot match a property
+    """
+    if isinstance(rule, tuple):
+        return rule[0], rule[1]
+    if isinstance(rule, str):
+        return rule, None
+    return None
+
+
 class GremlinNetwork(EventfulNetwork):
     """
     GremlinNetwork extends the Network class and uses the add_results method to parse two specific types of responses
@@ -121,6 +178,11 @@ class GremlinNetwork(EventfulNetwork):
         except ValueError:
             self.edge_display_property = self.convert_multiproperties_to_tuples(edge_display_property.strip('\'"'))
         self.ignore_groups = ignore_groups
+        # the group, display and label rules compiled for each vertex or edge label, see the _*_rule methods
+        self._vertex_rules = {}
+        self._map_vertex_rules = {}
+        self._map_edge_rules = {}
+        self._elementmap_shapes = {}
         super().__init__(graph, callbacks)
 
     def add_results_with_pattern(self, results, pattern_list: list):
@@ -245,38 +307,96 @@ class GremlinNetwork(EventfulNetwork):
 
         for path in results:
             if isinstance(path, Path):
-                if type(path[0]) is Edge or type(path[-1]) is Edge:
+                # indexing the list directly skips Path.__getitem__, which also accepts step labels
+                objects = path.objects
+                if type(objects[0]) is Edge or type(objects[-1]) is Edge:
                     raise INVALID_PATH_ERROR
 
-                for i in range(len(path)):
-                    if isinstance(path[i], dict):
-                        is_elementmap = False
-                        if T.id in path[i] and T.label in path[i]:
-                            for prop, value in path[i].items():
-                                # T.id and/or T.label could be renamed by a project() step
-                                if isinstance(value, str) and prop not in [T.id, T.label]:
-                                    is_elementmap = True
-                                    break
-                                elif isinstance(value, dict):
-                                    if prop in [Direction.IN, Direction.OUT]:
-                                        is_elementmap = True
-                                        break
-                                elif isinstance(value, list):
-                                    break
-                                elif not isinstance(value, (str, list, dict)):
-                                    is_elementmap = True
-                                    break
-                        if is_elementmap:
-                            self.insert_elementmap(path[i], check_emap=True, path_element=path, index=i)
-                        else:
-                            self.insert_path_element(path, i)
+                for i, element in enumerate(objects):
+                    if isinstance(element, dict) and self._is_elementmap(element):
+                        self.insert_elementmap(element, check_emap=True, path_element=objects, index=i)
                     else:
-                        self.insert_path_element(path, i)
-            elif isinstance(path, dict) and T.id in path.keys() and T.label in path.keys():
+                        self.insert_path_element(objects, i)
+            elif isinstance(path, dict) and T_ID_KEY in path.keys() and T_LABEL_KEY in path.keys():
                 self.insert_elementmap(path)
             else:
                 raise ValueError("all entries in results must be paths or elementMaps")
 
+    def _is_elementmap(self, element: dict) -> bool:
+        # the classification only depends on the keys of the map and the types of its values, which are the same for
+        # most elements of a result
+        shape = (tuple(element), tuple(map(type, element.values())))
+        try:
+            return self._elementmap_shapes[shape]
+        except KeyError:
+            pass
+        is_elementmap = is_path_elementmap(element)
+        if len(self._elementmap_shapes) < MAX_CACHED_SHAPES:
+            self._elementmap_shapes[shape] = is_elementmap
+        return is_elementmap
+
+    def _vertex_rule(self, vertex_label) -> tuple:
+        """
+        Compiles the group and display rules for Vertex objects of a label.
+
+        :return: the group rule, as 'label', 'id', an attribute name or None for the default group, whether the
+                 vertex is displayed by its id, and the title and label to display otherwise.
+        """
+        group = None
+        if not isinstance(self.group_by_property, dict):  # Handle string format group_by
+            if str(self.group_by_property) in [T_LABEL, 'label']:
+                # This sets the group key to the label if either "label" is passed in or
+                # T.label is set in order to handle the default case of grouping by label
+                # when no explicit key is specified
+                group = 'label'
+            elif str(self.group_by_property) in [T_ID, 'id']:
+                group = 'id'
+        elif str(vertex_label) in self.group_by_property:  # handle dict format group_by
+            group_property = self.group_by_property[str(vertex_label)]
+            if group_property in [T_LABEL, 'label']:
+                group = 'label'
+            elif group_property in [T_ID, 'id']:
+                group = 'id'
+            else:
+                group = ('attribute', group_property)
+
+        display_id = self.display_property in [T_ID, 'id']
+        if not display_id and isinstance(self.display_property, dict):
+            display_id = self.display_property.get(vertex_label) in [T_ID, 'id']
+
+        title = vertex_label
+        label = truncate_label(title, self.label_max_length)
+        return group, display_id, title, str(label).strip("[]'")
+
+    def _map_vertex_rule(self, title: str) -> tuple:
+        """
+        Compiles the group and display rules for vertices given as maps, for the value of their T.label.
+
+        :return: the name of the key to group by, or None, and the display rule, see compile_display_rule
+        """
+        if isinstance(self.group_by_property, dict):
+            group_key = self.group_by_property.get(title)
+        else:
+            group_key = self.group_by_property
+        if not isinstance(group_key, str):
+            group_key = None
+
+        if isinstance(self.display_property, dict):
+            display = compile_display_rule(self.display_property.get(title))
+        else:
+            display = compile_display_rule(self.display_property)
+        return group_key, display
+
+    def _map_edge_rule(self, edge_label: str):
+        """
+        Compiles the display rule for edges given as maps, for the value of their T.label.
+        """
+        if isinstance(self.edge_display_property, dict):
+            return compile_display_rule(self.edge_display_property.get(edge_label))
+        if self.edge_display_property == T_LABEL:
+            return None
+        return compile_display_rule(self.edge_display_property)
+
     def add_vertex(self, v):
         """
         Adds a vertex to the network. If v is of :type Vertex, we will gather its id and label.
@@ -288,107 +408,62 @@ class GremlinNetwork(EventfulNetwork):
         node_id = ''
         if type(v) is Vertex:
             node_id = v.id
-            title = v.label
-            vertex_dict = v.__dict__
-            if not isinstance(self.group_by_property, dict):  # Handle string format group_by
-                if str(self.group_by_property) in [T_LABEL, 'label']:  # this handles if it's just a string
-                    # This sets the group key to the label if either "label" is passed in or
-                    # T.label is set in order to handle the default case of grouping by label
-                    # when no explicit key is specified
-                    group = v.label
-                elif str(self.group_by_property) in [T_ID, 'id']:
-                    group = v.id
-                else:
-                    group = DEFAULT_GRP
-            else:  # handle dict format group_by
-                try:
-                    if str(v.label) in self.group_by_property:
-                        if self.group_by_property[str(v.label)] in [T_LABEL, 'label']:
-                            group = v.label
-                        elif self.group_by_property[str(v.label)] in [T_ID, 'id']:
-                            group = v.id
-                        else:
-                            group = vertex_dict[self.group_by_property[str(v.label)]]
-                    else:
-                        group = DEFAULT_GRP
-                except KeyError:
-                    group = DEFAULT_GRP
-
-            label = title if len(title) <= self.label_max_length else title[:self.label_max_length - 3] + '...'
+            try:
+                group_rule, display_id, title, label = self._vertex_rules[v.label]
+            except KeyError:
+                rule = self._vertex_rules[v.label] = self._vertex_rule(v.label)
+                group_rule, display_id, title, label = rule
+
+            if group_rule == 'label':
+                group = v.label
+            elif group_rule == 'id':
+                group = v.id
+            elif group_rule is None:
+                group = DEFAULT_GRP
+            else:
+                group = v.__dict__.get(group_rule[1], DEFAULT_GRP)
 
-            if self.display_property in [T_ID, 'id']:
-                label = str(node_id)
+            if display_id:
+                label = str(node_id).strip("[]'")
                 title = str(node_id)
-            elif isinstance(self.display_property, dict):
-                try:
-                    if self.display_property[title] in [T_ID, 'id']:
-                        label = str(node_id)
-                        title = str(node_id)
-                except KeyError:
-                    pass
-            data = {'label': str(label).strip("[]'"), 'title': title, 'group': group,
+            data = {'label': label, 'title': title, 'group': group,
                     'properties': {'id': node_id, 'label': title}}
         elif type(v) is dict:
-            properties = {}
+            properties = {k: str(value) if isinstance(value, dict) else value for k, value in v.items()}
             title = ''
             label = ''
             group = ''
-            display_is_set = False
-            group_is_set = False
-            # Before looping though properties, we first search for T.label in vertex dict, then set title = T.label
-            # Otherwise, we will hit KeyError if we don't iterate through T.label first to set the title
-            # Since it is needed for checking for the vertex label's desired grouping behavior in group_by_property
-            if T.label in v.keys():
-                title = str(v[T.label])
+            # The T.label of the vertex decides which of the per label group and display rules apply
+            if T_LABEL_KEY in v:
+                title = str(v[T_LABEL_KEY])
                 title_plc, label = self.strip_and_truncate_label_and_title(title, self.label_max_length)
             else:
                 group = DEFAULT_GRP
-            for k in v:
-                if str(k) == T_ID:
-                    node_id = str(v[k])
-                properties[k] = str(v[k]) if isinstance(v[k], dict) else v[k]
-                if not group_is_set:
-                    if isinstance(self.group_by_property, dict):
+            try:
+                group_key, display = self._map_vertex_rules[title]
+            except KeyError:
+                rule = self._map_vertex_rules[title] = self._map_vertex_rule(title)
+                group_key, display = rule
+
+            id_key = find_key(v, T_ID)
+            if id_key is not None:
+                node_id = str(v[id_key])
+            if group_key is not None:
+                key = find_key(v, group_key)
+                if key is not None:
+                    group = str(v[key])
+            if display is not None:
+                key = find_key(v, display[0])
+                if key is not None:
+                    value = v[key]
+                    if display[1] is None:
+                        title, label = self.strip_and_truncate_label_and_title(value, self.label_max_length)
+                    elif isinstance(value, list):
                         try:
-                            if str(k) == self.group_by_property[title]:
-                                group = str(v[k])
-                                group_is_set = True
-                        except KeyError:
-                            pass
-                    elif str(k) == self.group_by_property:
-                        group = str(v[k])
-                        group_is_set = True
-                if not display_is_set:
-                    if isinstance(self.display_property, dict):
-                        try:
-                            if isinstance(self.display_property[title], tuple) and isinstance(v[k], list):
-                                if str(k) == self.display_property[title][0]:
-                                    try:
-                                        title, label = self.strip_and_truncate_label_and_title(
-                                            v[k][self.display_property[title][1]], self.label_max_length)
-                                        display_is_set = True
-                                    except IndexError:
-                                        logger.debug(f"Failed to index into sub-property for: {k} and "
-                                                     f"{self.display_property[title]}")
-                                        continue
-                            elif str(k) == self.display_property[title]:
-                                title, label = self.strip_and_truncate_label_and_title(v[k], self.label_max_length)
-                                display_is_set = True
-                        except KeyError as e:
-                            continue
-                    elif isinstance(self.display_property, tuple):
-                        if str(k) == self.display_property[0] and isinstance(v[k], list):
-                            try:
-                                title, label = self.strip_and_truncate_label_and_title(
-                                    v[k][self.display_property[1]], self.label_max_length)
-                                display_is_set = True
-                            except IndexError:
-                                logger.debug(f"Failed to index into sub-property for: {k} and "
-                                             f"{self.display_property[0]}")
-                                continue
-                    elif str(k) == self.display_property:
-                        title, label = self.strip_and_truncate_label_and_title(v[k], self.label_max_length)
-                        display_is_set = True
+                            title, label = self.strip_and_truncate_label_and_title(value[display[1]],
+                                                                                   self.label_max_length)
+                        except IndexError:
+                            logger.debug(f"Failed to index into sub-property for: {key} and {display}")
             # handle when there is no id in a node. In this case, we will generate one which
             # is consistently regenerated so that duplicate dicts will be reduced to the same vertex.
             if node_id == '':
@@ -436,48 +511,31 @@ class GremlinNetwork(EventfulNetwork):
                         display_label = edge.label
             self.add_edge(from_id, to_id, edge.id, display_label, data)
         elif type(edge) is dict:
-            properties = {}
+            # Handle Direction properties, where the value is a map
+            properties = {k: get_id(value) if type(value) is dict else value for k, value in edge.items()}
             edge_id = ''
             edge_label = ''
-            display_is_set = False
-            if T.label in edge.keys():
-                edge_label = str(edge[T.label])
-            for k in edge:
-                if str(k) == T_ID:
-                    edge_id = str(edge[k])
-                if type(edge[k]) is dict:  # Handle Direction properties, where the value is a map
-                    properties[k] = get_id(edge[k])
-                else:
-                    properties[k] = edge[k]
-                if self.edge_display_property is not T_LABEL and not display_is_set:
-                    if isinstance(self.edge_display_property, dict):
+            if T_LABEL_KEY in edge:
+                edge_label = str(edge[T_LABEL_KEY])
+            id_key = find_key(edge, T_ID)
+            if id_key is not None:
+                edge_id = str(edge[id_key])
+
+            try:
+                display = self._map_edge_rules[edge_label]
+            except KeyError:
+                display = self._map_edge_rules[edge_label] = self._map_edge_rule(edge_label)
+            if display is not None:
+                key = find_key(edge, display[0])
+                if key is not None:
+                    value = edge[key]
+                    if display[1] is None:
+                        edge_label = str(value)
+                    elif isinstance(value, list):
                         try:
-                            if isinstance(self.edge_display_property[edge_label], tuple) and isinstance(edge[k],list):
-                                if str(k) == self.edge_display_property[edge_label][0]:
-                                    try:
-                                        edge_label = str(edge[k][self.edge_display_property[edge_label][1]])
-                                        display_is_set = True
-                                    except (TypeError, IndexError) as e:
-                                        logger.debug(f"Failed to index into edge sub-property for: {edge[k]} and "
-                                                     f"{self.edge_display_property[edge_label]}")
-                                        continue
-                            elif str(k) == self.edge_display_property[edge_label]:
-                                edge_label = str(edge[k])
-                                display_is_set = True
-                        except KeyError:
-                            continue
-                    elif isinstance(self.edge_display_property, tuple):
-                        if str(k) == self.edge_display_property[0] and isinstance(edge[k], list):
-                            try:
-                                edge_label = str(edge[k][self.edge_display_property[1]])
-                                display_is_set = True
-                            except IndexError:
-                                logger.debug(f"Failed to index into edge sub-property for: {edge[k]} and "
-                                             f"{self.edge_display_property[0]}")
-                                continue
-                    elif str(k) == self.edge_display_property:
-                        edge_label = str(edge[k])
-                        display_is_set = True
+                            edge_label = str(value[display[1]])
+                        except (TypeError, IndexError):
+                            logger.debug(f"Failed to index into edge sub-property for: {value} and {display}")
 
             data['properties'] = properties
             self.add_edge(from_id, to_id, edge_id, edge_label, data)
@@ -534,7 +592,7 @@ class GremlinNetwork(EventfulNetwork):
         self.add_vertex(path[i])
         if type(path[i - 1]) is not Edge:
             if type(path[i - 1]) is dict:
-                if Direction.IN not in path[i-1]:
+                if DIRECTION_IN not in path[i-1]:
                     self.add_blank_edge(from_id, get_id(path[i]))
             else:
                 self.add_blank_edge(from_id, get_id(path[i]))
@@ -549,15 +607,15 @@ class GremlinNetwork(EventfulNetwork):
         :param e_map: A dictionary containing the elementMap representation of a vertex or an edge
         """
         # Handle directed edge elementMap
-        if Direction.IN in e_map.keys() and Direction.OUT in e_map.keys():
-            from_id = get_id(e_map[Direction.OUT])
-            to_id = get_id(e_map[Direction.IN])
+        if DIRECTION_IN in e_map and DIRECTION_OUT in e_map:
+            from_id = get_id(e_map[DIRECTION_OUT])
+            to_id = get_id(e_map[DIRECTION_IN])
             # Ensure that the default nodes includes with edge elementMaps do not overwrite nodes
             # with the same ID that have been explicitly inserted.
             if not self.graph.has_node(from_id):
-                self.add_vertex(e_map[Direction.OUT])
+                self.add_vertex(e_map[DIRECTION_OUT])
             if not self.graph.has_node(to_id):
-                self.add_vertex(e_map[Direction.IN])
+                self.add_vertex(e_map[DIRECTION_IN])
             self.add_path_edge(e_map, from_id, to_id)
         # Handle vertex elementMap
         else:
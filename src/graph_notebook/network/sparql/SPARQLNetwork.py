@@ -6,7 +6,7 @@ SPDX-License-Identifier: Apache-2.0
 from networkx import MultiDiGraph
 from rdflib.namespace import RDF, RDFS, OWL, XSD, SKOS, DOAP, FOAF, DC, DCTERMS, VOID
 
-from graph_notebook.network.EventfulNetwork import EventfulNetwork
+from graph_notebook.network.EventfulNetwork import EventfulNetwork, truncate_label
 
 NAMESPACE_RDFS = str(RDFS.uri)
 NAMESPACE_RDF = str(RDF.uri)
@@ -113,7 +113,7 @@ class SPARQLNetwork(EventfulNetwork):
             else:
                 title = node_id
 
-            label = title if len(title) <= self.label_max_length else title[:self.label_max_length - 3] + '...'
+            label = truncate_label(title, self.label_max_length)
             data['label'] = label
             data['title'] = title
 
@@ -287,7 +287,7 @@ class SPARQLNetwork(EventfulNetwork):
 
                 if pred['value'] == RDFS_LABEL:
                     title = obj_entry
-                    label = title if len(title) <= self.label_max_length else title[:self.label_max_length - 3] + '...'
+                    label = truncate_label(title, self.label_max_length)
                     data['title'] = title
                     data['label'] = label
 
@@ -19,6 +19,38 @@ from sagemaker.s3 import S3Downloader
 UPDATE_DELAY_SECONDS = 15
 HOME_DIRECTORY = os.path.expanduser("~")
 
+# Layout of each supported MovieLens release. ml-100k ships pipe/tab separated files with one-hot encoded genres,
+# ml-1m uses '::' separated files and ml-25m uses csv files; both of the latter store genres as a '|' separated list.
+MOVIELENS_DATASETS = {
+    'ml-100k': {
+        'movies': {'file': 'u.item', 'sep': '|',
+                   'names': ['~id', 'title', 'release_date', 'video_release_date', 'imdb_url', 'unknown', 'Action',
+                             'Adventure', 'Animation', 'Childrens', 'Comedy', 'Crime', 'Documentary', 'Drama',
+                             'Fantasy', 'Film-Noir', 'Horror', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Thriller',
+                             'War', 'Western']},
+        'ratings': {'file': 'u.data', 'sep': '\t', 'names': ['~from', '~to', 'score:Int', 'timestamp']},
+        'users': {'file': 'u.user', 'sep': '|', 'names': ['~id', 'age:Int', 'gender', 'occupation', 'zip_code']},
+        'encoding': 'ISO-8859-1'
+    },
+    'ml-1m': {
+        'movies': {'file': 'movies.dat', 'sep': '::', 'names': ['~id', 'title', 'genres']},
+        'ratings': {'file': 'ratings.dat', 'sep': '::', 'names': ['~from', '~to', 'score:Int', 'timestamp']},
+        'users': {'file': 'users.dat', 'sep': '::', 'names': ['~id', 'gender', 'age:Int', 'occupation', 'zip_code']},
+        'encoding': 'ISO-8859-1'
+    },
+    'ml-25m': {
+        'movies': {'file': 'movies.csv', 'sep': ',', 'header': 0, 'names': ['~id', 'title', 'genres']},
+        'ratings': {'file': 'ratings.csv', 'sep': ',', 'header': 0,
+                    'names': ['~from', '~to', 'score:Double', 'timestamp']},
+        'users': None,  # ml-25m has no user file, the user vertices are derived from the ratings
+        'encoding': 'utf-8'
+    }
+}
+MOVIELENS_GENRE_COLUMNS = MOVIELENS_DATASETS['ml-100k']['movies']['names'][5:]
+RATING_SCALE = {1: 'Hate', 2: 'Dislike', 3: 'Neutral', 4: 'Like', 5: 'Love'}
+DEFAULT_MOVIELENS_DATASET = 'ml-100k'
+DEFAULT_MOVIELENS_CHUNK_SIZE = 500000
+
 
 def signed_request(method, url, data=None, params=None, headers=None, service=None):
     request = AWSRequest(method=method, url=url, data=data,
@@ -175,9 +207,10 @@ def delete_endpoint(training_job_name: str, neptune_iam_role_arn=None):
         print(f'Endpoint {training_job_name} has been deleted')
 
 
-def prepare_movielens_data(s3_bucket_uri: str):
+def prepare_movielens_data(s3_bucket_uri: str, dataset: str = DEFAULT_MOVIELENS_DATASET,
+                           chunk_size: int = DEFAULT_MOVIELENS_CHUNK_SIZE):
     try:
-        return MovieLensProcessor().prepare_movielens_data(s3_bucket_uri)
+        return MovieLensProcessor(dataset, chunk_size).prepare_movielens_data(s3_bucket_uri)
     except Exception as e:
         logging.error(e)
 
@@ -313,6 +346,14 @@ class MovieLensProcessor:
     raw_directory = fr'{HOME_DIRECTORY}/data/raw'
     formatted_directory = fr'{HOME_DIRECTORY}/data/formatted'
 
+    def __init__(self, dataset: str = DEFAULT_MOVIELENS_DATASET, chunk_size: int = DEFAULT_MOVIELENS_CHUNK_SIZE):
+        if dataset not in MOVIELENS_DATASETS:
+            raise ValueError(f'Unsupported MovieLens dataset {dataset}, '
+                             f'expected one of {list(MOVIELENS_DATASETS.keys())}')
+        self.dataset = dataset
+        self.layout = MOVIELENS_DATASETS[dataset]
+        self.chunk_size = chunk_size
+
     def __download_and_unzip(self):
         if not os.path.exists(f'{HOME_DIRECTORY}/data'):
             os.makedirs(f'{HOME_DIRECTORY}/data')
@@ -320,40 +361,57 @@ class MovieLensProcessor:
             os.makedirs(f'{HOME_DIRECTORY}/data/raw')
         if not os.path.exists(f'{HOME_DIRECTORY}/data/formatted'):
             os.makedirs(f'{HOME_DIRECTORY}/data/formatted')
-        # Download the MovieLens dataset
-        url = 'http://files.grouplens.org/datasets/movielens/ml-100k.zip'
-        r = requests.get(url, allow_redirects=True)
-        open(os.path.join(self.raw_directory, 'ml-100k.zip'), 'wb').write(r.content)
-
-        with zipfile.ZipFile(os.path.join(self.raw_directory, 'ml-100k.zip'), 'r') as zip_ref:
+        # Download the MovieLens dataset, the larger archives are only fetched once
+        zip_path = os.path.join(self.raw_directory, f'{self.dataset}.zip')
+        if not os.path.exists(zip_path):
+            url = f'http://files.grouplens.org/datasets/movielens/{self.dataset}.zip'
+            r = requests.get(url, allow_redirects=True, stream=True)
+            with open(zip_path, 'wb') as f:
+                for block in r.iter_content(chunk_size=1024 * 1024):
+                    f.write(block)
+
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
             zip_ref.extractall(self.raw_directory)
 
+    def __read_raw(self, kind: str, **kwargs):
+        spec = self.layout[kind]
+        return pd.read_csv(os.path.join(self.raw_directory, self.dataset, spec['file']),
+                           sep=spec['sep'], header=spec.get('header'), names=spec['names'],
+                           encoding=self.layout['encoding'], engine='python' if len(spec['sep']) > 1 else 'c',
+                           **kwargs)
+
     def __process_movies_genres(self):
         # process the movies_vertex.csv
         print('Processing Movies', end='\r')
-        movies_df = pd.read_csv(os.path.join(
-            self.raw_directory, 'ml-100k/u.item'), sep='|', encoding='ISO-8859-1',
-            names=['~id', 'title', 'release_date', 'video_release_date', 'imdb_url',
-                   'unknown', 'Action', 'Adventure', 'Animation', 'Childrens', 'Comedy',
-                   'Crime', 'Documentary', 'Drama', 'Fantasy', 'Film-Noir', 'Horror', 'Musical',
-                   'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western'])
-        # Parse date and convert to ISO format
-        movies_df['release_date'] = movies_df['release_date'].apply(
-            lambda x: str(
-                datetime.strptime(x, '%d-%b-%Y').isoformat()) if not pd.isna(x) else x)
+        movies_df = self.__read_raw('movies')
+        movies_df['~id'] = 'movie_' + movies_df['~id'].astype(str)
         movies_df['~label'] = 'movie'
-        movies_df['~id'] = movies_df['~id'].apply(
-            lambda x: f'movie_{x}')
-        movie_genre_df = movies_df[[
-            '~id', 'unknown', 'Action', 'Adventure', 'Animation', 'Childrens', 'Comedy',
-            'Crime', 'Documentary', 'Drama', 'Fantasy', 'Film-Noir', 'Horror', 'Musical',
-            'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western']]
-        genres_edges_df = pd.DataFrame(
-            columns=['~id', '~from', '~to', '~label'])
-
-        genres = ['unknown', 'Action', 'Adventure', 'Animation', 'Childrens', 'Comedy',
-                  'Crime', 'Documentary', 'Drama', 'Fantasy', 'Film-Noir', 'Horror', 'Musical',
-                  'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western']
+
+        if 'genres' in movies_df.columns:
+            # genres are a '|' separated list, one row per (movie, genre) pair is produced with explode
+            genre_lists = movies_df['genres'].fillna('').str.split('|')
+            movie_genre_df = pd.DataFrame({'~from': movies_df['~id'], 'genre': genre_lists}).explode('genre')
+            movie_genre_df = movie_genre_df[movie_genre_df['genre'] != '']
+            genres = list(pd.unique(movie_genre_df['genre']))
+            movies_df['genre:String[]'] = genre_lists.str.join(';')
+            movies_df = movies_df.drop(columns=['genres'])
+        else:
+            # genres are one-hot encoded columns, melt them into (movie, genre) pairs and keep the set ones
+            genres = list(MOVIELENS_GENRE_COLUMNS)
+            movie_genre_df = movies_df.melt(id_vars=['~id'], value_vars=genres, var_name='genre',
+                                            value_name='included', ignore_index=False)
+            movie_genre_df = movie_genre_df[movie_genre_df['included'] == 1].rename(columns={'~id': '~from'})
+            # keep the edges grouped per movie in genre column order
+            movie_genre_df['genre_order'] = movie_genre_df['genre'].map({g: i for i, g in enumerate(genres)})
+            movie_genre_df = movie_genre_df.rename_axis('movie_index') \
+                .sort_values(['movie_index', 'genre_order'], kind='mergesort')
+            movies_df['genre:String[]'] = (movies_df[genres] == 1).dot(pd.Index(genres) + ';').str.rstrip(';')
+
+            # Parse date and convert to ISO format
+            release_date = pd.to_datetime(movies_df['release_date'], format='%d-%b-%Y', errors='coerce')
+            movies_df['release_date:Date'] = release_date.dt.strftime('%Y-%m-%dT%H:%M:%S')
+            # Drop the genre columns as well as the uneeded release date columns
+            movies_df = movies_df.drop(columns=genres + ['video_release_date', 'release_date'])
 
         genre_df = pd.DataFrame(genres, columns=['~id'])
         genre_df['~label'] = 'genre'
@@ -361,23 +419,12 @@ class MovieLensProcessor:
         genre_df.to_csv(os.path.join(self.formatted_directory,
                                      'genre_vertex.csv'), index=False)
 
-        # Loop through all the movies and pull out the genres
-        for index, row in movie_genre_df.iterrows():
-            genre_lst = []
-            for g in genres:
-                if row[g] == 1:
-                    genres_edges_df = genres_edges_df.append(
-                        {'~id': f"{row['~id']}-included_in-{g}", '~label': 'included_in',
-                         '~from': row['~id'], '~to': g}, ignore_index=True)
-                    genre_lst.append(g)
-            movies_df.loc[index, 'genre:String[]'] = ';'.join(genre_lst)
-
-        # rename the release data column to specify the data type
-        movies_df['release_date:Date'] = movies_df['release_date']
-        # Drop the genre columns as well as the uneeded release date columns
-        genres.append('video_release_date')
-        genres.append('release_date')
-        movies_df = movies_df.drop(columns=genres)
+        genres_edges_df = pd.DataFrame({
+            '~id': movie_genre_df['~from'] + '-included_in-' + movie_genre_df['genre'],
+            '~from': movie_genre_df['~from'],
+            '~to': movie_genre_df['genre'],
+            '~label': 'included_in'
+        })
 
         movies_df.to_csv(os.path.join(self.formatted_directory,
                                       'movie_vertex.csv'), index=False)
@@ -387,65 +434,60 @@ class MovieLensProcessor:
     def __process_ratings_users(self):
         # Create ratings vertices and add edges on both sides
         print('Processing Ratings', end='\r')
-        ratings_vertices = pd.read_csv(os.path.join(
-            self.raw_directory, 'ml-100k/u.data'), sep='\t', encoding='ISO-8859-1',
-            names=['~from', '~to', 'score:Int', 'timestamp'])
-        ratings_vertices['~from'] = ratings_vertices['~from'].apply(
-            lambda x: f'user_{x}')
-        ratings_vertices['~to'] = ratings_vertices['~to'].apply(
-            lambda x: f'movie_{x}')
-        rated_edges = ratings_vertices.copy(deep=True)
-
-        ratings_vertices['~id'] = ratings_vertices['~from'].str.cat(
-            ratings_vertices['~to'], sep=":")
-        ratings_vertices['~label'] = "rating"
-        dict = {}
-        edges = {}
-        for index, row in ratings_vertices.iterrows():
-            id_from = row['~from']
-            id_to = row['~to']
-            id_id = row['~id']
-            dict[index * 2] = {'~id': f"{id_from}-wrote-{id_id}", '~label': 'wrote',
-                               '~from': id_from, '~to': id_id}
-            dict[index * 2 + 1] = {'~id': f"{id_id}-about-{id_to}", '~label': 'about',
-                                   '~from': id_id, '~to': id_to}
-            score = row['score:Int']
-            scale = ''
-            if score == 1:
-                scale = 'Hate'
-            elif score == 2:
-                scale = 'Dislike'
-            elif score == 3:
-                scale = 'Neutral'
-            elif score == 4:
-                scale = 'Like'
-            elif score == 5:
-                scale = 'Love'
-            edges[index] = {'~id': f"{id_from}-rated-{id_to}", '~label': 'rated',
-                            '~from': id_from, '~to': id_to, 'score:Int': score, 'scale': scale}
-        rating_edges_df = pd.DataFrame.from_dict(dict, "index")
-
-        # Remove the from and to columns and write this out as a vertex now
-        ratings_vertices = ratings_vertices.drop(columns=['~from', '~to'])
-        ratings_vertices.to_csv(os.path.join(self.formatted_directory,
-                                             'ratings_vertices.csv'), index=False)
-        # Write out the rating vertex edges for wrote and about
-        rating_edges_df.to_csv(os.path.join(self.formatted_directory,
-                                            'ratings_vertex_edges.csv'), index=False)
-        # Write out the rated edges
-        rated_edges_df = pd.DataFrame.from_dict(edges, "index")
-        rated_edges_df.to_csv(os.path.join(self.formatted_directory,
-                                           'rated_edges.csv'), index=False)
+        score_column = self.layout['ratings']['names'][2]
+        outputs = {
+            'ratings_vertices': os.path.join(self.formatted_directory, 'ratings_vertices.csv'),
+            'ratings_vertex_edges': os.path.join(self.formatted_directory, 'ratings_vertex_edges.csv'),
+            'rated_edges': os.path.join(self.formatted_directory, 'rated_edges.csv')
+        }
+        user_ids = []
+
+        # the ratings file is the large one (25 million rows for ml-25m), so it is processed in bounded chunks
+        for chunk_number, ratings_vertices in enumerate(self.__read_raw('ratings', chunksize=self.chunk_size)):
+            if self.layout['users'] is None:
+                user_ids.append(ratings_vertices['~from'].unique())
+            ratings_vertices['~from'] = 'user_' + ratings_vertices['~from'].astype(str)
+            ratings_vertices['~to'] = 'movie_' + ratings_vertices['~to'].astype(str)
+            ratings_vertices['~id'] = ratings_vertices['~from'] + ':' + ratings_vertices['~to']
+            ratings_vertices['~label'] = 'rating'
+            id_from = ratings_vertices['~from']
+            id_to = ratings_vertices['~to']
+            id_id = ratings_vertices['~id']
+
+            # wrote and about edges are interleaved per rating, a stable sort on the shared index does this
+            wrote_edges = pd.DataFrame({'~id': id_from + '-wrote-' + id_id, '~label': 'wrote',
+                                        '~from': id_from, '~to': id_id})
+            about_edges = pd.DataFrame({'~id': id_id + '-about-' + id_to, '~label': 'about',
+                                        '~from': id_id, '~to': id_to})
+            rating_edges_df = pd.concat([wrote_edges, about_edges]).sort_index(kind='mergesort')
+
+            # half star ratings (ml-25m) are rounded up onto the five point scale
+            scale = np.ceil(ratings_vertices[score_column]).map(RATING_SCALE).fillna('')
+            rated_edges_df = pd.DataFrame({'~id': id_from + '-rated-' + id_to, '~label': 'rated',
+                                           '~from': id_from, '~to': id_to,
+                                           score_column: ratings_vertices[score_column], 'scale': scale})
+
+            # Remove the from and to columns and write this out as a vertex now
+            ratings_vertices = ratings_vertices.drop(columns=['~from', '~to'])
+            mode = 'w' if chunk_number == 0 else 'a'
+            for name, df in [('ratings_vertices', ratings_vertices), ('ratings_vertex_edges', rating_edges_df),
+                             ('rated_edges', rated_edges_df)]:
+                df.to_csv(outputs[name], index=False, mode=mode, header=chunk_number == 0)
+
+        if self.layout['users'] is None:
+            user_df = pd.DataFrame({'~id': np.unique(np.concatenate(user_ids))})
+            user_df['~id'] = 'user_' + user_df['~id'].astype(str)
+            user_df['~label'] = 'user'
+            user_df.to_csv(os.path.join(self.formatted_directory,
+                                        'user_vertex.csv'), index=False)
 
     def __process_users(self):
+        if self.layout['users'] is None:
+            return
         print("Processing Users", end='\r')
         # User Vertices - Load, rename column with type, and save
-
-        user_df = pd.read_csv(os.path.join(
-            self.raw_directory, 'ml-100k/u.user'), sep='|', encoding='ISO-8859-1',
-            names=['~id', 'age:Int', 'gender', 'occupation', 'zip_code'])
-        user_df['~id'] = user_df['~id'].apply(
-            lambda x: f'user_{x}')
+        user_df = self.__read_raw('users')
+        user_df['~id'] = 'user_' + user_df['~id'].astype(str)
         user_df['~label'] = 'user'
         user_df.to_csv(os.path.join(self.formatted_directory,
                                     'user_vertex.csv'), index=False)
@@ -462,7 +504,7 @@ class MovieLensProcessor:
                     self.formatted_directory, file), bucket, f'{file_path}/{file}')
 
     def prepare_movielens_data(self, s3_bucket: str):
-        bucket_name = f'{s3_bucket}/neptune-formatted/movielens-100k'
+        bucket_name = f'{s3_bucket}/neptune-formatted/movielens-{self.dataset[len("ml-"):]}'
         self.__download_and_unzip()
         self.__process_movies_genres()
         self.__process_users()
@@ -0,0 +1,254 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+from os.path import join as pjoin
+
+BUNDLE_VERSION = 1
+BUNDLE_EXTENSION = '.json.gz'
+MANIFEST_NAME = 'manifest.json'
+
+# gremlin batches are measured as the JSON-encoded script sent over the websocket. The request message around the
+# script adds a few hundred bytes, so 48KB of script stays well within the default maxContentLength of Gremlin Server.
+GREMLIN_MAX_CONTENT_LENGTH = 64 * 1024
+DEFAULT_GREMLIN_BATCH_BYTES = 48 * 1024
+DEFAULT_SPARQL_BATCH_BYTES = 4 * 1024 * 1024
+
+GREMLIN_TERMINAL_STEP = re.compile(r'\.(next|iterate|toList|toSet|toBulkSet)\(\s*\d*\s*\)$')
+GREMLIN_SEPARATOR = ';\n'
+SPARQL_SEPARATOR = ' ;\n'
+
+SEED_DIR = os.path.dirname(os.path.realpath(__file__))
+QUERIES_DIR = pjoin(SEED_DIR, 'queries')
+BUNDLES_DIR = pjoin(SEED_DIR, 'bundles')
+
+
+def list_query_files(path: str) -> list:
+    return sorted(f for f in os.listdir(path) if f not in ('__init__.py', '__pycache__')
+                  and os.path.isfile(pjoin(path, f)))
+
+
+def get_statements(model: str, content: str) -> list:
+    """
+    Splits a seed file into the statements that batches are made of. Gremlin seed files hold one traversal per line,
+    while every rdf seed file is a single SPARQL update and is never split. Cell magic lines, as found in files copied
+    from a notebook, are dropped.
+    """
+    lines = [line for line in content.splitlines() if not line.startswith('%')]
+    if model == 'propertygraph':
+        return [line.strip().rstrip(';').rstrip() for line in lines if line.strip()]
+    content = '\n'.join(lines).strip().rstrip(';').rstrip()
+    return [content] if content else []
+
+
+def gremlin_statement(statement: str) -> str:
+    # only the last traversal of a script is iterated by the server, so every other one needs a terminal step.
+    return statement if GREMLIN_TERMINAL_STEP.search(statement) else statement + '.iterate()'
+
+
+def encoded_size(model: str, text: str) -> int:
+    """
+    Returns the number of bytes text takes up in a request: JSON-encoded for gremlin, which is sent as a GraphSON
+    message, and utf-8 for sparql.
+    """
+    if model == 'propertygraph':
+        return len(json.dumps(text)) - 2  # json.dumps escapes to ascii and adds the surrounding quotes
+    return len(text.encode('utf-8'))
+
+
+def plan_batches(model: str, files: list, max_bytes: int) -> list:
+    """
+    Groups the statements of a dataset's files, in order, into batches of at most max_bytes each. A statement which
+    is larger than max_bytes by itself makes up its own batch. Gremlin statements are measured as they are sent, with
+    .iterate() appended and JSON-encoded, sparql statements as their utf-8 text.
+
+    :return: a list of batches, each a list of [file_index, start, end] spans of statements.
+    """
+    separator_bytes = encoded_size(model, GREMLIN_SEPARATOR if model == 'propertygraph' else SPARQL_SEPARATOR)
+    batches = []
+    spans = []
+    size = 0
+    for file_index, statements in enumerate(files):
+        for i, statement in enumerate(statements):
+            statement_bytes = encoded_size(model, gremlin_statement(statement) if model == 'propertygraph'
+                                           else statement) + separator_bytes
+            if spans and size + statement_bytes > max_bytes:
+                batches.append(spans)
+                spans = []
+                size = 0
+            if spans and spans[-1][0] == file_index and spans[-1][2] == i:
+                spans[-1][2] = i + 1
+            else:
+                spans.append([file_index, i, i + 1])
+            size += statement_bytes
+    if spans:
+        batches.append(spans)
+    return batches
+
+
+def assemble_batches(model: str, names: list, files: list, batches: list) -> list:
+    batch_queries = []
+    for spans in batches:
+        statements = []
+        for file_index, start, end in spans:
+            statements.extend(files[file_index][start:end])
+        if model == 'propertygraph':
+            content = GREMLIN_SEPARATOR.join(gremlin_statement(s) for s in statements)
+        else:
+            content = SPARQL_SEPARATOR.join(statements)
+        batch_queries.append({
+            'name': ', '.join(dict.fromkeys(names[file_index] for file_index, _, _ in spans)),
+            'content': content
+        })
+    return batch_queries
+
+
+def get_batch_size(model: str) -> int:
+    return DEFAULT_GREMLIN_BATCH_BYTES if model == 'propertygraph' else DEFAULT_SPARQL_BATCH_BYTES
+
+
+def hash_queries(queries: list) -> str:
+    sha = hashlib.sha256()
+    for q in queries:
+        sha.update(q['name'].encode('utf-8'))
+        sha.update(b'\0')
+        sha.update(q['content'].encode('utf-8'))
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+
+def read_query_files(path: str) -> list:
+    queries = []
+    for file in list_query_files(path):
+        with open(pjoin(path, file), mode='r', encoding='utf-8') as f:
+            queries.append({
+                'name': file,
+                'content': f.read()
+            })
+    return queries
+
+
+def build_bundle(model: str, name: str, queries: list, max_bytes: int = None) -> dict:
+    if max_bytes is None:
+        max_bytes = get_batch_size(model)
+    files = [get_statements(model, q['content']) for q in queries]
+    return {
+        'version': BUNDLE_VERSION,
+        'model': model,
+        'name': name,
+        'batch_bytes': max_bytes,
+        'files': queries,
+        'batches': plan_batches(model, files, max_bytes)
+    }
+
+
+def write_bundle(bundle: dict, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = json.dumps(bundle, separators=(',', ':')).encode('utf-8')
+    # a fixed mtime keeps rebuilt bundles byte for byte identical when their dataset has not changed.
+    with open(path, 'wb') as f:
+        with gzip.GzipFile(filename='', mode='wb', fileobj=f, mtime=0) as gz:
+            gz.write(data)
+
+
+def build_bundles(queries_dir: str = QUERIES_DIR, bundles_dir: str = BUNDLES_DIR, gremlin_batch_bytes: int = None,
+                  sparql_batch_bytes: int = None) -> dict:
+    """
+    Compiles every dataset under queries_dir into a compressed bundle under bundles_dir, and writes the manifest
+    indexing them. Datasets without any query files are skipped.
+    """
+    batch_bytes = {
+        'propertygraph': gremlin_batch_bytes or DEFAULT_GREMLIN_BATCH_BYTES,
+        'rdf': sparql_batch_bytes or DEFAULT_SPARQL_BATCH_BYTES
+    }
+    manifest = {
+        'version': BUNDLE_VERSION,
+        'datasets': {}
+    }
+    for model in sorted(batch_bytes):
+        model_dir = pjoin(queries_dir, model)
+        if not os.path.isdir(model_dir):
+            continue
+        datasets = {}
+        for name in sorted(os.listdir(model_dir)):
+            if name == '__pycache__' or not os.path.isdir(pjoin(model_dir, name)):
+                continue
+            queries = read_query_files(pjoin(model_dir, name))
+            if not queries:
+                continue
+            bundle = build_bundle(model, name, queries, batch_bytes[model])
+            bundle_path = f'{model}/{name}{BUNDLE_EXTENSION}'
+            write_bundle(bundle, pjoin(bundles_dir, bundle_path))
+            datasets[name] = {
+                'bundle': bundle_path,
+                'files': [q['name'] for q in queries],
+                'batches': len(bundle['batches']),
+                'bytes': sum(len(q['content'].encode('utf-8')) for q in queries),
+                'sha256': hash_queries(queries)
+            }
+        manifest['datasets'][model] = datasets
+
+    os.makedirs(bundles_dir, exist_ok=True)
+    with open(pjoin(bundles_dir, MANIFEST_NAME), mode='w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return manifest
+
+
+@lru_cache(maxsize=None)
+def read_manifest(bundles_dir: str = BUNDLES_DIR) -> dict:
+    try:
+        with open(pjoin(bundles_dir, MANIFEST_NAME), mode='r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {'version': BUNDLE_VERSION, 'datasets': {}}
+    if manifest.get('version') != BUNDLE_VERSION:
+        raise ValueError(f'unsupported seed bundle manifest version {manifest.get("version")}')
+    return manifest
+
+
+def get_bundle_entry(model: str, name: str, bundles_dir: str = BUNDLES_DIR) -> dict:
+    return read_manifest(bundles_dir)['datasets'].get(model, {}).get(name)
+
+
+@lru_cache(maxsize=8)
+def read_bundle(path: str) -> dict:
+    with gzip.open(path, mode='rt', encoding='utf-8') as f:
+        bundle = json.load(f)
+    if bundle.get('version') != BUNDLE_VERSION:
+        raise ValueError(f'unsupported seed bundle version {bundle.get("version")} in {path}')
+    return bundle
+
+
+@lru_cache(maxsize=8)
+def read_bundle_batches(path: str) -> tuple:
+    bundle = read_bundle(path)
+    names = [q['name'] for q in bundle['files']]
+    files = [get_statements(bundle['model'], q['content']) for q in bundle['files']]
+    return tuple(assemble_batches(bundle['model'], names, files, bundle['batches']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compiles the seed datasets into compressed bundles')
+    parser.add_argument('--queries-dir', type=str, default=QUERIES_DIR)
+    parser.add_argument('--bundles-dir', type=str, default=BUNDLES_DIR)
+    parser.add_argument('--gremlin-batch-bytes', type=int, default=DEFAULT_GREMLIN_BATCH_BYTES)
+    parser.add_argument('--sparql-batch-bytes', type=int, default=DEFAULT_SPARQL_BATCH_BYTES)
+    args = parser.parse_args()
+
+    manifest = build_bundles(args.queries_dir, args.bundles_dir, args.gremlin_batch_bytes, args.sparql_batch_bytes)
+    for model, datasets in manifest['datasets'].items():
+        for name, entry in datasets.items():
+            print(f'{model}/{name}: {len(entry["files"])} files, {entry["batches"]} batches')
+
+
+if __name__ == '__main__':
+    main()
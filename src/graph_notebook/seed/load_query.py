@@ -6,6 +6,10 @@ SPDX-License-Identifier: Apache-2.0
 import os
 from os.path import join as pjoin
 
+from graph_notebook.seed.bundle import BUNDLES_DIR, QUERIES_DIR, get_bundle_entry, read_bundle, \
+    read_bundle_batches, read_manifest, read_query_files, get_statements, plan_batches, assemble_batches, \
+    get_batch_size
+
 
 def normalize_model_name(name):
     name = name.lower().replace('_', '')
@@ -19,31 +23,38 @@ def normalize_model_name(name):
 
 # returns a list of queries which correspond to a given query language and name
 def get_queries(model, name):
-    d = os.path.dirname(os.path.realpath(__file__))
-    path_to_data_sets = pjoin(d, 'queries', normalize_model_name(model), name)
-    queries = []
-
-    for file in os.listdir(path_to_data_sets):
-        if file == '__init__.py' or file == '__pycache__':
-            continue
-        full_path = pjoin(path_to_data_sets, file)
-        with open(full_path, mode='r', encoding="utf-8") as f:
-            query = {
-                'name': file,
-                'content': f.read()
-            }
-            queries.append(query)
-    queries.sort(key=lambda i: i['name'])  # ensure we get queries back in lexographical order.
-    return queries
+    model = normalize_model_name(model)
+    entry = get_bundle_entry(model, name)
+    if entry is not None:
+        # bundles are decompressed on first use and cached, so hand out copies that callers are free to modify.
+        return [dict(q) for q in read_bundle(pjoin(BUNDLES_DIR, entry['bundle']))['files']]
+
+    # datasets which have not been bundled are read from their directory, in lexographical order.
+    return read_query_files(pjoin(QUERIES_DIR, model, name))
+
+
+# returns the queries of a data set grouped into as few requests as possible, to be sent in order
+def get_batches(model, name):
+    model = normalize_model_name(model)
+    entry = get_bundle_entry(model, name)
+    if entry is not None:
+        return [dict(q) for q in read_bundle_batches(pjoin(BUNDLES_DIR, entry['bundle']))]
+
+    queries = get_queries(model, name)
+    files = [get_statements(model, q['content']) for q in queries]
+    batches = plan_batches(model, files, get_batch_size(model))
+    return assemble_batches(model, [q['name'] for q in queries], files, batches)
 
 
 def get_data_sets(model):
     if model == '':
       return []
-    d = os.path.dirname(os.path.realpath(__file__))
-    path_to_data_sets = pjoin(d, 'queries', normalize_model_name(model))
-    data_sets = []
-    for data_set in os.listdir(path_to_data_sets):
-        if data_set != '__pycache__' and os.path.isdir(pjoin(path_to_data_sets, data_set)):
-            data_sets.append(data_set)
+    model = normalize_model_name(model)
+    data_sets = list(read_manifest()['datasets'].get(model, {}))
+    path_to_data_sets = pjoin(QUERIES_DIR, model)
+    if os.path.isdir(path_to_data_sets):
+        for data_set in os.listdir(path_to_data_sets):
+            if data_set != '__pycache__' and data_set not in data_sets \
+                    and os.path.isdir(pjoin(path_to_data_sets, data_set)):
+                data_sets.append(data_set)
     return data_sets
@@ -2,16 +2,20 @@
 Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 SPDX-License-Identifier: Apache-2.0
 """
+import json
 from itertools import chain
 from collections import OrderedDict
 
+OC_ENTITY_TYPES = ['node', 'relationship']
 
-def sparql_get_rows_and_columns(sparql_results):
-    if type(sparql_results) is not dict:
-        return None
 
-    if 'head' in sparql_results and 'vars' in sparql_results['head'] and 'results' in sparql_results and 'bindings' in \
-            sparql_results['results']:
+def sparql_has_rows_and_columns(sparql_results) -> bool:
+    return type(sparql_results) is dict and 'head' in sparql_results and 'vars' in sparql_results['head'] \
+        and 'results' in sparql_results and 'bindings' in sparql_results['results']
+
+
+def sparql_get_rows_and_columns(sparql_results):
+    if sparql_has_rows_and_columns(sparql_results):
         columns = []
         for v in sparql_results['head']['vars']:
             columns.append(v)
@@ -59,3 +63,121 @@ def opencypher_get_rows_and_columns(results, is_bolt=False):
         'rows': rows
     }
 
+
+def flatten_opencypher_value(name: str, value, flat: dict):
+    """
+    Adds a value returned for an openCypher variable to the flat dict of a row. Nodes and relationships are split
+    into a column for each of their keys and properties, named <variable>.<key>, as are other maps such as the
+    property maps of nodes returned over Bolt. Everything else, including paths and lists, is kept as one column.
+    """
+    if type(value) is not dict:
+        flat[name] = value
+        return
+
+    entity = value.get('~entityType') in OC_ENTITY_TYPES
+    for key, v in value.items():
+        if entity and key == '~properties' and type(v) is dict:
+            for prop, prop_value in v.items():
+                flat[f'{name}.{prop}'] = prop_value
+        elif not (entity and key == '~entityType'):
+            flat[f'{name}.{key}'] = v
+
+
+class OpenCypherColumns(object):
+    """
+    The rows of an openCypher result as one list of values per column, along with the types of the values found in
+    each column. Rows which have no value for a column hold None in it.
+    """
+
+    def __init__(self):
+        self.columns = []
+        self.values = {}
+        self.types = {}
+        self.row_count = 0
+
+    def __len__(self):
+        return self.row_count
+
+    def column_type(self, name: str) -> str:
+        """
+        :return: one of 'int', 'float', 'bool' or 'str' if every value of the column which is not None is of that
+                 type (ints also count as floats), otherwise 'object'
+        """
+        types = self.types[name] - {type(None)}
+        if not types:
+            return 'object'
+        if types == {bool}:
+            return 'bool'
+        if types <= {int}:
+            return 'int'
+        if types <= {int, float}:
+            return 'float'
+        if types == {str}:
+            return 'str'
+        return 'object'
+
+    def rows(self, start: int = 0, stop: int = None) -> list:
+        stop = self.row_count if stop is None else min(stop, self.row_count)
+        return [list(row) for row in zip(*(self.values[c][start:stop] for c in self.columns))]
+
+    def to_json(self) -> str:
+        """
+        Serializes the column lists in column order, which is much smaller than the rows of an HTML table.
+        """
+        return json.dumps([self.values[c] for c in self.columns], default=str)
+
+    def to_dataframe(self):
+        import pandas as pd
+
+        dtypes = {'int': 'Int64', 'float': 'float64', 'bool': 'boolean'}
+        return pd.DataFrame(OrderedDict((c, pd.Series(self.values[c], dtype=dtypes.get(self.column_type(c), object)))
+                                        for c in self.columns))
+
+    def to_arrow(self):
+        import pyarrow as pa
+
+        arrays = OrderedDict()
+        for c in self.columns:
+            values = self.values[c]
+            if self.column_type(c) == 'object':
+                # arrow arrays hold a single type, so mixed values, lists and maps are kept as JSON
+                values = [json.dumps(v, default=str) if v is not None else None for v in values]
+            elif self.column_type(c) == 'float':
+                values = [float(v) if v is not None else None for v in values]
+            arrays[c] = pa.array(values)
+        return pa.table(arrays)
+
+
+def opencypher_get_columns(results, is_bolt=False) -> OpenCypherColumns:
+    """
+    Turns the records of an openCypher HTTP result, or a list of Bolt records, into columns in a single pass.
+    """
+    records = results if is_bolt else (results.get('results') or [])
+    table = OpenCypherColumns()
+    for i, record in enumerate(records):
+        flat = {}
+        for name, value in record.items():
+            flatten_opencypher_value(name, value, flat)
+
+        for name, value in flat.items():
+            column = table.values.get(name)
+            if column is None:
+                column = table.values[name] = [None] * i
+                table.columns.append(name)
+                table.types[name] = set()
+            column.append(value)
+            table.types[name].add(type(value))
+        if len(flat) < len(table.columns):
+            for column in table.values.values():
+                if len(column) == i:
+                    column.append(None)
+    table.row_count = len(records)
+
+    # a node or relationship which is null in some rows, such as one from an OPTIONAL MATCH, leaves its own
+    # columns as None in those rows, rather than keeping a column of its name which is None in every row.
+    entity_names = {c.split('.', 1)[0] for c in table.columns if '.' in c}
+    for name in [c for c in table.columns if c in entity_names and table.types[c] == {type(None)}]:
+        table.columns.remove(name)
+        del table.values[name]
+        del table.types[name]
+    return table
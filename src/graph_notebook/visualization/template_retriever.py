@@ -5,13 +5,28 @@ SPDX-License-Identifier: Apache-2.0
 
 import os
 
-from jinja2 import Template
-
 dir_path = os.path.dirname(os.path.realpath(__file__))
 
 
 def retrieve_template(template_name):
+    from jinja2 import Template
+
     with open('%s/templates/%s' % (dir_path, template_name), 'r') as tab_template_file:
         tab_template = tab_template_file.read().strip()
     template = Template(tab_template)
     return template
+
+
+class LazyTemplate(object):
+    """
+    A template which is only read and compiled the first time it is rendered.
+    """
+
+    def __init__(self, template_name):
+        self.template_name = template_name
+        self._template = None
+
+    def render(self, *args, **kwargs):
+        if self._template is None:
+            self._template = retrieve_template(self.template_name)
+        return self._template.render(*args, **kwargs)
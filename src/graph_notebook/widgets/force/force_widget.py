@@ -3,7 +3,7 @@ Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 SPDX-License-Identifier: Apache-2.0
 """
 import graph_notebook
-from graph_notebook.network.EventfulNetwork import EventfulNetwork
+from graph_notebook.network.EventfulNetwork import EventfulNetwork, EVENT_UPDATE_VISIBILITY, EVENT_UPDATE_NODES
 from graph_notebook.options import OPTIONS_DEFAULT_DIRECTED
 from traitlets import Unicode, Dict, Instance
 from ipywidgets import DOMWidget, register
@@ -78,4 +78,37 @@ class Force(DOMWidget):
         super().__init__(network=network, options=options, **kwargs)
 
     def eventful_network_callback(self, network, event_name, data):
-        pass
+        if event_name in [EVENT_UPDATE_VISIBILITY, EVENT_UPDATE_NODES]:
+            # only the changed nodes and edges are sent, the rest of the network is not re-serialized
+            self.send({'method': event_name, 'data': data})
+
+    def find_nodes(self, key, value=None, predicate=None) -> set:
+        return self.network.find_nodes(key, value, predicate)
+
+    def find_edges(self, key, value=None, predicate=None) -> set:
+        return self.network.find_edges(key, value, predicate)
+
+    def filter_nodes(self, key, value=None, predicate=None):
+        """
+        Narrows the rendered graph down to the nodes matching the given field value or predicate.
+
+        Ex. force.filter_nodes('properties.country', 'US')
+        """
+        self.network.filter_nodes(key, value, predicate)
+
+    def hide_nodes(self, key, value=None, predicate=None):
+        self.network.hide_nodes(key, value, predicate)
+
+    def filter_edges(self, key, value=None, predicate=None):
+        self.network.filter_edges(key, value, predicate)
+
+    def hide_edges(self, key, value=None, predicate=None):
+        """
+        Hides the edges matching the given field value or predicate.
+
+        Ex. force.hide_edges('label', 'route')
+        """
+        self.network.hide_edges(key, value, predicate)
+
+    def show_all(self):
+        self.network.show_all()
@@ -24,6 +24,7 @@ import {
   ForceDraggableOptions,
   ForceResizableOptions,
 } from "./types";
+import { SearchIndex } from "./search_index";
 import { MODULE_NAME, MODULE_VERSION } from "./version";
 
 import feather from "feather-icons";
@@ -95,8 +96,14 @@ export class ForceView extends DOMWidgetView {
   private noElementSelectedMessage =
     "Select a single node or edge to see more.";
   private expandBtn = document.createElement("button");
-  private nodeIDSearchMatches = new Array<string | number>();
-  private edgeIDSearchMatches = new Array<string | number>();
+  private nodeSearchIndex = new SearchIndex();
+  private edgeSearchIndex = new SearchIndex();
+  private nodeIDSearchMatches = new Set<string>();
+  private edgeIDSearchMatches = new Set<string>();
+  private dimmedNodeIDs = new Set<string>();
+  private searchText = "";
+  private searchDebounceTimeout: number | undefined = undefined;
+  private searchDebounceMillis = 150;
   private closeButton = document.createElement("button");
   private detailsText = document.createElement("p");
   private searchMatchColorEdge = "rgba(9,120,209,1)";
@@ -177,6 +184,22 @@ export class ForceView extends DOMWidgetView {
     const edges = this.linksToEdges(network.graph.links);
     this.nodeDataset.update(network.graph.nodes);
     this.edgeDataset.update(edges);
+    this.buildSearchIndexes();
+  }
+
+  /**
+   * Rebuild the search indexes over everything in the node and edge datasets.
+   * Afterwards, the indexes are kept up to date incrementally as nodes and edges are added.
+   */
+  buildSearchIndexes(): void {
+    this.nodeSearchIndex.clear();
+    this.edgeSearchIndex.clear();
+    this.nodeDataset.forEach((item, id) => {
+      this.nodeSearchIndex.add(id, item);
+    });
+    this.edgeDataset.forEach((item, id) => {
+      this.edgeSearchIndex.add(id, item);
+    });
   }
 
   /**
@@ -228,6 +251,12 @@ export class ForceView extends DOMWidgetView {
       case "add_edge_data":
         this.addEdgeData(msgData);
         break;
+      case "update_visibility":
+        this.updateVisibility(msgData);
+        break;
+      case "update_nodes":
+        this.updateNodes(msgData);
+        break;
       default:
         console.log("unsupported method found", msg["method"]);
     }
@@ -271,6 +300,7 @@ export class ForceView extends DOMWidgetView {
       node["label"] = id;
     }
     this.nodeDataset.update([node]);
+    this.nodeSearchIndex.add(id, node);
     return;
   }
 
@@ -386,6 +416,7 @@ export class ForceView extends DOMWidgetView {
     }
 
     this.edgeDataset.update([edge]);
+    this.edgeSearchIndex.add(edgeID, edge);
   }
 
   /**
@@ -396,6 +427,58 @@ export class ForceView extends DOMWidgetView {
     this.addEdge(data);
   }
 
+  /**
+     * Show and hide the nodes and edges whose visibility was changed by a filter on the Kernel-side.
+     * Only ids whose visibility changed are sent, for example:
+     {
+          "hide_nodes": ["1"],
+          "show_nodes": ["2"],
+          "hide_edges": ["1:3:1_to_3"],
+          "show_edges": []
+     }
+     */
+  updateVisibility(msgData: DynamicObject): void {
+    const toUpdate = (
+      hide: Array<string>,
+      show: Array<string>
+    ): Array<DynamicObject> => {
+      const update: Array<DynamicObject> = [];
+      (hide || []).forEach((id) => update.push({ id: id, hidden: true }));
+      (show || []).forEach((id) => update.push({ id: id, hidden: false }));
+      return update;
+    };
+    this.nodeDataset.update(
+      toUpdate(msgData["hide_nodes"], msgData["show_nodes"])
+    );
+    this.edgeDataset.update(
+      toUpdate(msgData["hide_edges"], msgData["show_edges"])
+    );
+  }
+
+  /**
+     * Merge new data into many nodes at once, such as the groups and sizes found by %graph_analyze,
+     * updating the nodes dataset a single time. Nodes which are not in the dataset are skipped.
+     * Example input:
+     {
+          "nodes": [
+            {"node_id": "1", "data": {"group": "0", "value": 0.25}}
+          ]
+     }
+     */
+  updateNodes(msgData: DynamicObject): void {
+    const update: Array<VisNode> = [];
+    (msgData["nodes"] || []).forEach((entry: DynamicObject) => {
+      const node = this.nodeDataset.get(entry["node_id"]);
+      if (node === null) {
+        return;
+      }
+      const merged = VisNode.mergeObject(node, entry["data"]);
+      update.push(merged);
+      this.nodeSearchIndex.add(entry["node_id"], merged);
+    });
+    this.nodeDataset.update(update);
+  }
+
   /**
    * Convert networkx links to Edges. To do this, we want to convert
    * "source" into "from"
@@ -664,103 +747,121 @@ export class ForceView extends DOMWidgetView {
     this.buildGraphPropertiesTable(edge);
   }
 
+  /**
+   * Debounce the search input so that the search only runs once the user has stopped typing.
+   *
+   * @param text - The content to search for
+   */
+  scheduleSearch(text: string): void {
+    if (this.searchDebounceTimeout !== undefined) {
+      window.clearTimeout(this.searchDebounceTimeout);
+    }
+    this.searchDebounceTimeout = window.setTimeout(() => {
+      this.searchDebounceTimeout = undefined;
+      this.handleSearchInput(text);
+    }, this.searchDebounceMillis);
+  }
+
   /**
    * Searches for the provided text under all nodes and edges in this.vis
    * If any property or key contains the text, that edge or node will be highlighted
    *
+   * @remarks
+   * Matches are looked up in the node and edge search indexes, and only the elements whose
+   * match state changed since the previous search are updated on the datasets.
+   *
    * NOTE: Case sensitive.
    * @param text - The content to search for
    */
   handleSearchInput(text: string): void {
+    if (text === this.searchText) {
+      return;
+    }
+    this.searchText = text;
+
     const nodeUpdate: Array<DynamicObject> = [];
     const edgeUpdate: Array<DynamicObject> = [];
-    const nodeIDs: DynamicObject = {};
-    const edgeIDs: DynamicObject = {};
-
-    const selectedNodes = {};
-    this.vis?.getSelectedNodes().forEach((nodeID) => {
-      selectedNodes[nodeID] = true;
-    });
-
-    const selectedEdges = {};
-    this.vis?.getSelectedEdges().forEach((edgeID) => {
-      selectedEdges[edgeID] = true;
-    });
 
+    let nodeIDs: Set<string>;
+    let edgeIDs: Set<string>;
     if (text !== "") {
-      // all matched nodes should be colors a light blue
-      this.nodeDataset.forEach((item, id) => {
-        if (this.search(text, item, 0)) {
-          const nodeID = id.toString();
-          nodeUpdate.push({
-            id: nodeID,
-            borderWidth: 3,
-          });
-          nodeIDs[id.toString()] = true;
+      nodeIDs = this.nodeSearchIndex.search(text);
+      edgeIDs = this.edgeSearchIndex.search(text);
+
+      // newly matched nodes get a highlighted border
+      nodeIDs.forEach((nodeID) => {
+        if (this.dimmedNodeIDs.has(nodeID)) {
+          this.dimmedNodeIDs.delete(nodeID);
+          nodeUpdate.push({ id: nodeID, borderWidth: 3, opacity: 1 });
+        } else if (!this.nodeIDSearchMatches.has(nodeID)) {
+          nodeUpdate.push({ id: nodeID, borderWidth: 3 });
         }
       });
 
-      // all matched edges should be colored a light blue
-      this.edgeDataset.forEach((item, id) => {
-        if (this.search(text, item, 0)) {
+      // newly matched edges should be colored a light blue
+      edgeIDs.forEach((edgeID) => {
+        if (!this.edgeIDSearchMatches.has(edgeID)) {
           edgeUpdate.push({
-            id: id.toString(),
+            id: edgeID,
             width: 3,
             color: this.searchMatchColorEdge,
           });
-          edgeIDs[id.toString()] = true;
         }
       });
-    } else {
-      //Reset the opacity and border width
-      this.nodeDataset.forEach((item, id) => {
-        const nodeID = id.toString();
-        nodeUpdate.push({
-          id: nodeID,
-          opacity: 1,
-          borderWidth: 0,
-        });
-        nodeIDs[id.toString()] = true;
-      });
-    }
 
-    // check current matched nodes and clear all nodes which are no longer matches
-    this.nodeIDSearchMatches.forEach((value) => {
-      if (nodeIDs.hasOwnProperty(value.toString())) {
-        return;
-      } else {
-        const selected = selectedNodes.hasOwnProperty(value.toString());
+      // nodes which are no longer matches are faded out
+      const selectedNodes = new Set<string>();
+      this.vis?.getSelectedNodes().forEach((nodeID) => {
+        selectedNodes.add(nodeID.toString());
+      });
+      this.nodeIDSearchMatches.forEach((nodeID) => {
+        if (nodeIDs.has(nodeID)) {
+          return;
+        }
         nodeUpdate.push({
-          id: value.toString(),
-          borderWidth: selected
+          id: nodeID,
+          borderWidth: selectedNodes.has(nodeID)
             ? this.visOptions["nodes"]["borderWidthSelected"]
             : 0,
           opacity: 0.35,
         });
-      }
-    });
+        this.dimmedNodeIDs.add(nodeID);
+      });
+    } else {
+      // Reset the opacity and border width of every node we have changed
+      new Set([...this.nodeIDSearchMatches, ...this.dimmedNodeIDs]).forEach(
+        (nodeID) => {
+          nodeUpdate.push({ id: nodeID, opacity: 1, borderWidth: 0 });
+        }
+      );
+      this.dimmedNodeIDs.clear();
+      nodeIDs = this.nodeSearchIndex.ids();
+      edgeIDs = new Set<string>();
+    }
 
-    // check current matched edges and clear all nodes which are no longer matches
-    this.edgeIDSearchMatches.forEach((value) => {
-      if (edgeIDs.hasOwnProperty(value.toString())) {
-        return;
-      } else {
+    // clear all edges which are no longer matches
+    this.edgeIDSearchMatches.forEach((edgeID) => {
+      if (!edgeIDs.has(edgeID)) {
         edgeUpdate.push({
-          id: value.toString(),
+          id: edgeID,
           width: 1,
           color: this.visOptions["edges"]["color"],
         });
       }
     });
 
+    this.nodeIDSearchMatches = nodeIDs;
+    this.edgeIDSearchMatches = edgeIDs;
+    if (nodeUpdate.length === 0 && edgeUpdate.length === 0) {
+      return;
+    }
+
     this.vis?.setOptions({ physics: false });
     this.nodeDataset.update(nodeUpdate);
     this.edgeDataset.update(edgeUpdate);
 
     this.vis?.setOptions({ physics: true });
     this.vis?.stopSimulation();
-    this.nodeIDSearchMatches = Object.keys(nodeIDs);
-    this.edgeIDSearchMatches = Object.keys(edgeIDs);
   }
 
   /**
@@ -783,8 +884,8 @@ export class ForceView extends DOMWidgetView {
     searchInput.classList.add("search-bar");
     searchInput.type = "search";
     searchInput.placeholder = "search";
-    searchInput.onkeyup = (): void => {
-      this.handleSearchInput(searchInput.value);
+    searchInput.oninput = (): void => {
+      this.scheduleSearch(searchInput.value);
     };
 
     this.searchDiv.append(searchInput);
@@ -928,48 +1029,6 @@ export class ForceView extends DOMWidgetView {
     this.detailsPanel.classList.toggle("hidden");
   }
 
-  /**
-   * Search the provided data for an instance of the given text
-   * @param text - the search term
-   * @param data - data to be searched
-   */
-  search(text: string, data: any, depth: number): boolean {
-    if (Array.isArray(data)) {
-      for (let i = 0; i < data.length; i++) {
-        if (this.search(text, data[i], depth + 1)) {
-          return true;
-        }
-      }
-      return false;
-    } else if (typeof data === "object") {
-      let found = false;
-
-      // an object can be null
-      if (data === null || data === undefined) {
-        return found;
-      }
-
-      Object.entries(data).forEach((entry) => {
-        if (found) {
-          return true;
-        }
-
-        // we want to ignore the top level set of properties on an object except for "properties"
-        // because otherwise we would search for vis-specific settings.
-        if (depth === 0) {
-          found = this.search(text, entry[1], depth + 1);
-        } else {
-          found = this.search(text, entry, depth + 1);
-        }
-      });
-      return found;
-    } else if (data === null || data === undefined) {
-      return false;
-    } else {
-      return data.toString().indexOf(text) !== -1;
-    }
-  }
-
   /**
    * Take this widget to full screen mode, ensuring that the positioning of the details
    * panel remains in the same relative position that it was in before full screen mode.
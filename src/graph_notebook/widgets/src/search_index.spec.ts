@@ -0,0 +1,77 @@
+/*
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+ */
+
+import { SearchIndex } from "./search_index";
+import { assert } from "chai";
+
+describe("search_index", function () {
+  describe("SearchIndex", function () {
+    const airports = {
+      SJC: { id: "SJC", label: "SJC", properties: { city: "San Jose" } },
+      SFO: { id: "SFO", label: "SFO", properties: { city: "San Francisco" } },
+      DFW: { id: "DFW", label: "DFW", properties: { runways: [7, 8] } },
+    };
+
+    const buildIndex = function (): SearchIndex {
+      const index = new SearchIndex();
+      Object.entries(airports).forEach((entry) => {
+        index.add(entry[0], entry[1]);
+      });
+      return index;
+    };
+
+    it("should find matches in nested properties", function () {
+      const index = buildIndex();
+      assert.deepEqual(Array.from(index.search("San ")).sort(), [
+        "SFO",
+        "SJC",
+      ]);
+      assert.deepEqual(Array.from(index.search("Jose")), ["SJC"]);
+    });
+
+    it("should search short terms and array values", function () {
+      const index = buildIndex();
+      assert.deepEqual(Array.from(index.search("8")), ["DFW"]);
+      assert.deepEqual(Array.from(index.search("SF")), ["SFO"]);
+    });
+
+    it("should match nested keys but not top level keys", function () {
+      const index = buildIndex();
+      assert.deepEqual(Array.from(index.search("runways")), ["DFW"]);
+      assert.equal(index.search("properties").size, 0);
+    });
+
+    it("should not match across separate values", function () {
+      const index = buildIndex();
+      assert.equal(index.search("SJCSJC").size, 0);
+    });
+
+    it("should be case sensitive", function () {
+      const index = buildIndex();
+      assert.equal(index.search("jose").size, 0);
+    });
+
+    it("should replace an element when it is added again", function () {
+      const index = buildIndex();
+      index.add("SJC", {
+        id: "SJC",
+        label: "SJC",
+        properties: { city: "Reno" },
+      });
+      assert.equal(index.search("Jose").size, 0);
+      assert.deepEqual(Array.from(index.search("Reno")), ["SJC"]);
+      assert.equal(index.size, 3);
+    });
+
+    it("should forget removed elements", function () {
+      const index = buildIndex();
+      index.remove("SFO");
+      assert.deepEqual(Array.from(index.search("San ")), ["SJC"]);
+      index.clear();
+      assert.equal(index.size, 0);
+      assert.equal(index.search("San ").size, 0);
+    });
+  });
+});
@@ -0,0 +1,163 @@
+/*
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+ */
+
+/**
+ * Separates the individual values of an indexed element so that a search term
+ * can never match across the boundary of two different values.
+ */
+const VALUE_SEPARATOR = "\u0000";
+
+/**
+ * The length of the n-grams that are indexed. Search terms shorter than this
+ * fall back to scanning the precomputed text of each element.
+ */
+export const NGRAM_LENGTH = 3;
+
+/**
+ * An inverted n-gram index over the searchable text of the nodes or edges in a network.
+ *
+ * @remarks
+ * Each element is flattened into a single string once, when it is added, instead of
+ * walking and stringifying its nested properties on every search. A search looks up the
+ * posting lists for every n-gram of the search term, intersects them starting from the
+ * smallest, and confirms the remaining candidates with a substring check.
+ *
+ * NOTE: Like the search it replaces, matching is case sensitive.
+ */
+export class SearchIndex {
+  private documents = new Map<string, string>();
+  private postings = new Map<string, Set<string>>();
+
+  get size(): number {
+    return this.documents.size;
+  }
+
+  /**
+   * Flatten an element into the text that is searched. The top level keys of an
+   * element are skipped because they are vis-specific settings, but every nested key
+   * (such as the keys under "properties") and every value is included.
+   *
+   * @param data - the node or edge to flatten
+   */
+  static searchableText(data: any): string {
+    const values = new Array<string>();
+    const collect = (value: any, depth: number): void => {
+      if (value === null || value === undefined) {
+        return;
+      } else if (Array.isArray(value)) {
+        value.forEach((entry) => collect(entry, depth + 1));
+      } else if (typeof value === "object") {
+        Object.entries(value).forEach((entry) => {
+          if (depth !== 0) {
+            values.push(entry[0]);
+          }
+          collect(entry[1], depth + 1);
+        });
+      } else {
+        values.push(value.toString());
+      }
+    };
+    collect(data, 0);
+    return values.join(VALUE_SEPARATOR);
+  }
+
+  /**
+   * Add an element to the index, replacing anything previously indexed under its id.
+   *
+   * @param id - the id of the node or edge
+   * @param data - the node or edge itself
+   */
+  add(id: string | number, data: any): void {
+    const key = id.toString();
+    const text = SearchIndex.searchableText(data);
+    if (this.documents.get(key) === text) {
+      return;
+    }
+
+    this.remove(key);
+    this.documents.set(key, text);
+    this.ngrams(text).forEach((gram) => {
+      let ids = this.postings.get(gram);
+      if (ids === undefined) {
+        ids = new Set<string>();
+        this.postings.set(gram, ids);
+      }
+      ids.add(key);
+    });
+  }
+
+  remove(id: string | number): void {
+    const key = id.toString();
+    const text = this.documents.get(key);
+    if (text === undefined) {
+      return;
+    }
+
+    this.ngrams(text).forEach((gram) => {
+      const ids = this.postings.get(gram);
+      if (ids === undefined) {
+        return;
+      }
+      ids.delete(key);
+      if (ids.size === 0) {
+        this.postings.delete(gram);
+      }
+    });
+    this.documents.delete(key);
+  }
+
+  clear(): void {
+    this.documents.clear();
+    this.postings.clear();
+  }
+
+  ids(): Set<string> {
+    return new Set<string>(this.documents.keys());
+  }
+
+  /**
+   * Find the ids of every indexed element whose searchable text contains the given text.
+   *
+   * @param text - the content to search for
+   */
+  search(text: string): Set<string> {
+    const matches = new Set<string>();
+    if (text === "") {
+      return matches;
+    }
+
+    let candidates: Iterable<string> = this.documents.keys();
+    if (text.length >= NGRAM_LENGTH) {
+      const lists = new Array<Set<string>>();
+      for (const gram of this.ngrams(text)) {
+        const ids = this.postings.get(gram);
+        if (ids === undefined) {
+          return matches;
+        }
+        lists.push(ids);
+      }
+      lists.sort((a, b) => a.size - b.size);
+      candidates = Array.from(lists[0]).filter((id) =>
+        lists.every((ids) => ids.has(id))
+      );
+    }
+
+    for (const id of candidates) {
+      const document = this.documents.get(id);
+      if (document !== undefined && document.indexOf(text) !== -1) {
+        matches.add(id);
+      }
+    }
+    return matches;
+  }
+
+  private ngrams(text: string): Set<string> {
+    const grams = new Set<string>();
+    for (let i = 0; i + NGRAM_LENGTH <= text.length; i++) {
+      grams.add(text.substr(i, NGRAM_LENGTH));
+    }
+    return grams;
+  }
+}
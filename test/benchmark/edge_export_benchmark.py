@@ -0,0 +1,67 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+
+Micro-benchmarks for exporting the edges of a Network as arrays, a scipy sparse matrix and a pandas DataFrame,
+next to the networkx exports of the same graph. Run with
+
+    python -m test.benchmark.edge_export_benchmark [--nodes 100000] [--edges 1000000] [--repeat 3]
+"""
+
+import argparse
+import random
+import time
+
+import networkx as nx
+
+from graph_notebook.network.Network import Network
+
+
+def build_network(nodes: int, edges: int) -> Network:
+    rng = random.Random(0)
+    network = Network()
+    for i in range(nodes):
+        network.add_node(str(i), {'label': 'airport'})
+    for k in range(edges):
+        network.add_edge(str(rng.randrange(nodes)), str(rng.randrange(nodes)), str(k), 'route',
+                         {'properties': {'dist': k % 5000}})
+    return network
+
+
+def fastest(run, repeat: int) -> float:
+    """
+    :return: the fastest of repeat runs, in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nodes', type=int, default=100000, help='number of nodes in the network')
+    parser.add_argument('--edges', type=int, default=1000000, help='number of edges in the network')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs of each benchmark, the fastest is kept')
+    args = parser.parse_args()
+
+    network = build_network(args.nodes, args.edges)
+    nodes = network.node_ids()
+    runs = {
+        'to_edge_list_arrays': lambda: network.to_edge_list_arrays(),
+        'to_scipy_sparse': lambda: network.to_scipy_sparse(),
+        'to_scipy_sparse weight': lambda: network.to_scipy_sparse(weight='dist'),
+        'to_pandas_edgelist': lambda: network.to_pandas_edgelist(),
+        'networkx to_scipy_sparse': lambda: nx.to_scipy_sparse_matrix(network.graph, nodelist=nodes),
+        'networkx to_pandas_edgelist': lambda: nx.to_pandas_edgelist(network.graph),
+    }
+    print(f'{"export":<32}{"seconds":>10}')
+    for name, run in runs.items():
+        print(f'{name:<32}{fastest(run, args.repeat):>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
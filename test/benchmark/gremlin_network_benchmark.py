@@ -0,0 +1,113 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+
+Micro-benchmarks for turning Gremlin results into a GremlinNetwork. Run with
+
+    python -m test.benchmark.gremlin_network_benchmark [--paths 50000] [--repeat 3]
+"""
+
+import argparse
+import time
+
+from gremlin_python.process.traversal import T, Direction
+from gremlin_python.structure.graph import Path, Vertex, Edge
+
+from graph_notebook.network.gremlin.GremlinNetwork import GremlinNetwork
+
+AIRPORTS = 3500
+REGIONS = ['US-WA', 'US-GA', 'US-TX', 'US-CA', 'MX-ROO', 'DE-BE']
+
+
+def airport_value_map(i: int) -> dict:
+    return {T.id: str(i), T.label: 'airport', 'code': [f'A{i:04d}'], 'region': [REGIONS[i % len(REGIONS)]],
+            'runways': [i % 5], 'desc': [f'Airport number {i}']}
+
+
+def airport_element_map(i: int) -> dict:
+    return {T.id: str(i), T.label: 'airport', 'code': f'A{i:04d}', 'region': REGIONS[i % len(REGIONS)],
+            'runways': i % 5, 'desc': f'Airport number {i}'}
+
+
+def route_element_map(i: int, j: int) -> dict:
+    return {T.id: f'{i}-{j}', T.label: 'route', Direction.OUT: {T.id: str(i), T.label: 'airport'},
+            Direction.IN: {T.id: str(j), T.label: 'airport'}, 'dist': (i * 31 + j) % 5000}
+
+
+def endpoints(n: int):
+    for k in range(n):
+        yield k % AIRPORTS, (k * 7 + 1) % AIRPORTS
+
+
+def path_results(n: int) -> list:
+    """g.V().outE().inV().path()"""
+    results = []
+    for i, j in endpoints(n):
+        out_v = Vertex(str(i), 'airport')
+        in_v = Vertex(str(j), 'airport')
+        results.append(Path([], [out_v, Edge(f'{i}-{j}', out_v, 'route', in_v), in_v]))
+    return results
+
+
+def vertex_results(n: int) -> list:
+    """g.V().out().path()"""
+    return [Path([], [Vertex(str(i), 'airport'), Vertex(str(j), 'airport')]) for i, j in endpoints(n)]
+
+
+def element_map_results(n: int) -> list:
+    """g.V().outE().inV().path().by(elementMap())"""
+    return [Path([], [airport_element_map(i), route_element_map(i, j), airport_element_map(j)])
+            for i, j in endpoints(n)]
+
+
+def value_map_results(n: int) -> list:
+    """g.V().out().path().by(valueMap(true))"""
+    return [Path([], [airport_value_map(i), airport_value_map(j)]) for i, j in endpoints(n)]
+
+
+INPUTS = {
+    'Path': path_results,
+    'Vertex': vertex_results,
+    'elementMap': element_map_results,
+    'valueMap': value_map_results,
+}
+
+OPTIONS = {
+    'default': {},
+    'display/group by property': {'group_by_property': 'region', 'display_property': 'code',
+                                  'edge_display_property': 'dist'},
+    'per label rules': {'group_by_property': '{"airport": "region"}', 'display_property': '{"airport": "code"}',
+                        'edge_display_property': '{"route": "dist"}'},
+}
+
+
+def time_add_results(results: list, options: dict, repeat: int) -> float:
+    """
+    :return: the fastest of repeat runs, in seconds
+    """
+    fastest = None
+    for _ in range(repeat):
+        gn = GremlinNetwork(**options)
+        start = time.perf_counter()
+        gn.add_results(results)
+        elapsed = time.perf_counter() - start
+        fastest = elapsed if fastest is None else min(fastest, elapsed)
+    return fastest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--paths', type=int, default=50000, help='number of paths in each result')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs of each benchmark, the fastest is kept')
+    args = parser.parse_args()
+
+    print(f'{"input":<12}{"options":<28}{"seconds":>10}{"paths/s":>12}')
+    for input_name, build in INPUTS.items():
+        results = build(args.paths)
+        for options_name, options in OPTIONS.items():
+            seconds = time_add_results(results, options, args.repeat)
+            print(f'{input_name:<12}{options_name:<28}{seconds:>10.3f}{args.paths / seconds:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
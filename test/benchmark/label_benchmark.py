@@ -0,0 +1,72 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+
+Micro-benchmarks for formatting the titles and labels of nodes and edges, on the repetitive values of the
+air-routes seed data, uncached and with the shared label cache empty (cold) or filled (warm). Run with
+
+    python -m test.benchmark.label_benchmark [--values 200000] [--repeat 3]
+"""
+
+import argparse
+import time
+
+from graph_notebook.network.EventfulNetwork import format_label, _format_label, _format_hashable_label, \
+    _format_single_list_label, _format_list_label
+from test.benchmark.gremlin_network_benchmark import AIRPORTS
+
+COUNTRIES = ['US', 'MX', 'DE', 'GB', 'FR', 'JP', 'AU', 'BR', 'IN', 'CA']
+CITIES = [f'City {i}' for i in range(800)]
+MAX_LENGTH = 10
+
+
+def label_values(n: int) -> dict:
+    """
+    :return: the values of a few properties of n airports, as they are shown as labels
+    """
+    return {
+        'label': ['airport' if i % 10 else 'country' for i in range(n)],
+        'code': [f'A{i % AIRPORTS:04d}' for i in range(n)],
+        'country (valueMap)': [[COUNTRIES[i % len(COUNTRIES)]] for i in range(n)],
+        'city': [f'{CITIES[i % len(CITIES)]} International Airport' for i in range(n)],
+        'runways': [i % 5 for i in range(n)],
+    }
+
+
+def clear_cache():
+    _format_hashable_label.cache_clear()
+    _format_single_list_label.cache_clear()
+    _format_list_label.cache_clear()
+
+
+def fastest(run, repeat: int, before=None) -> float:
+    """
+    :return: the fastest of repeat runs, in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--values', type=int, default=200000, help='number of values of each property')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs of each benchmark, the fastest is kept')
+    args = parser.parse_args()
+
+    print(f'{"values":<24}{"uncached":>10}{"cold":>10}{"warm":>10}')
+    for name, values in label_values(args.values).items():
+        uncached = fastest(lambda: [_format_label(v, MAX_LENGTH) for v in values], args.repeat)
+        cold = fastest(lambda: [format_label(v, MAX_LENGTH) for v in values], args.repeat, clear_cache)
+        warm = fastest(lambda: [format_label(v, MAX_LENGTH) for v in values], args.repeat)
+        print(f'{name:<24}{uncached:>10.3f}{cold:>10.3f}{warm:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -86,3 +86,16 @@ class TestGenerateConfiguration(unittest.TestCase):
         c.write_to_file(self.test_file_path)
         config_from_file = get_config(self.test_file_path)
         self.assertEqual(config.to_dict(), config_from_file.to_dict())
+
+    def test_generate_configuration_with_readers(self):
+        readers = ['reader-1.cluster.us-west-2.neptune.amazonaws.com', 'reader-2:8183']
+        c = generate_config(self.neptune_host, self.port, readers=readers)
+        self.assertEqual(readers, c.to_dict()['readers'])
+        c.write_to_file(self.test_file_path)
+        config_from_file = get_config(self.test_file_path)
+        self.assertEqual(readers, config_from_file.readers)
+
+    def test_configuration_without_readers_omits_them(self):
+        config = Configuration(self.generic_host, self.port)
+        self.assertEqual([], config.readers)
+        self.assertNotIn('readers', config.to_dict())
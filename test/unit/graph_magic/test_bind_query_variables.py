@@ -0,0 +1,105 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import unittest
+
+from graph_notebook.decorators.decorators import magic_variables, bind_query_variables
+from graph_notebook.magics.graph_magic import Graph
+from graph_notebook.neptune.client import add_sparql_values_block
+
+
+class TestBindQueryVariables(unittest.TestCase):
+    def test_gremlin_whole_string_literals_are_bound(self):
+        query, bindings = bind_query_variables("g.V().hasLabel('${a}').has(\"${c}\",'CZM').values('${c}')",
+                                               {'a': 'airport', 'c': 'code'}, 'gremlin')
+        self.assertEqual("g.V().hasLabel(_p0).has(_p1,'CZM').values(_p1)", query)
+        self.assertEqual({'_p0': 'airport', '_p1': 'code'}, bindings)
+
+    def test_gremlin_bare_numbers_and_lists_are_bound(self):
+        query, bindings = bind_query_variables("g.V(${ids}).limit(${n})", {'ids': ['1', '2'], 'n': 10}, 'gremlin')
+        self.assertEqual("g.V(_p0).limit(_p1)", query)
+        self.assertEqual({'_p0': ['1', '2'], '_p1': 10}, bindings)
+
+    def test_text_injection_is_kept_where_binding_would_change_the_query(self):
+        local_ns = {'step': "out('route')", 'n': 1, 'code': 'SEA'}
+        query, bindings = bind_query_variables("g.V().${step}.has('code', 'x-${n}').has('code', '${code}-1')",
+                                               local_ns, 'gremlin')
+        self.assertEqual("g.V().out('route').has('code', 'x-1').has('code', 'SEA-1')", query)
+        self.assertEqual({}, bindings)
+
+    def test_escaped_quotes_and_comments_do_not_change_literal_state(self):
+        query, bindings = bind_query_variables("g.V().has('name', 'it\\'s ${n}') // don't\ng.V(${n})",
+                                               {'n': 5}, 'gremlin')
+        self.assertEqual("g.V().has('name', 'it\\'s 5') // don't\ng.V(_p0)", query)
+        self.assertEqual({'_p0': 5}, bindings)
+
+    def test_opencypher_parameters(self):
+        query, bindings = bind_query_variables("MATCH (a:airport {code: '${code}'}) RETURN a LIMIT ${n}",
+                                               {'code': 'SEA', 'n': 5}, 'opencypher')
+        self.assertEqual("MATCH (a:airport {code: $_p0}) RETURN a LIMIT $_p1", query)
+        self.assertEqual({'_p0': 'SEA', '_p1': 5}, bindings)
+
+    def test_dict_access_variables(self):
+        query, bindings = bind_query_variables("g.V('${d['id']}')", {'d': {'id': 'a'}}, 'gremlin')
+        self.assertEqual("g.V(_p0)", query)
+        self.assertEqual({'_p0': 'a'}, bindings)
+
+    def test_sparql_values_block(self):
+        cell = '''PREFIX so: <https://schema.org/#>
+SELECT ?city WHERE {
+    ?s a <${type}> .
+    ?s so:population ?p FILTER(?p > ${min} && ?city = "${name}")
+}'''
+        query, bindings = bind_query_variables(cell, {'type': 'https://schema.org/City', 'min': 100, 'name': 'Paris'},
+                                               'sparql')
+        self.assertEqual({'_p0': '<https://schema.org/City>', '_p1': '"Paris"'}, bindings)
+        query = add_sparql_values_block(query, bindings)
+        expected = '''PREFIX so: <https://schema.org/#>
+SELECT ?city WHERE { VALUES (?_p0 ?_p1) { (<https://schema.org/City> "Paris") }
+    ?s a ?_p0 .
+    ?s so:population ?p FILTER(?p > 100 && ?city = ?_p1)
+}'''
+        self.assertEqual(expected, query)
+
+    def test_sparql_tagged_literals_and_limit_are_injected(self):
+        query, bindings = bind_query_variables('SELECT * WHERE { ?s ?p "${name}"@en } LIMIT ${n}',
+                                               {'name': 'Paris', 'n': 5}, 'sparql')
+        self.assertEqual('SELECT * WHERE { ?s ?p "Paris"@en } LIMIT 5', query)
+        self.assertEqual({}, bindings)
+
+    def test_sparql_without_where_group(self):
+        self.assertIsNone(add_sparql_values_block('DESCRIBE ?_p0', {'_p0': '<http://a>'}))
+
+    def test_sparql_subquery_is_not_bound(self):
+        query = 'SELECT ?s WHERE { { SELECT ?s WHERE { ?s ?_p0 ?o } } }'
+        self.assertIsNone(add_sparql_values_block(query, {'_p0': '<http://x/y>'}))
+
+    def test_sparql_select_all_is_not_bound(self):
+        self.assertIsNone(add_sparql_values_block('SELECT * WHERE { ?s ?_p0 ?o }', {'_p0': '<http://x/y>'}))
+        self.assertIsNone(add_sparql_values_block('SELECT DISTINCT * WHERE { ?s ?_p0 ?o }', {'_p0': '<http://x/y>'}))
+        self.assertEqual('SELECT (COUNT(*) AS ?c) WHERE { VALUES (?_p0) { (<http://x/y>) } ?s ?_p0 ?o }',
+                         add_sparql_values_block('SELECT (COUNT(*) AS ?c) WHERE { ?s ?_p0 ?o }',
+                                                 {'_p0': '<http://x/y>'}))
+
+    def test_sparql_where_in_comments_and_literals(self):
+        query = '''# match where {
+SELECT ?s WHERE { ?s <http://x/where> "where {" ; ?_p0 ?o }'''
+        expected = '''# match where {
+SELECT ?s WHERE { VALUES (?_p0) { (<http://x/y>) } ?s <http://x/where> "where {" ; ?_p0 ?o }'''
+        self.assertEqual(expected, add_sparql_values_block(query, {'_p0': '<http://x/y>'}))
+
+    def test_sparql_fallback_injects_text(self):
+        graph = Graph.__new__(Graph)
+        query = graph._bind_sparql_variables('SELECT * WHERE { ?s <${p}> ?o }', {'p': 'http://x/y'})
+        self.assertEqual('SELECT * WHERE { ?s <http://x/y> ?o }', query)
+
+    def test_flag_skips_text_injection(self):
+        @magic_variables
+        def gremlin_mock(self_var, line, cell, local_ns: dict = None):
+            return cell
+
+        cell = "g.V('${a}')"
+        self.assertEqual(cell, gremlin_mock('', '--bind-variables', cell, local_ns={'a': 'b'}))
+        self.assertEqual("g.V('b')", gremlin_mock('', '', cell, local_ns={'a': 'b'}))
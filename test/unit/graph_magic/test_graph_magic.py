@@ -4,6 +4,8 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 import json
+import os
+from unittest import mock
 
 from IPython.testing.globalipapp import get_ipython
 
@@ -32,3 +34,10 @@ class TestGraphMagicLoadExt(GraphNotebookTest):
         config_dict3 = res3.to_dict()
 
         self.assertEqual(config_dict2, config_dict3)
+
+    def test_query_history_can_be_turned_off(self):
+        from graph_notebook.magics.graph_magic import Graph
+
+        with mock.patch.dict(os.environ, {'GRAPH_NOTEBOOK_QUERY_HISTORY_ENABLED': 'false',
+                                          'GRAPH_NOTEBOOK_WARM_UP': 'false'}):
+            self.assertIsNone(Graph(self.ip).query_history)
@@ -0,0 +1,57 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+import graph_notebook
+
+# modules which must only be imported once a magic needs them
+DEFERRED_MODULES = ['neo4j', 'gremlin_python', 'tornado', 'boto3', 'botocore', 'networkx', 'rdflib', 'pandas',
+                    'jinja2', 'SPARQLWrapper', 'graph_notebook.magics.ml', 'graph_notebook.magics.streams',
+                    'graph_notebook.network', 'graph_notebook.widgets']
+
+# generous, so that slow machines do not fail the test, while an eagerly imported driver still does
+IMPORT_TIME_BUDGET_MS = int(os.getenv('GRAPH_NOTEBOOK_IMPORT_TIME_BUDGET_MS', 1500))
+IMPORT_TIME_RUNS = 3
+
+
+def import_times(module: str) -> dict:
+    """
+    Imports a module in a new interpreter with -X importtime.
+
+    :return: a dict of the cumulative import time, in microseconds, of every module that was imported
+    """
+    env = dict(os.environ)
+    src = os.path.dirname(os.path.dirname(os.path.realpath(graph_notebook.__file__)))
+    env['PYTHONPATH'] = os.pathsep.join([src, env['PYTHONPATH']]) if env.get('PYTHONPATH') else src
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_magics_do_not_import_drivers(self):
+        imported = import_times('graph_notebook.magics')
+        self.assertIn('graph_notebook.magics.graph_magic', imported)
+        for module in DEFERRED_MODULES:
+            eager = [name for name in imported if name == module or name.startswith(f'{module}.')]
+            self.assertEqual([], eager, f'{module} is imported by graph_notebook.magics')
+
+    def test_magics_import_time_budget(self):
+        # the fastest of a few runs, as the first one also compiles the bytecode
+        fastest = min(import_times('graph_notebook.magics')['graph_notebook.magics']
+                      for _ in range(IMPORT_TIME_RUNS)) / 1000
+        self.assertLess(fastest, IMPORT_TIME_BUDGET_MS,
+                        f'importing graph_notebook.magics took {fastest:.0f}ms, over the budget of '
+                        f'{IMPORT_TIME_BUDGET_MS}ms')
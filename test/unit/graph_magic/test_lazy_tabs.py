@@ -0,0 +1,70 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import argparse
+import unittest
+
+from graph_notebook.magics.lazy_tabs import LazyTabs, parse_tab_names
+
+
+class TestLazyTabs(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rendered = []
+
+    def view(self, name: str):
+        return lambda: self.rendered.append(name)
+
+    def test_only_selected_tabs_are_rendered(self):
+        tabs = LazyTabs()
+        tabs.add('console', 'Console', self.view('console'))
+        tabs.add('graph', 'Graph', self.view('graph'))
+        tabs.add('json', 'JSON', self.view('json'))
+        tab = tabs.display()
+        self.assertEqual(['Console', 'Graph', 'JSON'], [tab.get_title(i) for i in range(3)])
+        self.assertEqual(['console'], self.rendered)
+
+        tab.selected_index = 2
+        tab.selected_index = 0
+        tab.selected_index = 2
+        self.assertEqual(['console', 'json'], self.rendered)
+
+    def test_names_pick_the_tabs(self):
+        tabs = LazyTabs(['json', 'metadata'])
+        tabs.add('console', 'Console', self.view('console'))
+        tabs.add('json', 'JSON', self.view('json'))
+        tabs.add('metadata', 'Query Metadata', self.view('metadata'))
+        tab = tabs.display()
+        self.assertEqual(2, len(tab.children))
+        self.assertEqual(['json'], self.rendered)
+
+        self.assertIsNone(LazyTabs(['graph']).display())
+
+    def test_rendered_views_are_dropped(self):
+        tabs = LazyTabs()
+        tabs.add('console', 'Console', self.view('console'))
+        tabs.add('json', 'JSON', self.view('json'))
+        tab = tabs.display()
+        self.assertIsNone(tabs.views[0][1])
+        self.assertIsNotNone(tabs.views[1][1])
+
+        tab.selected_index = 1
+        self.assertEqual(['console', 'json'], self.rendered)
+        self.assertEqual([None, None], [view for _, view in tabs.views])
+
+    def test_closing_the_tab_drops_every_view(self):
+        tabs = LazyTabs()
+        tabs.add('console', 'Console', self.view('console'))
+        tabs.add('graph', 'Graph', self.view('graph'))
+        tab = tabs.display()
+        tab.close()
+        self.assertEqual([None, None], [view for _, view in tabs.views])
+
+        tab.selected_index = 1
+        self.assertEqual(['console'], self.rendered)
+
+    def test_parse_tab_names(self):
+        self.assertEqual(['table', 'json'], parse_tab_names('Table, json,'))
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_tab_names('table,chart')
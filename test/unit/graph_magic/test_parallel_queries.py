@@ -0,0 +1,36 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import unittest
+
+from graph_notebook.magics.graph_magic import parse_parallel_queries
+
+
+class TestParallelQueries(unittest.TestCase):
+    def test_headers_set_language_and_label(self):
+        cell = '''--- gremlin airports
+g.V().hasLabel('airport').count()
+--- oc routes
+MATCH ()-[r:route]->()
+RETURN count(r)
+----- sparql
+SELECT (COUNT(*) AS ?c) WHERE { ?s ?p ?o }'''
+        self.assertEqual([('airports', 'gremlin', "g.V().hasLabel('airport').count()"),
+                          ('routes', 'opencypher', 'MATCH ()-[r:route]->()\nRETURN count(r)'),
+                          ('query 3', 'sparql', 'SELECT (COUNT(*) AS ?c) WHERE { ?s ?p ?o }')],
+                         parse_parallel_queries(cell))
+
+    def test_default_language(self):
+        cell = '''MATCH (n) RETURN count(n)
+---
+--- nodes per label
+MATCH (n) RETURN labels(n), count(n)
+'''
+        self.assertEqual([('query 1', 'opencypher', 'MATCH (n) RETURN count(n)'),
+                          ('nodes per label', 'opencypher', 'MATCH (n) RETURN labels(n), count(n)')],
+                         parse_parallel_queries(cell, 'opencypher'))
+
+    def test_no_queries(self):
+        self.assertEqual([], parse_parallel_queries('\n--- gremlin airports\n\n'))
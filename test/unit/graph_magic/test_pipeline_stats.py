@@ -0,0 +1,66 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import tracemalloc
+import unittest
+
+from graph_notebook.magics.metadata import Metadata, Metric, PipelineStats
+
+
+class TestPipelineStats(unittest.TestCase):
+    def test_stages_are_timed(self):
+        stats = PipelineStats()
+        with stats.stage('receive') as stage:
+            stage['payload_bytes'] = 1024
+        with stats.stage('decode'):
+            pass
+
+        stages = stats.to_dict()
+        self.assertEqual(['receive', 'decode'], list(stages))
+        self.assertEqual(1024, stages['receive']['payload_bytes'])
+        self.assertIsNone(stages['decode']['payload_bytes'])
+        self.assertTrue(all(type(s['time_ms']) is float and s['peak_bytes'] is None for s in stages.values()))
+
+    def test_failed_stage_is_recorded(self):
+        stats = PipelineStats()
+        with self.assertRaises(ValueError):
+            with stats.stage('network'):
+                raise ValueError('not a graph')
+        self.assertEqual(['network'], list(stats.to_dict()))
+
+    def test_trace_memory(self):
+        stats = PipelineStats(trace_memory=True)
+        with stats.stage('decode'):
+            allocated = [str(i) for i in range(100000)]
+        del allocated
+
+        self.assertGreater(stats.to_dict()['decode']['peak_bytes'], 100000)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_trace_memory_while_tracing(self):
+        tracemalloc.start()
+        try:
+            stats = PipelineStats(trace_memory=True)
+            with stats.stage('decode'):
+                pass
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+        self.assertGreaterEqual(stats.to_dict()['decode']['peak_bytes'], 0)
+
+    def test_metadata_shows_stages_in_order(self):
+        metadata = Metadata()
+        metadata.insert_metric(Metric('request_time', 'Request execution time (ms)', 12.5))
+        self.assertNotIn('Stage', metadata.to_html())
+
+        metadata.stages = PipelineStats()
+        with metadata.stages.stage('table') as stage:
+            stage['payload_bytes'] = 2048
+        with metadata.stages.stage('receive'):
+            pass
+        html = metadata.to_html()
+        self.assertIn('Stage', html)
+        self.assertLess(html.index('receive'), html.index('table'))
+        self.assertIn('2048', html)
@@ -0,0 +1,89 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import os
+import tempfile
+import unittest
+
+from graph_notebook.magics.metadata import Metadata, Metric
+from graph_notebook.magics.profile_history import ProfileHistory, query_fingerprint, detect_regression, \
+    sparkline_points
+
+
+def build_metadata(request_time, index_ops=None):
+    metadata = Metadata()
+    metadata.bulk_insert_metrics([Metric('request_time', 'Request execution time (ms)', request_time),
+                                  Metric('query_total_index_ops', '[Query] # of statement index ops'),
+                                  Metric('results', '# of results', 1)])
+    if index_ops is not None:
+        metadata.set_metric_value('query_total_index_ops', index_ops)
+    return metadata
+
+
+class TestProfileHistory(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.history = ProfileHistory(os.path.join(self.dir.name, 'history.db'))
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_fingerprint_ignores_whitespace(self):
+        self.assertEqual(query_fingerprint('gremlin', 'g.V()\n  .count()'),
+                         query_fingerprint('gremlin', 'g.V() .count()'))
+        self.assertNotEqual(query_fingerprint('gremlin', 'g.V()'), query_fingerprint('sparql', 'g.V()'))
+
+    def test_record_and_read_runs(self):
+        fingerprint = self.history.record('gremlin', 'profile', 'g.V().count()', build_metadata(12.5, 3), timestamp=1)
+        self.history.record('gremlin', 'profile', 'g.V().count()', build_metadata(14.0), timestamp=2)
+
+        runs = self.history.runs(fingerprint=fingerprint)
+        self.assertEqual(2, len(runs))
+        self.assertEqual(12.5, runs[0]['wall_time'])
+        self.assertEqual(3, runs[0]['index_ops'])
+        self.assertIsNone(runs[1]['index_ops'])
+        self.assertIsNone(runs[0]['seri_time'])
+
+    def test_most_expensive_ranking(self):
+        self.history.record('gremlin', 'query', 'g.V()', build_metadata(5), timestamp=1)
+        self.history.record('sparql', 'query', 'SELECT * WHERE {?s ?p ?o}', build_metadata(50), timestamp=2)
+        self.history.record('sparql', 'query', 'SELECT * WHERE {?s ?p ?o}', build_metadata(70), timestamp=3)
+
+        ranking = self.history.most_expensive()
+        self.assertEqual(2, len(ranking))
+        self.assertEqual('sparql', ranking[0]['language'])
+        self.assertEqual(2, ranking[0]['runs'])
+        self.assertEqual(60, ranking[0]['mean_wall_time'])
+
+        gremlin_only = self.history.most_expensive(language='gremlin')
+        self.assertEqual(1, len(gremlin_only))
+
+    def test_modes_are_ranked_separately(self):
+        for i in range(4):
+            self.history.record('gremlin', 'query', 'g.V()', build_metadata(10), timestamp=2 * i)
+            self.history.record('gremlin', 'profile', 'g.V()', build_metadata(100), timestamp=2 * i + 1)
+
+        ranking = self.history.most_expensive()
+        self.assertEqual(['profile', 'query'], [r['mode'] for r in ranking])
+        self.assertEqual([4, 4], [r['runs'] for r in ranking])
+        self.assertEqual([None, None], [r['regression'] for r in ranking])
+        self.assertEqual(ranking[0]['fingerprint'], ranking[1]['fingerprint'])
+
+        query_only = self.history.most_expensive(mode='query')
+        self.assertEqual([10, 10, 10, 10], query_only[0]['wall_times'])
+
+    def test_clear(self):
+        self.history.record('gremlin', 'query', 'g.V()', build_metadata(5))
+        self.history.clear()
+        self.assertEqual([], self.history.runs())
+
+    def test_detect_regression(self):
+        self.assertIsNone(detect_regression([10]))
+        self.assertIsNone(detect_regression([10, 11, 10, 12]))
+        self.assertEqual(3, detect_regression([10, 10, 30]))
+
+    def test_sparkline_points(self):
+        self.assertEqual('', sparkline_points([]))
+        self.assertEqual('0.0,24.0 60.0,0.0 120.0,24.0', sparkline_points([1, 2, 1]))
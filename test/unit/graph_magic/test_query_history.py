@@ -0,0 +1,123 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from gremlin_python.structure.graph import Vertex, Edge
+from requests import Response
+
+from graph_notebook.magics.metadata import build_sparql_metadata_from_query
+from graph_notebook.magics.query_history import QueryHistory, SnapshotClient, CappedWriter, encode_result
+
+
+def build_response(content: bytes, status_code: int = 200) -> Response:
+    res = Response()
+    res._content = content
+    res.status_code = status_code
+    res.headers['Content-Type'] = 'application/sparql-results+json'
+    res.headers['Content-Encoding'] = 'gzip'
+    return res
+
+
+class TestQueryHistory(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'history.db')
+        self.history = QueryHistory(self.path)
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_http_result_round_trip(self):
+        content = b'{"head": {"vars": ["s"]}, "results": {"bindings": [{"s": {"type": "uri", "value": "a"}}]}}'
+        entry_id = self.history.record('sparql', 'query', '--expand-all', 'SELECT ?s WHERE {?s ?p ?o}',
+                                       'localhost:8182', build_response(content), query_time=42.0)
+
+        entry = self.history.get(entry_id)
+        self.assertEqual('--expand-all', entry['line'])
+        self.assertEqual('localhost:8182', entry['endpoint'])
+        res = entry['result']
+        self.assertEqual(content, res.content)
+        self.assertEqual(200, res.status_code)
+        self.assertEqual('application/sparql-results+json', res.headers['content-type'])
+        self.assertNotIn('Content-Encoding', res.headers)
+
+        metadata = build_sparql_metadata_from_query(query_type='query', res=res, results=res.json(), scd_query=True)
+        self.assertEqual(42.0, metadata.get_metric_value('request_time'))
+        self.assertEqual(1, metadata.get_metric_value('results'))
+
+    def test_gremlin_result_round_trip(self):
+        results = [Vertex('1', 'airport'), Edge('2', Vertex('1'), 'route', Vertex('3')), {'code': ['SEA']}]
+        entry_id = self.history.record('gremlin', 'query', '', 'g.V()', 'localhost:8182', results)
+        self.assertEqual(results, self.history.get(entry_id)['result'])
+        self.assertIsNone(self.history.get(entry_id + 1))
+
+    def test_identical_results_are_stored_once(self):
+        self.history.record('gremlin', 'query', '', 'g.V().count()', 'localhost:8182', [1], timestamp=1)
+        self.history.record('gremlin', 'query', '', 'g.E().count()', 'localhost:8182', [1], timestamp=2)
+        entries = self.history.entries()
+        self.assertEqual(['g.E().count()', 'g.V().count()'], [e['query'] for e in entries])
+        self.assertEqual(entries[0]['result_hash'], entries[1]['result_hash'])
+
+    def test_least_recently_used_entries_are_evicted(self):
+        history = QueryHistory(self.path, max_entries=2)
+        first = history.record('gremlin', 'query', '', 'g.V(1)', 'localhost:8182', [1], timestamp=1)
+        second = history.record('gremlin', 'query', '', 'g.V(2)', 'localhost:8182', [2], timestamp=2)
+        history.get(first)
+        history.record('gremlin', 'query', '', 'g.V(3)', 'localhost:8182', [3], timestamp=3)
+        self.assertIsNone(history.get(second))
+        self.assertEqual(['g.V(3)', 'g.V(1)'], [e['query'] for e in history.entries()])
+
+    def test_size_limits(self):
+        results = [str(i) for i in range(1000)]
+        history = QueryHistory(self.path, max_result_bytes=100)
+        self.assertIsNone(history.record('gremlin', 'query', '', 'g.V()', 'localhost:8182', results))
+
+        history = QueryHistory(self.path, max_bytes=3000)
+        history.record('gremlin', 'query', '', 'g.V()', 'localhost:8182', results, timestamp=1)
+        history.record('gremlin', 'query', '', 'g.V().id()', 'localhost:8182', results[::-1], timestamp=2)
+        self.assertEqual(['g.V().id()'], [e['query'] for e in history.entries()])
+
+    def test_oversized_results_stop_serializing_early(self):
+        writes = []
+
+        class RecordingWriter(CappedWriter):
+            def write(self, data) -> int:
+                writes.append(len(data))
+                return super().write(data)
+
+        with mock.patch('graph_notebook.magics.query_history.CappedWriter', RecordingWriter):
+            self.assertIsNone(encode_result([str(i) * 100 for i in range(100000)], max_bytes=200000))
+        self.assertLess(sum(writes), 400000)
+        self.assertIsNone(encode_result(build_response(b'x' * 101), max_bytes=100))
+        self.assertEqual(b'x' * 100, encode_result(build_response(b'x' * 100), max_bytes=100)[1])
+
+    def test_record_in_background(self):
+        future = self.history.record_in_background('gremlin', 'query', '', 'g.V()', 'localhost:8182', [1], 12.5)
+        self.assertEqual(['g.V()'], [e['query'] for e in self.history.entries()])
+        self.assertEqual([1], self.history.get(future.result())['result'])
+
+        # a result which cannot be pickled is only logged
+        failed = self.history.record_in_background('gremlin', 'query', '', 'g.V()', 'localhost:8182',
+                                                   [lambda: None])
+        self.assertIsNotNone(failed.exception())
+        self.assertEqual(1, len(self.history.entries()))
+
+    def test_entries_by_language(self):
+        self.history.record('gremlin', 'query', '', 'g.V()', 'localhost:8182', [1])
+        self.history.record('sparql', 'query', '', 'SELECT * {?s ?p ?o}', 'localhost:8182', build_response(b'{}'))
+        self.assertEqual(['sparql'], [e['language'] for e in self.history.entries(language='sparql')])
+        self.history.clear()
+        self.assertEqual([], self.history.entries())
+
+    def test_snapshot_client_only_replays(self):
+        client = SnapshotClient([1], 'localhost', 8182)
+        self.assertEqual([1], client.gremlin_query('g.V()', None))
+        self.assertEqual([1], client.opencypher_http('MATCH (n) RETURN n', parameters={}))
+        with self.assertRaises(RuntimeError):
+            client.status()
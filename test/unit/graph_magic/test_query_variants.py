@@ -0,0 +1,44 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import unittest
+
+from graph_notebook.magics.graph_magic import expand_query_variants
+
+
+class TestExpandQueryVariants(unittest.TestCase):
+    def test_single_query(self):
+        variants = expand_query_variants("g.V().count()\n")
+        self.assertEqual([('query', 'g.V().count()')], variants)
+
+    def test_split_variants(self):
+        cell = '''g.V().hasLabel('airport').count()
+        ---
+        g.V().has('airport', 'code', 'SEA')
+        .out().count()
+        ----
+        '''
+        variants = expand_query_variants(cell, split_variants=True)
+        self.assertEqual(2, len(variants))
+        self.assertEqual('variant 1', variants[0][0])
+        self.assertEqual("g.V().hasLabel('airport').count()", variants[0][1])
+        self.assertTrue(variants[1][1].endswith('.out().count()'))
+
+    def test_separator_is_ignored_without_split(self):
+        variants = expand_query_variants('g.V()\n---\ng.E()')
+        self.assertEqual(1, len(variants))
+
+    def test_parameter_grid(self):
+        grid = {'label': ['airport', 'country'], 'limit': [10, 100]}
+        variants = expand_query_variants("g.V().hasLabel('{{label}}').limit({{ limit }})", grid=grid)
+        self.assertEqual(4, len(variants))
+        self.assertEqual(('label=airport, limit=10', "g.V().hasLabel('airport').limit(10)"), variants[0])
+        self.assertEqual(('label=country, limit=100', "g.V().hasLabel('country').limit(100)"), variants[3])
+
+    def test_parameter_grid_with_variants_keeps_unknown_placeholders(self):
+        grid = {'limit': 5}
+        variants = expand_query_variants('g.V().limit({{limit}})\n---\ng.E().limit({{other}})', True, grid)
+        self.assertEqual([('variant 1: limit=5', 'g.V().limit(5)'),
+                          ('variant 2: limit=5', 'g.E().limit({{other}})')], variants)
@@ -0,0 +1,162 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import datetime
+import os
+import re
+import tempfile
+import threading
+import unittest
+from concurrent.futures import Future
+
+from graph_notebook.loader.gremlin_csv import CsvColumn, build_vertex_batch, build_edge_batch, iter_csv_batches, \
+    list_csv_files, load_gremlin_csv, LOAD_COMPLETED, LOAD_FAILED
+from graph_notebook.neptune.client import ClientBuilder
+
+VERTICES = '''~id,~label,name,age:Int,genre:String[],born:Date
+u1,user,Alice,34,drama;comedy,1990-01-02
+u2,user;admin,Bob,,,
+u3,user,Carol,not a number,,
+u4,user,Dan
+'''
+
+EDGES = '''~id,~from,~to,~label,score:Double
+e1,u1,u2,knows,0.5
+e2,u1,missing,knows,1
+'''
+
+
+class FakeGremlinConnection(object):
+    """
+    Adds vertices to a set, and counts the edges whose vertices are in it, like a graph would.
+    """
+
+    def __init__(self):
+        self.vertices = set()
+        self.traversals = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def submit(self, traversal, bindings):
+        with self.lock:
+            self.traversals.append((traversal, bindings))
+            failed = False
+            if '__.addV' in traversal:
+                ids = [v for k, v in bindings.items() if re.match(r'i\d+$', k)]
+                self.vertices.update(ids)
+                added = traversal.count('__.addV')
+            else:
+                rows = range(traversal.count('addE('))
+                # like the server, to() given no vertex fails the whole traversal
+                failed = '.to(__.V(' in traversal and any(bindings[f't{r}'] not in self.vertices for r in rows)
+                added = sum(1 for r in rows
+                            if bindings[f'f{r}'] in self.vertices and bindings[f't{r}'] in self.vertices)
+        future = Future()
+        if failed:
+            future.set_exception(ValueError('The provided traverser does not map to a value'))
+        else:
+            future.set_result([added])
+        return FakeResultSet(future)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeResultSet(object):
+    def __init__(self, future):
+        self.future = future
+
+    def all(self):
+        return self.future
+
+
+class TestGremlinCsv(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        # named so that the edges sort ahead of the vertices
+        self.edges_path = self.write('a_edges.csv', EDGES)
+        self.vertices_path = self.write('b_vertices.csv', VERTICES)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def build_client(self):
+        client = ClientBuilder().with_host('localhost').with_tls(False).build()
+        connection = FakeGremlinConnection()
+        client.get_gremlin_connection = lambda pool_size=None, endpoint=None: connection
+        return client, connection
+
+    def test_column_headers(self):
+        column = CsvColumn('genre:String[]')
+        self.assertEqual(('genre', 'string', True, None), (column.name, column.type, column.array, column.cardinality))
+        column = CsvColumn('age:Int(single)')
+        self.assertEqual(('age', 'int', False, 'single'), (column.name, column.type, column.array, column.cardinality))
+        self.assertEqual(('name', 'string'), (CsvColumn('name').name, CsvColumn('name').type))
+        self.assertTrue(CsvColumn('~ID').system)
+        self.assertEqual([True, False], CsvColumn('flags:Bool[]').convert('true;0'))
+        self.assertEqual(datetime.datetime(1990, 1, 2), CsvColumn('born:Date').convert('1990-01-02'))
+        with self.assertRaises(ValueError):
+            CsvColumn('age:Integer')
+
+    def test_vertex_batch(self):
+        columns = [CsvColumn(h) for h in ['~id', 'name', 'genre:String[]', 'age:Int(single)']]
+        traversal, bindings = build_vertex_batch(columns, [('user', 'u1', [(1, 'Alice'), (2, ['a', 'b']), (3, 34)]),
+                                                           ('user', None, [(1, 'Bob')])])
+        self.assertEqual("g.inject(1).union(__.addV(l0).property(T.id, i0).property(k1, p0_1)"
+                         ".property(set, k2, p0_2_0).property(set, k2, p0_2_1).property(single, k3, p0_3), "
+                         "__.addV(l1).property(k1, p1_1)).count()", traversal)
+        self.assertEqual({'l0': 'user', 'i0': 'u1', 'k1': 'name', 'p0_1': 'Alice', 'k2': 'genre', 'p0_2_0': 'a',
+                          'p0_2_1': 'b', 'k3': 'age', 'p0_3': 34, 'l1': 'user', 'p1_1': 'Bob'}, bindings)
+
+    def test_edge_batch(self):
+        columns = [CsvColumn(h) for h in ['~id', '~from', '~to', '~label', 'score:Double']]
+        traversal, bindings = build_edge_batch(columns, [('knows', 'e1', 'u1', 'u2', [(4, 0.5)])])
+        self.assertEqual("g.inject(1).union(__.V(t0).as('t').V(f0).addE(l0).to('t').property(T.id, i0)"
+                         ".property(k4, p0_4)).count()", traversal)
+        self.assertEqual({'l0': 'knows', 'f0': 'u1', 't0': 'u2', 'i0': 'e1', 'k4': 'score', 'p0_4': 0.5}, bindings)
+
+    def test_csv_batches_skip_bad_records(self):
+        errors = []
+        batches = list(iter_csv_batches(self.vertices_path, batch_size=1,
+                                        on_error=lambda kind, message: errors.append(kind)))
+        self.assertEqual(2, len(batches))
+        self.assertEqual('user::admin', batches[1][1]['l0'])
+        self.assertEqual(['datatypeMismatchErrors', 'parsingErrors'], errors)
+
+    def test_vertex_files_are_loaded_first(self):
+        self.assertEqual([self.vertices_path, self.edges_path], list_csv_files(self.directory.name))
+
+    def test_load_directory(self):
+        client, connection = self.build_client()
+        progress = []
+        status = load_gremlin_csv(client, self.directory.name, batch_size=1,
+                                  on_progress=lambda s: progress.append(s['totalRecords']))
+        self.assertEqual(LOAD_COMPLETED, status['status'])
+        self.assertEqual(3, status['totalRecords'])
+        self.assertEqual(1, status['insertErrors'])
+        self.assertEqual(1, status['parsingErrors'])
+        self.assertEqual(1, status['datatypeMismatchErrors'])
+        self.assertEqual([1, 2, 3, 3], progress)
+        self.assertTrue(connection.closed)
+
+    def test_dangling_to_vertex_only_skips_its_edge(self):
+        client, connection = self.build_client()
+        status = load_gremlin_csv(client, self.directory.name, batch_size=2)
+        # e1 is added in the same batch as e2, whose ~to vertex does not exist
+        self.assertEqual(3, status['totalRecords'])
+        self.assertEqual(1, status['insertErrors'])
+        self.assertEqual([], [e for e in status['errors'] if 'a_edges.csv' in e])
+
+    def test_fail_on_error_stops_the_load(self):
+        client, connection = self.build_client()
+        status = load_gremlin_csv(client, self.directory.name, batch_size=1, fail_on_error=True)
+        self.assertEqual(LOAD_FAILED, status['status'])
+        self.assertFalse(any('addE' in traversal for traversal, _ in connection.traversals))
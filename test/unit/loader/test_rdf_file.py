@@ -0,0 +1,173 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import gzip
+import io
+import os
+import tempfile
+import threading
+import unittest
+from urllib.parse import parse_qs
+
+import requests
+
+from graph_notebook.loader.rdf_file import iter_turtle_statements, iter_rdf_statements, iter_insert_batches, \
+    load_rdf_file, detect_rdf_format, PROLOGUE, TRIPLES
+from graph_notebook.neptune.client import ClientBuilder
+
+TURTLE = '''# airports
+@prefix ex: <http://example.com/#> .
+PREFIX so: <https://schema.org/>
+ex:SEA a so:Airport ; # the airport . of Seattle
+    so:name "Seattle. \\"Tacoma\\"" , 'Sea-Tac'@en ;
+    so:elevation 1.5e2 ; so:ratio .5 .
+<http://example.com/rel> so:description """multi
+line . "with" quotes""" .
+ex:AUS so:near [ so:name "x" ] ; so:list ( 1 2 3 ) .
+ex:a.b so:p ex:c.
+'''
+
+
+class UpdateSession(object):
+    """
+    Stands in for requests.Session, recording every update it receives and answering with the queued status codes,
+    then with 200s.
+    """
+
+    def __init__(self, status_codes: list = None):
+        self.status_codes = status_codes if status_codes is not None else []
+        self.updates = []
+        self.lock = threading.Lock()
+
+    def send(self, req, timeout=None):
+        with self.lock:
+            self.updates.append(parse_qs(req.body)['update'][0])
+            status_code = self.status_codes.pop(0) if self.status_codes else 200
+        res = requests.Response()
+        res.status_code = status_code
+        res._content = b'{}'
+        res.raw = io.BytesIO(b'{}')
+        return res
+
+    def close(self):
+        pass
+
+
+class TestRdfStatements(unittest.TestCase):
+    def test_turtle_statements(self):
+        statements = list(iter_turtle_statements(io.StringIO(TURTLE)))
+        self.assertEqual((PROLOGUE, 'ex', 'PREFIX ex: <http://example.com/#>'), statements[0])
+        self.assertEqual((PROLOGUE, 'so', 'PREFIX so: <https://schema.org/>'), statements[1])
+
+        triples = [s for kind, _, s in statements if kind == TRIPLES]
+        self.assertEqual(4, len(triples))
+        self.assertTrue(triples[0].startswith('ex:SEA a so:Airport ;'))
+        self.assertTrue(triples[0].endswith('so:ratio .5 .'))
+        self.assertEqual('<http://example.com/rel> so:description """multi\nline . "with" quotes""" .', triples[1])
+        self.assertEqual('ex:AUS so:near [ so:name "x" ] ; so:list ( 1 2 3 ) .', triples[2])
+        self.assertEqual('ex:a.b so:p ex:c.', triples[3])
+
+    def test_nquads_statements(self):
+        nquads = '<http://a> <http://b> "x y . z"@en <http://g> .\n' \
+                 '# a comment\n' \
+                 '<http://a> <http://b> <http://c> .\n'
+        statements = list(iter_rdf_statements(io.StringIO(nquads), 'nquads'))
+        self.assertEqual([(TRIPLES, '<http://g>', '<http://a> <http://b> "x y . z"@en .'),
+                          (TRIPLES, None, '<http://a> <http://b> <http://c> .')], statements)
+
+    def test_batches_are_closed_by_size_and_count(self):
+        lines = [f'<http://a> <http://b> "{i}" .\n' for i in range(10)]
+        batches = list(iter_insert_batches(iter_rdf_statements(lines, 'ntriples'), max_statements=4))
+        self.assertEqual([4, 4, 2], [len(b.statements) for b in batches])
+
+        batches = list(iter_insert_batches(iter_rdf_statements(lines, 'ntriples'), max_bytes=50))
+        self.assertEqual([2, 2, 2, 2, 2], [len(b.statements) for b in batches])
+
+    def test_redefined_prefix_closes_batch(self):
+        turtle = '@prefix ex: <http://one/> .\nex:a ex:b ex:c .\n@prefix ex: <http://two/> .\nex:d ex:e ex:f .\n'
+        batches = list(iter_insert_batches(iter_turtle_statements(io.StringIO(turtle))))
+        self.assertEqual(2, len(batches))
+        self.assertEqual('PREFIX ex: <http://one/>\nINSERT DATA {\nex:a ex:b ex:c .\n}', batches[0].update())
+        self.assertEqual('PREFIX ex: <http://two/>\nINSERT DATA {\nex:d ex:e ex:f .\n}', batches[1].update())
+
+    def test_named_graphs_are_grouped(self):
+        nquads = ['<http://a> <http://b> "1" <http://g> .\n', '<http://a> <http://b> "2" .\n',
+                  '<http://a> <http://b> "3" <http://g> .\n']
+        batch = next(iter_insert_batches(iter_rdf_statements(nquads, 'nquads')))
+        self.assertEqual('INSERT DATA {\nGRAPH <http://g> {\n<http://a> <http://b> "1" .\n'
+                         '<http://a> <http://b> "3" .\n}\n<http://a> <http://b> "2" .\n}', batch.update())
+
+    def test_detect_rdf_format(self):
+        self.assertEqual('turtle', detect_rdf_format('airports.ttl'))
+        self.assertEqual('ntriples', detect_rdf_format('airports.nt.gz'))
+        with self.assertRaises(ValueError):
+            detect_rdf_format('airports.csv')
+
+
+class TestLoadRdfFile(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.lines = [f'<http://example.com/{i}> <http://example.com/value> "{i}" .\n' for i in range(100)]
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        if name.endswith('.gz'):
+            with gzip.open(path, 'wt') as f:
+                f.write(content)
+        else:
+            with open(path, 'w') as f:
+                f.write(content)
+        return path
+
+    def build_client(self, status_codes: list = None):
+        client = ClientBuilder().with_host('localhost').with_tls(False).with_retries(0).build()
+        client._http_session = UpdateSession(status_codes)
+        return client
+
+    def test_load_gzipped_ntriples(self):
+        client = self.build_client()
+        path = self.write('data.nt.gz', ''.join(self.lines))
+        progress = []
+        stats = load_rdf_file(client, path, concurrency=3, batch_statements=10,
+                              on_progress=lambda s: progress.append(s['statements']))
+
+        self.assertEqual(100, stats['statements'])
+        self.assertEqual(10, stats['batches'])
+        self.assertEqual(0, stats['failed_batches'])
+        self.assertEqual(stats['total'], stats['offset'])
+        self.assertEqual(10, len(progress))
+        self.assertEqual(100, progress[-1])
+
+        sent = sorted(line for update in client._http_session.updates for line in update.split('\n')
+                      if line.startswith('<'))
+        self.assertEqual(sorted(line.strip() for line in self.lines), sent)
+
+    def test_failed_updates_are_retried(self):
+        client = self.build_client([500, 500])
+        path = self.write('data.nt', ''.join(self.lines[:5]))
+        stats = load_rdf_file(client, path, concurrency=1, max_retries=2, retry_backoff=0)
+        self.assertEqual(5, stats['statements'])
+        self.assertEqual(3, len(client._http_session.updates))
+
+    def test_rejected_updates_are_not_retried(self):
+        client = self.build_client([400])
+        path = self.write('data.nt', ''.join(self.lines[:5]))
+        stats = load_rdf_file(client, path, concurrency=1, max_retries=2, retry_backoff=0)
+        self.assertEqual(0, stats['statements'])
+        self.assertEqual(1, stats['failed_batches'])
+        self.assertEqual(5, stats['failed_statements'])
+        self.assertEqual(1, len(client._http_session.updates))
+        self.assertTrue(stats['errors'][0].startswith('400'))
+
+    def test_updates_too_large_are_split(self):
+        client = self.build_client([413])
+        path = self.write('data.nt', ''.join(self.lines[:4]))
+        stats = load_rdf_file(client, path, concurrency=1)
+        self.assertEqual(4, stats['statements'])
+        self.assertEqual(2, stats['batches'])
+        self.assertEqual(3, len(client._http_session.updates))
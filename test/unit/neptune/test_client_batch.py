@@ -0,0 +1,194 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import io
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from urllib.parse import parse_qs
+
+import requests
+
+from graph_notebook.neptune.client import ClientBuilder
+
+
+class EchoSession(object):
+    """
+    Stands in for requests.Session, answering every openCypher or SPARQL request with its own form fields.
+    Requests whose parameters contain "fail" are answered with a 500.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def send(self, req, timeout=None):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        form = {k: v[0] for k, v in parse_qs(req.body).items()}
+        time.sleep(0.02 if 'slow' in req.body else 0.001)
+        with self.lock:
+            self.in_flight -= 1
+
+        res = requests.Response()
+        res.status_code = 500 if 'fail' in req.body else 200
+        res._content = json.dumps(form).encode('utf-8')
+        res.raw = io.BytesIO(res._content)
+        return res
+
+    def close(self):
+        pass
+
+
+class FakeGremlinConnection(object):
+    def __init__(self):
+        self.closed = False
+
+    def submit(self, query, bindings=None):
+        if bindings is None:
+            bindings = {'vid': None}
+        if bindings['vid'] == 'missing':
+            raise ValueError('vertex not found')
+        future = Future()
+        future.set_result([{'query': query, 'vid': bindings['vid']}])
+        return FakeResultSet(future)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeResultSet(object):
+    def __init__(self, future):
+        self.future = future
+
+    def all(self):
+        return self.future
+
+
+class TestClientBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = ClientBuilder().with_host('localhost').with_tls(False).build()
+        self.session = EchoSession()
+        self.client._http_session = self.session
+
+    def test_opencypher_results_are_in_row_order_with_errors(self):
+        rows = [{'code': 'slow-1'}, {'code': 'fail'}, {'code': '3'}, {'code': 'slow-4'}, {'code': '5'}]
+        results = list(self.client.execute_batch('MATCH (a {code: $code}) RETURN a', rows, language='opencypher',
+                                                 concurrency=3))
+
+        self.assertEqual([0, 1, 2, 3, 4], [r['index'] for r in results])
+        self.assertIsNotNone(results[1]['error'])
+        self.assertIsNone(results[1]['result'])
+        for i in [0, 2, 3, 4]:
+            self.assertIsNone(results[i]['error'])
+            self.assertEqual(rows[i], json.loads(results[i]['result']['parameters']))
+            self.assertIsNotNone(results[i]['time'])
+        self.assertLessEqual(self.session.max_in_flight, 3)
+
+    def test_sparql_rows_are_bound_in_values_block(self):
+        rows = [{'s': '<http://example.com/a>', 'name': 'A "quoted" name', 'n': 3}]
+        results = list(self.client.execute_batch('SELECT ?s ?name WHERE { ?s ?p ?name }', rows, language='sparql'))
+
+        self.assertIsNone(results[0]['error'])
+        self.assertEqual('SELECT ?s ?name WHERE { VALUES (?s ?name ?n) { (<http://example.com/a> '
+                         '"A \\"quoted\\" name" 3) } ?s ?p ?name }', results[0]['result']['query'])
+
+    def test_sparql_template_without_where_is_a_row_error(self):
+        results = list(self.client.execute_batch('DESCRIBE ?s', [{'s': '<http://a>'}], language='sparql'))
+        self.assertIsInstance(results[0]['error'], ValueError)
+
+    def test_sparql_template_with_select_all_is_a_row_error(self):
+        results = list(self.client.execute_batch('SELECT * WHERE { ?s ?p ?o }', [{'s': '<http://a>'}],
+                                                 language='sparql'))
+        self.assertIsInstance(results[0]['error'], ValueError)
+
+    def test_gremlin_rows_are_sent_as_bindings_on_one_connection(self):
+        connection = FakeGremlinConnection()
+        pool_sizes = []
+
+        def get_gremlin_connection(pool_size=None, endpoint=None):
+            pool_sizes.append(pool_size)
+            return connection
+
+        self.client.get_gremlin_connection = get_gremlin_connection
+        rows = [{'vid': '1'}, {'vid': 'missing'}, {'vid': '2'}]
+        results = list(self.client.execute_batch('g.V(vid)', rows, concurrency=2))
+
+        self.assertEqual([2], pool_sizes)
+        self.assertEqual([{'query': 'g.V(vid)', 'vid': '1'}], results[0]['result'])
+        self.assertIsInstance(results[1]['error'], ValueError)
+        self.assertEqual([{'query': 'g.V(vid)', 'vid': '2'}], results[2]['result'])
+        self.assertTrue(connection.closed)
+
+    def test_endpoint_is_released_when_connection_fails(self):
+        def get_gremlin_connection(pool_size=None, endpoint=None):
+            raise ConnectionRefusedError('could not connect')
+
+        self.client.get_gremlin_connection = get_gremlin_connection
+        with self.assertRaises(ConnectionRefusedError):
+            list(self.client.execute_batch('g.V(vid)', [{'vid': '1'}]))
+        self.assertEqual(0, self.client.router.writer.outstanding)
+
+    def test_invalid_language(self):
+        with self.assertRaises(ValueError):
+            list(self.client.execute_batch('g.V()', [{}], language='sql'))
+
+
+class TestClientParallel(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = ClientBuilder().with_host('localhost').with_tls(False).build()
+        self.session = EchoSession()
+        self.client._http_session = self.session
+        self.connection = FakeGremlinConnection()
+        self.pool_sizes = []
+
+        def get_gremlin_connection(pool_size=None, endpoint=None):
+            self.pool_sizes.append(pool_size)
+            return self.connection
+
+        self.client.get_gremlin_connection = get_gremlin_connection
+
+    def test_queries_run_concurrently_and_finish_in_any_order(self):
+        queries = [('opencypher', 'MATCH (n) RETURN "slow" AS a'), ('opencypher', 'MATCH (n) RETURN "slow" AS b'),
+                   ('sparql', 'SELECT ?fail WHERE { ?s ?p ?o }'), ('gremlin', 'g.V().count()'),
+                   ('gremlin', 'g.E().count()')]
+        results = list(self.client.execute_parallel(queries, concurrency=4))
+
+        self.assertEqual([0, 1, 2, 3, 4], sorted(r['index'] for r in results))
+        by_index = {r['index']: r for r in results}
+        self.assertEqual(queries[0][1], by_index[0]['result']['query'])
+        self.assertIsInstance(by_index[2]['error'], requests.HTTPError)
+        self.assertEqual([{'query': 'g.E().count()', 'vid': None}], by_index[4]['result'])
+        self.assertEqual(['opencypher', 'opencypher', 'sparql', 'gremlin', 'gremlin'],
+                         [by_index[i]['language'] for i in range(5)])
+        for i in [0, 1, 3, 4]:
+            self.assertIsNone(by_index[i]['error'])
+            self.assertIsNotNone(by_index[i]['time'])
+        # the slow queries were in flight together, and finished after the fast ones
+        self.assertGreaterEqual(self.session.max_in_flight, 2)
+        self.assertEqual({0, 1}, {r['index'] for r in results[-2:]})
+        self.assertEqual([2], self.pool_sizes)
+        self.assertTrue(self.connection.closed)
+
+    def test_no_gremlin_connection_without_gremlin_queries(self):
+        list(self.client.execute_parallel([('opencypher', 'MATCH (n) RETURN n')]))
+        self.assertEqual([], self.pool_sizes)
+
+    def test_endpoint_is_released_when_connection_fails(self):
+        def get_gremlin_connection(pool_size=None, endpoint=None):
+            raise ConnectionRefusedError('could not connect')
+
+        self.client.get_gremlin_connection = get_gremlin_connection
+        with self.assertRaises(ConnectionRefusedError):
+            list(self.client.execute_parallel([('gremlin', 'g.V().count()')]))
+        self.assertEqual(0, self.client.router.writer.outstanding)
+
+    def test_invalid_language(self):
+        with self.assertRaises(ValueError):
+            list(self.client.execute_parallel([('gremlin', 'g.V()'), ('sql', 'SELECT 1')]))
@@ -0,0 +1,86 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import datetime
+import gzip
+import io
+import json
+import unittest
+
+import requests
+from urllib3 import HTTPResponse
+
+from graph_notebook.magics.metadata import build_sparql_metadata_from_query, build_opencypher_metadata_from_query
+from graph_notebook.neptune.client import ClientBuilder
+
+
+def build_gzip_response(payload: dict) -> requests.Response:
+    body = json.dumps(payload).encode('utf-8')
+    raw = HTTPResponse(body=io.BytesIO(gzip.compress(body)), headers={'content-encoding': 'gzip'},
+                       status=200, preload_content=False)
+    res = requests.Response()
+    res.status_code = 200
+    res.raw = raw
+    res.headers.update({'content-encoding': 'gzip'})
+    res.elapsed = datetime.timedelta(milliseconds=5)
+    return res
+
+
+class CapturingSession(object):
+    def __init__(self):
+        self.sent = []
+
+    def send(self, req, timeout=None):
+        self.sent.append(req)
+        return build_gzip_response({'results': []})
+
+    def close(self):
+        pass
+
+
+class TestClientCompression(unittest.TestCase):
+    def build_client(self, compression: bool = True):
+        client = ClientBuilder().with_host('localhost').with_tls(False).with_compression(compression).build()
+        client._http_session = CapturingSession()
+        return client
+
+    def test_query_endpoints_accept_compressed_responses(self):
+        client = self.build_client()
+        client.sparql_query('SELECT * WHERE { ?s ?p ?o }')
+        client.opencypher_http('MATCH (n) RETURN n')
+        client.gremlin_http_query('g.V()')
+        for req in client._http_session.sent:
+            self.assertEqual('gzip, deflate', req.headers['Accept-Encoding'])
+
+    def test_explicit_accept_encoding_is_kept(self):
+        client = self.build_client()
+        client.sparql_query('SELECT * WHERE { ?s ?p ?o }', headers={'accept-encoding': 'identity'})
+        self.assertEqual('identity', client._http_session.sent[0].headers['Accept-Encoding'])
+
+    def test_compression_can_be_disabled(self):
+        client = self.build_client(compression=False)
+        client.opencypher_http('MATCH (n) RETURN n')
+        self.assertNotIn('Accept-Encoding', client._http_session.sent[0].headers)
+
+    def test_metadata_reports_wire_and_decoded_sizes(self):
+        payload = {'head': {'vars': ['s']},
+                   'results': {'bindings': [{'s': {'type': 'uri', 'value': 'http://example.com/a'}}] * 200}}
+        res = build_gzip_response(payload)
+        results = res.json()
+        metadata = build_sparql_metadata_from_query(query_type='query', res=res, results=results, scd_query=True)
+
+        decoded = metadata.get_metric_value('decoded_size')
+        self.assertEqual(len(json.dumps(payload)), decoded)
+        self.assertLess(metadata.get_metric_value('wire_size'), decoded)
+
+    def test_opencypher_metadata_includes_transfer_sizes(self):
+        res = build_gzip_response({'results': [{'n': 1}, {'n': 2}]})
+        results = res.json()
+        metadata = build_opencypher_metadata_from_query(query_type='query', results=results, res=res, query_time=5)
+        self.assertEqual(2, metadata.get_metric_value('results'))
+        self.assertIsNotNone(metadata.get_metric_value('wire_size'))
+
+        no_res_metadata = build_opencypher_metadata_from_query(query_type='query', results=results, query_time=5)
+        self.assertNotIn('wire_size', no_res_metadata.metrics)
@@ -0,0 +1,94 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import io
+import unittest
+
+import requests
+
+from graph_notebook.neptune.client import ClientBuilder
+
+
+def build_response(status_code: int, headers: dict = None) -> requests.Response:
+    res = requests.Response()
+    res.status_code = status_code
+    res.headers.update(headers or {})
+    res._content = b'{}'
+    res.raw = io.BytesIO(b'{}')
+    return res
+
+
+class FakeSession(object):
+    """
+    Stands in for requests.Session, returning (or raising) the queued outcomes in order.
+    """
+
+    def __init__(self, outcomes: list):
+        self.outcomes = outcomes
+        self.sent = []
+
+    def send(self, req, timeout=None):
+        self.sent.append((req.method, timeout))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def close(self):
+        pass
+
+
+class TestClientRetries(unittest.TestCase):
+    def build_client(self, outcomes: list, max_retries: int = 3):
+        client = ClientBuilder().with_host('localhost').with_tls(False) \
+            .with_retries(max_retries, retry_backoff=0) \
+            .with_timeouts(connect_timeout=2, read_timeout=30).build()
+        client._http_session = FakeSession(outcomes)
+        return client
+
+    def test_builder_sets_pool_options(self):
+        client = ClientBuilder().with_host('localhost').with_pool_size(25).build()
+        self.assertEqual(25, client.pool_size)
+        client._ensure_http_session()
+        adapter = client._http_session.get_adapter('https://localhost:8182')
+        self.assertEqual(25, adapter._pool_maxsize)
+        client.close()
+
+    def test_throttled_post_is_retried(self):
+        client = self.build_client([build_response(429), build_response(503), build_response(200)])
+        res = client.opencypher_http('MATCH (n) RETURN n LIMIT 1')
+        self.assertEqual(200, res.status_code)
+        self.assertEqual(3, len(client._http_session.sent))
+        self.assertEqual(('POST', (2, 30)), client._http_session.sent[0])
+
+    def test_retries_are_bounded(self):
+        client = self.build_client([build_response(429), build_response(429)], max_retries=1)
+        res = client.status()
+        self.assertEqual(429, res.status_code)
+        self.assertEqual(2, len(client._http_session.sent))
+
+    def test_bad_gateway_only_retried_when_idempotent(self):
+        client = self.build_client([build_response(502), build_response(200)])
+        self.assertEqual(200, client.status().status_code)
+
+        client = self.build_client([build_response(502), build_response(200)])
+        self.assertEqual(502, client.opencypher_http('MATCH (n) RETURN n').status_code)
+
+    def test_dropped_connection_only_retried_when_idempotent(self):
+        client = self.build_client([requests.exceptions.ConnectionError(), build_response(200)])
+        self.assertEqual(200, client.load_status('abc').status_code)
+
+        client = self.build_client([requests.exceptions.ConnectionError(), build_response(200)])
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.opencypher_http('CREATE (n)')
+
+    def test_connect_timeout_is_retried_for_any_method(self):
+        client = self.build_client([requests.exceptions.ConnectTimeout(), build_response(200)])
+        self.assertEqual(200, client.opencypher_http('CREATE (n)').status_code)
+
+    def test_retry_after_header_is_respected(self):
+        client = self.build_client([])
+        self.assertEqual(1.5, client._retry_delay(0, '1.5'))
+        self.assertLessEqual(client._retry_delay(5), 0)
@@ -0,0 +1,151 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import io
+import unittest
+from urllib.parse import urlparse
+
+import requests
+
+from graph_notebook.neptune.client import ClientBuilder
+from graph_notebook.neptune.routing import Endpoint, EndpointRouter, is_read_only_gremlin, is_read_only_opencypher
+
+
+class RoutingSession(object):
+    """
+    Stands in for requests.Session, recording the host of every request and refusing connections to down hosts.
+    """
+
+    def __init__(self, down: list = None):
+        self.down = down if down is not None else []
+        self.hosts = []
+
+    def send(self, req, timeout=None):
+        host = urlparse(req.url).hostname
+        self.hosts.append(host)
+        if host in self.down:
+            raise requests.exceptions.ConnectionError(f'could not connect to {host}')
+        res = requests.Response()
+        res.status_code = 200
+        res._content = b'{}'
+        res.raw = io.BytesIO(b'{}')
+        return res
+
+    def close(self):
+        pass
+
+
+class TestQueryClassification(unittest.TestCase):
+    def test_gremlin(self):
+        self.assertTrue(is_read_only_gremlin("g.V().has('code', 'SEA').out('route').valueMap()"))
+        self.assertTrue(is_read_only_gremlin("g.V().properties('name')"))
+        self.assertFalse(is_read_only_gremlin("g.addV('airport').property('code', 'XYZ')"))
+        self.assertFalse(is_read_only_gremlin("g.V('1').drop()"))
+        self.assertFalse(is_read_only_gremlin("g.V('1').as('a').V('2').addE ('route').from('a')"))
+
+    def test_opencypher(self):
+        self.assertTrue(is_read_only_opencypher("MATCH (a:airport {code: 'SEA'}) RETURN a.settlement"))
+        self.assertFalse(is_read_only_opencypher("MATCH (a:airport) set a.visited = true"))
+        self.assertFalse(is_read_only_opencypher("MERGE (a:airport {code: 'XYZ'})"))
+        self.assertFalse(is_read_only_opencypher("MATCH (a) DETACH DELETE a"))
+        self.assertFalse(is_read_only_opencypher("CALL db.labels()"))
+
+
+class TestEndpointRouter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.writer = Endpoint('writer', 8182)
+        self.readers = [Endpoint('reader-1', 8182), Endpoint('reader-2', 8182)]
+
+    def test_mutations_go_to_writer(self):
+        router = EndpointRouter(self.writer, self.readers)
+        self.assertIs(self.writer, router.acquire(read_only=False))
+
+    def test_reads_go_to_least_outstanding_reader(self):
+        router = EndpointRouter(self.writer, self.readers)
+        first = router.acquire(read_only=True)
+        second = router.acquire(read_only=True)
+        self.assertNotEqual(first, second)
+
+        router.release(first)
+        self.assertIs(first, router.acquire(read_only=True))
+
+    def test_idle_readers_take_turns(self):
+        router = EndpointRouter(self.writer, self.readers)
+        hosts = []
+        for _ in range(4):
+            endpoint = router.acquire(read_only=True)
+            hosts.append(endpoint.host)
+            router.release(endpoint)
+        self.assertEqual(['reader-1', 'reader-2', 'reader-1', 'reader-2'], hosts)
+
+    def test_reads_fall_back_to_writer_without_healthy_readers(self):
+        router = EndpointRouter(self.writer, self.readers, health_check=lambda e: False)
+        for reader in self.readers:
+            router.mark_unhealthy(reader)
+        self.assertIs(self.writer, router.acquire(read_only=True))
+
+    def test_recovered_reader_is_probed_before_use(self):
+        probed = []
+
+        def health_check(endpoint):
+            probed.append(endpoint.host)
+            return True
+
+        router = EndpointRouter(self.writer, self.readers[:1], health_check=health_check, unhealthy_cooldown=0)
+        router.mark_unhealthy(self.readers[0])
+        self.assertIs(self.readers[0], router.acquire(read_only=True))
+        self.assertEqual(['reader-1'], probed)
+        self.assertTrue(self.readers[0].healthy)
+
+    def test_unhealthy_cooldown_doubles(self):
+        router = EndpointRouter(self.writer, self.readers, unhealthy_cooldown=5)
+        router.mark_unhealthy(self.readers[0])
+        first_retry = self.readers[0].retry_at
+        router.mark_unhealthy(self.readers[0])
+        self.assertAlmostEqual(5, self.readers[0].retry_at - first_retry, delta=1)
+
+
+class TestClientRouting(unittest.TestCase):
+    def build_client(self, down: list = None):
+        client = ClientBuilder().with_host('writer').with_tls(False).with_retries(0) \
+            .with_readers(['reader-1', 'reader-2:8183']).build()
+        client._http_session = RoutingSession(down)
+        return client
+
+    def test_readers_are_parsed(self):
+        client = self.build_client()
+        self.assertEqual([('reader-1', 8182), ('reader-2', 8183)], [(r.host, r.port) for r in client.readers])
+
+    def test_queries_are_routed_by_type(self):
+        client = self.build_client()
+        client.gremlin_http_query("g.V().count()")
+        client.gremlin_http_query("g.addV('airport')")
+        client.opencypher_http("MATCH (n) RETURN n LIMIT 1")
+        client.sparql("SELECT * WHERE { ?s ?p ?o }")
+        client.sparql("INSERT DATA { <http://a> <http://b> <http://c> }")
+        client.status()
+        self.assertEqual(['reader-1', 'writer', 'reader-2', 'reader-1', 'writer', 'writer'],
+                         client._http_session.hosts)
+
+    def test_read_fails_over_to_next_endpoint(self):
+        client = self.build_client(down=['reader-1'])
+        res = client.gremlin_http_query("g.V().count()")
+        self.assertEqual(200, res.status_code)
+        self.assertEqual(['reader-1', 'reader-2'], client._http_session.hosts)
+        self.assertFalse(client.readers[0].healthy)
+        self.assertEqual(0, client.readers[0].outstanding)
+
+    def test_mutation_is_not_failed_over(self):
+        client = self.build_client(down=['writer'])
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.gremlin_http_query("g.addV('airport')")
+        self.assertEqual(['writer'], client._http_session.hosts)
+
+    def test_without_readers_everything_goes_to_host(self):
+        client = ClientBuilder().with_host('writer').with_tls(False).build()
+        client._http_session = RoutingSession()
+        client.gremlin_http_query("g.V().count()")
+        client.opencypher_http("MATCH (n) RETURN n LIMIT 1")
+        self.assertEqual(['writer', 'writer'], client._http_session.hosts)
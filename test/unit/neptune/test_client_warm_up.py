@@ -0,0 +1,142 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import io
+import unittest
+from concurrent.futures import Future
+from urllib.parse import urlparse
+
+import requests
+
+from graph_notebook.neptune.client import ClientBuilder, DEFAULT_WARM_CONNECTION_MAX_AGE, WARM_UP_GREMLIN_QUERY
+
+
+class WarmUpSession(object):
+    """
+    Stands in for requests.Session, recording the host of every request and refusing connections to down hosts.
+    """
+
+    def __init__(self, down: list = None):
+        self.down = down if down is not None else []
+        self.hosts = []
+
+    def send(self, req, timeout=None):
+        host = urlparse(req.url).hostname
+        self.hosts.append(host)
+        if host in self.down:
+            raise requests.exceptions.ConnectionError(f'could not connect to {host}')
+        res = requests.Response()
+        res.status_code = 200
+        res._content = b'{}'
+        res.raw = io.BytesIO(b'{}')
+        return res
+
+    def close(self):
+        pass
+
+
+class FakeGremlinConnection(object):
+    """
+    Stands in for the gremlin_python client, answering every query with its own name.
+    """
+
+    def __init__(self, name: str, fail: bool = False):
+        self.name = name
+        self.fail = fail
+        self.queries = []
+        self.closed = False
+
+    def submit(self, query, bindings=None):
+        self.queries.append(query)
+        if self.fail:
+            raise ConnectionRefusedError('could not connect')
+        return self
+
+    def all(self):
+        future = Future()
+        future.set_result([self.name])
+        return future
+
+    def close(self):
+        self.closed = True
+
+
+class TestClientWarmUp(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = ClientBuilder().with_host('writer').with_readers(['reader-1', 'reader-2']).build()
+        self.session = WarmUpSession()
+        self.client._http_session = self.session
+        self.connections = []
+        self.client._open_gremlin_connection = self.open_gremlin_connection
+
+    def open_gremlin_connection(self, pool_size, endpoint):
+        connection = FakeGremlinConnection(f'connection-{len(self.connections)}')
+        self.connections.append(connection)
+        return connection
+
+    def test_warm_up_opens_every_connection(self):
+        steps = self.client.warm_up()
+        self.assertEqual(['gremlin', 'http reader-1:8182', 'http reader-2:8182', 'http writer:8182'], sorted(steps))
+        self.assertTrue(all(type(t) is float for t in steps.values()))
+        self.assertEqual(['reader-1', 'reader-2', 'writer'], sorted(self.session.hosts))
+        self.assertEqual([WARM_UP_GREMLIN_QUERY], self.connections[0].queries)
+
+    def test_next_query_uses_warm_connection(self):
+        self.client.warm_up()
+        self.assertEqual(['connection-0'], self.client.gremlin_query("g.addV('airport')"))
+        self.assertTrue(self.connections[0].closed)
+        # the warm connection is only handed out once
+        self.assertEqual(['connection-1'], self.client.gremlin_query("g.addV('airport')"))
+
+    def test_failed_steps_are_reported(self):
+        self.session.down = ['reader-1']
+        self.client._open_gremlin_connection = lambda pool_size, endpoint: FakeGremlinConnection('x', fail=True)
+        steps = self.client.warm_up()
+        self.assertIsInstance(steps['http reader-1:8182'], requests.exceptions.ConnectionError)
+        self.assertIsInstance(steps['gremlin'], ConnectionRefusedError)
+        self.assertEqual({}, self.client._warm_gremlin_connections)
+
+    def test_stale_connection_is_discarded(self):
+        self.client.warm_up()
+        connection, opened_at = self.client._warm_gremlin_connections[('writer', 8182)]
+        self.client._warm_gremlin_connections[('writer', 8182)] = \
+            (connection, opened_at - DEFAULT_WARM_CONNECTION_MAX_AGE - 1)
+        self.assertIsNone(self.client._take_warm_gremlin_connection(self.client.router.writer))
+        self.assertTrue(connection.closed)
+
+    def test_close_closes_warm_connection(self):
+        self.client.warm_up(gremlin=True)
+        self.client.close()
+        self.assertTrue(self.connections[0].closed)
+        self.assertEqual({}, self.client._warm_gremlin_connections)
+
+    def test_connection_opened_after_close_is_closed(self):
+        def open_and_close_client(pool_size, endpoint):
+            connection = self.open_gremlin_connection(pool_size, endpoint)
+            # the client is replaced while the warm up is still connecting
+            self.client.close()
+            return connection
+
+        self.client._open_gremlin_connection = open_and_close_client
+        self.client.warm_up()
+        self.assertTrue(self.connections[0].closed)
+        self.assertEqual({}, self.client._warm_gremlin_connections)
+
+    def test_warm_up_after_close_opens_nothing(self):
+        self.client.close()
+        self.assertEqual({}, self.client.warm_up())
+        self.assertIsNone(self.client._http_session)
+        self.assertEqual([], self.connections)
+
+    def test_credentials_are_resolved(self):
+        from botocore.session import get_session
+
+        session = get_session()
+        session.set_credentials('access-key', 'secret-key')
+        self.client.set_session(session)
+        steps = self.client.warm_up(gremlin=False)
+        self.assertEqual(['credentials', 'http reader-1:8182', 'http reader-2:8182', 'http writer:8182'],
+                         sorted(steps))
+        self.assertTrue(all(type(t) is float for t in steps.values()))
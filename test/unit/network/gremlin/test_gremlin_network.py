@@ -2096,6 +2096,34 @@ class TestGremlinNetwork(unittest.TestCase):
         self.assertEqual(inv_data['properties'], in_vertex_expected)
         self.assertEqual(edge_data_value, edge_value_expected)
 
+    def test_add_vertex_with_groupby_and_node_property_json(self):
+        vertex = {
+            T.id: '1234',
+            T.label: 'airport',
+            'code': 'SEA',
+            'region': 'US-WA'
+        }
+
+        # the rules of the vertex label apply, whichever of the properties comes first
+        gn = GremlinNetwork(group_by_property='{"airport":"region"}', display_property='{"airport":"code"}')
+        gn.add_vertex(vertex)
+        node = gn.graph.nodes.get(vertex[T.id])
+        self.assertEqual(node['group'], 'US-WA')
+        self.assertEqual(node['label'], 'SEA')
+
+    def test_add_results_element_maps_and_value_maps_of_same_shape(self):
+        element_map = {T.id: '1', T.label: 'airport', 'code': 'SEA'}
+        value_map = {T.id: '2', T.label: 'airport', 'code': ['ATL']}
+        edge_map = {T.id: '3', T.label: 'route', Direction.OUT: {T.id: '1', T.label: 'airport'},
+                    Direction.IN: {T.id: '4', T.label: 'airport'}, 'dist': 100}
+
+        gn = GremlinNetwork(display_property='code', edge_display_property='dist')
+        gn.add_results([Path([], [element_map, edge_map, {T.id: '4', T.label: 'airport', 'code': 'BOS'}]),
+                        Path([], [value_map, {T.id: '5', T.label: 'airport', 'code': ['DFW']}])])
+        self.assertEqual(['SEA', 'BOS', 'ATL', 'DFW'], [gn.graph.nodes.get(n)['label'] for n in ['1', '4', '2', '5']])
+        self.assertEqual('100', gn.graph.get_edge_data('1', '4')['3']['label'])
+        self.assertIsNotNone(gn.graph.get_edge_data('2', '5'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,79 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import unittest
+from unittest.mock import patch
+
+from networkx import MultiDiGraph
+
+from graph_notebook.network import analysis
+
+
+def two_triangles() -> MultiDiGraph:
+    """
+    Two triangles of airports joined by a single route from SEA to JFK, with two routes from SEA to LAX.
+    """
+    graph = MultiDiGraph()
+    for u, v in [('SEA', 'LAX'), ('SEA', 'LAX'), ('LAX', 'SFO'), ('SFO', 'SEA'), ('SEA', 'JFK'), ('JFK', 'BOS'),
+                 ('BOS', 'ORD'), ('ORD', 'JFK')]:
+        graph.add_edge(u, v)
+    graph.add_node('ANC')
+    return graph
+
+
+class TestAnalysis(unittest.TestCase):
+    def test_pagerank(self):
+        graph = two_triangles()
+        ranks = analysis.pagerank(graph)
+        self.assertAlmostEqual(1.0, sum(ranks.values()))
+        self.assertEqual(set(graph.nodes), set(ranks))
+        self.assertLess(ranks['ANC'], ranks['SEA'])
+        with patch.object(analysis, '_scipy_sparse', return_value=None):
+            python_ranks = analysis.pagerank(graph)
+        for node in graph.nodes:
+            self.assertAlmostEqual(ranks[node], python_ranks[node], places=6)
+
+    def test_degree_centrality(self):
+        degrees = analysis.degree_centrality(two_triangles())
+        self.assertAlmostEqual(4 / 6, degrees['SEA'])
+        self.assertEqual(0, degrees['ANC'])
+
+    def test_betweenness_centrality(self):
+        betweenness = analysis.betweenness_centrality(two_triangles())
+        self.assertEqual('SEA', max(betweenness, key=betweenness.get))
+
+    def test_connected_components(self):
+        graph = two_triangles()
+        graph.remove_edge('SEA', 'JFK')
+        components = analysis.connected_components(graph)
+        self.assertEqual({0, 1, 2}, set(components.values()))
+        self.assertEqual(components['SEA'], components['SFO'])
+        self.assertEqual(components['JFK'], components['ORD'])
+        self.assertEqual(2, components['ANC'])
+        with patch.object(analysis, '_scipy_sparse', return_value=None):
+            python_components = analysis.connected_components(graph)
+        self.assertEqual(components.keys(), python_components.keys())
+        self.assertEqual(2, python_components['ANC'])
+        self.assertEqual(python_components['SEA'], python_components['SFO'])
+
+    def test_communities(self):
+        communities = analysis.communities(two_triangles(), seed=1)
+        self.assertEqual(communities['SEA'], communities['SFO'])
+        self.assertEqual(communities['JFK'], communities['ORD'])
+        self.assertNotEqual(communities['SEA'], communities['JFK'])
+
+    def test_shortest_path(self):
+        graph = two_triangles()
+        for scipy in [True, False]:
+            with patch.object(analysis, '_scipy_sparse', wraps=analysis._scipy_sparse if scipy else lambda: None):
+                self.assertEqual(['LAX', 'SFO', 'SEA', 'JFK', 'BOS'], analysis.shortest_path(graph, 'LAX', 'BOS'))
+                self.assertEqual([], analysis.shortest_path(graph, 'BOS', 'LAX'))
+                self.assertEqual(['BOS', 'JFK', 'SEA', 'LAX'],
+                                 analysis.shortest_path(graph, 'BOS', 'LAX', directed=False))
+                self.assertEqual([], analysis.shortest_path(graph, 'SEA', 'ANC'))
+
+    def test_shortest_path_unknown_node(self):
+        with self.assertRaises(ValueError):
+            analysis.shortest_path(two_triangles(), 'SEA', 'XXX')
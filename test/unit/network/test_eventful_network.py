@@ -6,7 +6,7 @@ SPDX-License-Identifier: Apache-2.0
 from unittest import TestCase
 
 from graph_notebook.network.EventfulNetwork import EventfulNetwork, EVENT_ADD_NODE, EVENT_ADD_NODE_PROPERTY, \
-    EVENT_ADD_EDGE, EVENT_ADD_EDGE_DATA, EVENT_ADD_NODE_DATA
+    EVENT_ADD_EDGE, EVENT_ADD_EDGE_DATA, EVENT_ADD_NODE_DATA, EVENT_UPDATE_NODES, format_label, truncate_label
 
 
 class TestEventfulNetwork(TestCase):
@@ -133,3 +133,33 @@ class TestEventfulNetwork(TestCase):
         en.add_edge_data(from_id, to_id, edge_id, attr)
 
         self.assertTrue(callback_reached[EVENT_ADD_EDGE_DATA])
+
+    def test_format_label(self):
+        self.assertEqual(('SEA', 'SEA'), format_label(['SEA'], 10))
+        self.assertEqual(("['SEA', 'LAX']", "['SEA',..."), format_label(['SEA', 'LAX'], 10))
+        self.assertEqual(('Seattle-Tacoma', 'Seattle...'), format_label('Seattle-Tacoma', 10))
+        self.assertEqual(('Seattle-Tacoma', 'Seattle-Tacoma'), format_label('Seattle-Tacoma', 14))
+        self.assertEqual(("{'code': 'SEA'}", "{'code'..."), format_label({'code': 'SEA'}, 10))
+        self.assertEqual('Seattle...', truncate_label('Seattle-Tacoma', 10))
+        self.assertEqual('Seattle', truncate_label('Seattle', 10))
+
+    def test_format_label_keeps_types_apart(self):
+        self.assertEqual(('1', '1'), format_label(1, 10))
+        self.assertEqual(('1.0', '1.0'), format_label(1.0, 10))
+        self.assertEqual(('True', 'True'), format_label(True, 10))
+        self.assertEqual(('1', '1'), format_label([1], 10))
+        self.assertEqual(('True', 'True'), format_label([True], 10))
+        self.assertEqual(('[1, 2]', '[1, 2]'), format_label([1, 2], 10))
+        self.assertEqual(('[True, 2]', '[True, 2]'), format_label([True, 2], 10))
+
+    def test_update_nodes_dispatches_once(self):
+        events = []
+        en = EventfulNetwork(callbacks={EVENT_UPDATE_NODES: [lambda network, name, data: events.append(data)]})
+        en.add_node('1', {'group': 'airport'})
+        en.add_node('2', {'group': 'airport'})
+        en.update_nodes({'1': {'group': '0', 'value': 0.75}, '2': {'group': '1'}, '3': {'group': '1'}})
+        expected = {'nodes': [{'node_id': '1', 'data': {'group': '0', 'value': 0.75}},
+                              {'node_id': '2', 'data': {'group': '1'}}]}
+        self.assertEqual([expected], events)
+        self.assertEqual({'group': '0', 'value': 0.75}, en.graph.nodes['1'])
+        self.assertNotIn('3', en.graph.nodes)
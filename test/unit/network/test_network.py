@@ -87,6 +87,38 @@ class TestNetwork(unittest.TestCase):
         loaded_network = network_from_json(js)
         self.assertEqual(network.to_json(), loaded_network.to_json())
 
+    def test_to_edge_list_arrays(self):
+        network = get_seed_network()
+        network.add_node('3')
+        network.add_edge('3', '1', '3_to_1', 'lorem', {'properties': {'weight': 2}})
+        network.add_edge('1', '2', '1_to_2_again', 'dolor', {'weight': 0.5})
+        self.assertEqual(['1', '2', '3'], network.node_ids())
+
+        columns = network.to_edge_list_arrays(['weight'])
+        self.assertEqual([0, 0, 1, 2], columns['source'].tolist())
+        self.assertEqual([1, 1, 0, 0], columns['target'].tolist())
+        self.assertEqual(['1_to_2', '1_to_2_again', '2_to_1', '3_to_1'], columns['key'])
+        self.assertEqual(['lorem', 'dolor', 'ipsum', 'lorem'], columns['label'])
+        self.assertEqual([None, 0.5, None, 2], columns['weight'])
+
+    def test_to_scipy_sparse(self):
+        network = get_seed_network()
+        network.add_node('3')
+        network.add_edge('1', '2', '1_to_2_again', 'dolor', {'properties': {'weight': 3}})
+        self.assertEqual([[0, 2, 0], [1, 0, 0], [0, 0, 0]], network.to_scipy_sparse().toarray().tolist())
+        self.assertEqual([[0, 3, 0], [0, 0, 0], [0, 0, 0]],
+                         network.to_scipy_sparse(weight='weight').toarray().tolist())
+
+    def test_to_pandas_edgelist(self):
+        network = get_seed_network()
+        network.add_edge('1', '2', '1_to_2_again', 'dolor', {'properties': {'weight': 3}})
+        df = network.to_pandas_edgelist(['weight'])
+        self.assertEqual(['source', 'target', 'source_index', 'target_index', 'key', 'label', 'weight'],
+                         list(df.columns))
+        self.assertEqual(['1', '1', '2'], df['source'].tolist())
+        self.assertEqual([1, 1, 0], df['target_index'].tolist())
+        self.assertEqual(['1_to_2', '1_to_2_again', '2_to_1'], df['key'].tolist())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,72 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from unittest import TestCase
+
+from graph_notebook.network.EventfulNetwork import EventfulNetwork, EVENT_UPDATE_VISIBILITY
+
+
+class TestNetworkFilters(TestCase):
+    def setUp(self) -> None:
+        self.network = EventfulNetwork()
+        self.network.add_node('SEA', {'label': 'SEA', 'properties': {'country': 'US', 'runways': 3}})
+        self.network.add_node('AUS', {'label': 'AUS', 'properties': {'country': 'US', 'runways': 2}})
+        self.network.add_node('YVR', {'label': 'YVR', 'properties': {'country': 'CA', 'runways': 'three'}})
+        self.network.add_node('LHR', {'label': 'LHR', 'properties': {'country': ['UK', 'GB'], 'runways': 2}})
+        self.network.add_edge('SEA', 'AUS', 'r1', 'route')
+        self.network.add_edge('SEA', 'YVR', 'r2', 'route')
+        self.network.add_edge('YVR', 'CA', 'c1', 'contains')
+
+        self.events = []
+        self.network.register_callback(EVENT_UPDATE_VISIBILITY, lambda n, e, d: self.events.append(d))
+
+    def test_find_nodes_by_value(self):
+        self.assertEqual({'SEA', 'AUS'}, self.network.find_nodes('properties.country', 'US'))
+        self.assertEqual({'LHR'}, self.network.find_nodes('properties.country', 'GB'))
+        self.assertEqual(set(), self.network.find_nodes('properties.country', 'FR'))
+
+    def test_find_nodes_by_predicate_skips_incomparable_values(self):
+        self.assertEqual({'SEA'}, self.network.find_nodes('properties.runways', predicate=lambda r: r > 2))
+
+    def test_find_nodes_with_field(self):
+        self.assertEqual({'SEA', 'AUS', 'YVR', 'LHR'}, self.network.find_nodes('properties.runways'))
+
+    def test_find_edges(self):
+        self.assertEqual({('SEA', 'AUS', 'r1'), ('SEA', 'YVR', 'r2')}, self.network.find_edges('label', 'route'))
+
+    def test_index_is_refreshed_after_changes(self):
+        self.assertEqual({'SEA', 'AUS'}, self.network.find_nodes('properties.country', 'US'))
+        self.network.add_node_property('YVR', 'country', 'US')
+        self.assertEqual({'SEA', 'AUS', 'YVR'}, self.network.find_nodes('properties.country', 'US'))
+
+    def test_filter_nodes_sends_only_changes(self):
+        self.network.filter_nodes('properties.country', 'US')
+        self.assertCountEqual(['YVR', 'LHR', 'CA'], self.events[-1]['hide_nodes'])
+        self.assertEqual([], self.events[-1]['show_nodes'])
+
+        self.network.filter_nodes('properties.country', predicate=lambda c: c in ['US', 'CA'])
+        self.assertEqual([], self.events[-1]['hide_nodes'])
+        self.assertEqual(['YVR'], self.events[-1]['show_nodes'])
+
+        event_count = len(self.events)
+        self.network.filter_nodes('properties.country', predicate=lambda c: c in ['US', 'CA'])
+        self.assertEqual(event_count, len(self.events))
+
+    def test_hide_edges_and_show_all(self):
+        self.network.hide_edges('label', 'route')
+        self.assertCountEqual(['SEA:AUS:r1', 'SEA:YVR:r2'], self.events[-1]['hide_edges'])
+
+        self.network.show_all()
+        self.assertCountEqual(['SEA:AUS:r1', 'SEA:YVR:r2'], self.events[-1]['show_edges'])
+        self.assertEqual(set(), self.network.hidden_edges)
+
+    def test_to_json_marks_hidden_elements(self):
+        self.network.hide_nodes('label', 'SEA')
+        self.network.hide_edges('label', 'contains')
+        graph = self.network.to_json()['graph']
+        hidden_nodes = [n['id'] for n in graph['nodes'] if n.get('hidden')]
+        hidden_links = [link['key'] for link in graph['links'] if link.get('hidden')]
+        self.assertEqual(['SEA'], hidden_nodes)
+        self.assertEqual(['c1'], hidden_links)
@@ -0,0 +1,117 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import os
+import tempfile
+import unittest
+import uuid
+from os.path import join as pjoin
+
+from gremlin_python.driver.request import RequestMessage
+from gremlin_python.driver.serializer import GraphSONSerializersV3d0
+
+from graph_notebook.seed.bundle import BUNDLES_DIR, GREMLIN_MAX_CONTENT_LENGTH, QUERIES_DIR, build_bundles, hash_queries, list_query_files, \
+    plan_batches, read_bundle, read_bundle_batches, read_manifest, read_query_files, get_statements, \
+    assemble_batches
+from graph_notebook.seed.load_query import get_batches, get_queries
+
+
+def request_size(script: str) -> int:
+    message = RequestMessage(processor='', op='eval', args={'gremlin': script, 'aliases': {'g': 'g'}})
+    return len(GraphSONSerializersV3d0().serialize_message(str(uuid.uuid4()), message))
+
+
+class TestSeedBundles(unittest.TestCase):
+    def test_bundles_are_up_to_date(self):
+        # run `python -m graph_notebook.seed.bundle` after changing a data set to rebuild its bundle.
+        datasets = read_manifest()['datasets']
+        for model in ['propertygraph', 'rdf']:
+            model_dir = pjoin(QUERIES_DIR, model)
+            for name in os.listdir(model_dir):
+                if name == '__pycache__' or not os.path.isdir(pjoin(model_dir, name)) \
+                        or not list_query_files(pjoin(model_dir, name)):
+                    continue
+                self.assertIn(name, datasets[model])
+                queries = read_query_files(pjoin(model_dir, name))
+                self.assertEqual(hash_queries(queries), datasets[model][name]['sha256'], f'{model}/{name}')
+
+    def test_bundled_queries_match_directory(self):
+        queries = get_queries('gremlin', 'epl')
+        self.assertEqual(read_query_files(pjoin(QUERIES_DIR, 'propertygraph', 'epl')), queries)
+
+        queries[0]['content'] = ''
+        self.assertNotEqual('', get_queries('gremlin', 'epl')[0]['content'])
+
+    def test_bundles_are_cached(self):
+        entry = read_manifest()['datasets']['rdf']['epl']
+        path = pjoin(BUNDLES_DIR, entry['bundle'])
+        self.assertIs(read_bundle(path), read_bundle(path))
+        self.assertIs(read_bundle_batches(path), read_bundle_batches(path))
+
+    def test_gremlin_batches(self):
+        queries = get_queries('gremlin', 'airports')
+        batches = get_batches('gremlin', 'airports')
+        lines = sum(len(get_statements('propertygraph', q['content'])) for q in queries)
+        self.assertLess(len(batches), lines)
+
+        statements = [s for b in batches for s in b['content'].split(';\n')]
+        self.assertEqual(lines, len(statements))
+        self.assertTrue(all(s.endswith('.iterate()') for s in statements))
+        self.assertEqual('0_nodes.txt', batches[0]['name'])
+        self.assertEqual('2_edges_part_2.txt', batches[-1]['name'])
+
+    def test_plan_batches(self):
+        files = [['a' * 10, 'b' * 10, 'c' * 30], ['d' * 10, 'e' * 10]]
+        # each statement is measured with .iterate() and the JSON-encoded separator, 23 bytes for 'a' * 10
+        self.assertEqual([[[0, 0, 2]], [[0, 2, 3]], [[1, 0, 2]]], plan_batches('propertygraph', files, 50))
+        self.assertEqual([[[0, 0, 2]], [[0, 2, 3]], [[1, 0, 2]]], plan_batches('rdf', files, 30))
+        self.assertEqual([[[0, 0, 3], [1, 0, 2]]], plan_batches('propertygraph', files, 1000))
+
+        batches = assemble_batches('propertygraph', ['x', 'y'], [['g.V().next()', 'g.addV()']],
+                                   [[[0, 0, 2]]])
+        self.assertEqual([{'name': 'x', 'content': 'g.V().next();\ng.addV().iterate()'}], batches)
+
+    def test_gremlin_batches_fit_in_a_request(self):
+        for name in read_manifest()['datasets']['propertygraph']:
+            for batch in get_batches('gremlin', name):
+                self.assertLessEqual(request_size(batch['content']), GREMLIN_MAX_CONTENT_LENGTH,
+                                     f'{name}: {batch["name"]}')
+
+    def test_gremlin_batches_are_measured_as_sent(self):
+        # quotes, newlines and non-ascii characters all grow when the script is JSON-encoded
+        files = [["g.addV('\u00e9').property('name', \"a\\nb\")"] * 1000]
+        batches = assemble_batches('propertygraph', ['x'], files, plan_batches('propertygraph', files, 4096))
+        envelope = request_size('')
+        self.assertTrue(all(request_size(b['content']) - envelope <= 4096 for b in batches))
+
+    def test_sparql_batches_join_updates(self):
+        files = [get_statements('rdf', '%%sparql\nINSERT DATA { <a> <b> <c> }\n'),
+                 get_statements('rdf', 'PREFIX ex: <http://ex/>\nINSERT DATA { ex:a ex:b ex:c } ;\n')]
+        batches = assemble_batches('rdf', ['x', 'y'], files, plan_batches('rdf', files, 1000))
+        self.assertEqual([{'name': 'x, y', 'content': 'INSERT DATA { <a> <b> <c> } ;\n'
+                                                      'PREFIX ex: <http://ex/>\nINSERT DATA { ex:a ex:b ex:c }'}],
+                         batches)
+
+    def test_build_bundles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            queries_dir = pjoin(directory, 'queries')
+            os.makedirs(pjoin(queries_dir, 'propertygraph', 'small'))
+            os.makedirs(pjoin(queries_dir, 'propertygraph', 'empty'))
+            with open(pjoin(queries_dir, 'propertygraph', 'small', '0_data.txt'), 'w') as f:
+                f.write('g.addV("a")\ng.addV("b")\n')
+
+            bundles_dir = pjoin(directory, 'bundles')
+            manifest = build_bundles(queries_dir, bundles_dir, gremlin_batch_bytes=16)
+            self.assertEqual(['small'], list(manifest['datasets']['propertygraph']))
+            self.assertEqual(2, manifest['datasets']['propertygraph']['small']['batches'])
+
+            path = pjoin(bundles_dir, manifest['datasets']['propertygraph']['small']['bundle'])
+            with open(path, 'rb') as f:
+                first = f.read()
+            build_bundles(queries_dir, bundles_dir, gremlin_batch_bytes=16)
+            with open(path, 'rb') as f:
+                self.assertEqual(first, f.read())
+            self.assertEqual(['g.addV("a").iterate()', 'g.addV("b").iterate()'],
+                             [b['content'] for b in read_bundle_batches(path)])
@@ -14,6 +14,31 @@ class TestSparql(unittest.TestCase):
             {
                 'query': 'SELECT * WHERE { ?s ?p ?o }',
                 'expected': 'SELECT'
+            },
+            {
+                'query': '# find cities\nPREFIX so: <https://schema.org/#>\nBASE <http://example.com/>\n'
+                         'construct { ?s so:name ?n } where { ?s so:name ?n }',
+                'expected': 'CONSTRUCT'
+            },
+            {
+                'query': 'PREFIX select: <http://example.com/select#>\nASK { ?s select:insert ?o }',
+                'expected': 'ASK'
+            },
+            {
+                'query': 'PREFIX ex: <http://example.com/#> # DELETE\nINSERT DATA { ex:a ex:b "SELECT" . }',
+                'expected': 'INSERT'
+            },
+            {
+                'query': 'WITH <http://example.com/graph> DELETE { ?s ?p ?o } WHERE { ?s ?p ?o }',
+                'expected': 'DELETE'
+            },
+            {
+                'query': 'DROP SILENT GRAPH <http://example.com/graph>',
+                'expected': 'DROP'
+            },
+            {
+                'query': '# only a comment',
+                'expected': 'SELECT'
             }
         ]
 
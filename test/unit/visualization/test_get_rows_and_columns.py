@@ -219,3 +219,70 @@ class TestGetRowsAndColumns(unittest.TestCase):
         data = rc.opencypher_get_rows_and_columns(res, True)
         self.assertEqual(len(data['columns']), 4)
         self.assertEqual(len(data['rows']), 2)
+
+    def test_opencypher_columns_flatten_nodes_and_relationships(self):
+        res = {
+            "results": [
+                {
+                    "n": {"~id": "22", "~entityType": "node", "~labels": ["airport"],
+                          "~properties": {"code": "SEA", "runways": 3}},
+                    "r": {"~id": "4404", "~entityType": "relationship", "~start": "22", "~end": "1",
+                          "~type": "route", "~properties": {"dist": 2180}}
+                },
+                {
+                    "n": {"~id": "1", "~entityType": "node", "~labels": ["airport"],
+                          "~properties": {"code": "ATL", "runways": 5, "elev": 1026.5}},
+                    "r": None
+                }
+            ]
+        }
+        table = rc.opencypher_get_columns(res, False)
+        self.assertEqual(['n.~id', 'n.~labels', 'n.code', 'n.runways', 'r.~id', 'r.~start', 'r.~end', 'r.~type',
+                          'r.dist', 'n.elev'], table.columns)
+        self.assertEqual(2, len(table))
+        self.assertEqual(['SEA', 'ATL'], table.values['n.code'])
+        self.assertEqual([2180, None], table.values['r.dist'])
+        self.assertEqual([None, 1026.5], table.values['n.elev'])
+        self.assertEqual('int', table.column_type('n.runways'))
+        self.assertEqual('float', table.column_type('n.elev'))
+        self.assertEqual('str', table.column_type('n.code'))
+        self.assertEqual('object', table.column_type('n.~labels'))
+        self.assertEqual([['1', ['airport'], 'ATL', 5, None, None, None, None, None, 1026.5]],
+                         table.rows(1, 5))
+
+    def test_opencypher_columns_null_entity_in_first_row(self):
+        res = {
+            "results": [
+                {"r": None, "d": None},
+                {"r": {"~id": "4404", "~entityType": "relationship", "~start": "22", "~end": "1",
+                       "~type": "route", "~properties": {"dist": 2180}}, "d": None}
+            ]
+        }
+        table = rc.opencypher_get_columns(res, False)
+        self.assertEqual(['d', 'r.~id', 'r.~start', 'r.~end', 'r.~type', 'r.dist'], table.columns)
+        self.assertEqual([None, 2180], table.values['r.dist'])
+        self.assertEqual([None, None], table.values['d'])
+
+    def test_opencypher_columns_bolt(self):
+        res = [
+            {"n": {"code": "SEA", "runways": 3}, "p": [{"code": "SEA"}, {"code": "ATL"}], "c": True},
+            {"n": {"code": "ATL"}, "p": [], "c": False}
+        ]
+        table = rc.opencypher_get_columns(res, True)
+        self.assertEqual(['n.code', 'n.runways', 'p', 'c'], table.columns)
+        self.assertEqual([3, None], table.values['n.runways'])
+        self.assertEqual('bool', table.column_type('c'))
+        self.assertEqual('[["SEA", "ATL"], [3, null], [[{"code": "SEA"}, {"code": "ATL"}], []], [true, false]]',
+                         table.to_json())
+
+    def test_opencypher_columns_empty(self):
+        table = rc.opencypher_get_columns({"results": []}, False)
+        self.assertEqual([], table.columns)
+        self.assertEqual([], table.rows())
+
+    def test_opencypher_columns_to_dataframe(self):
+        res = {"results": [{"a.code": "SEA", "a.runways": 3}, {"a.code": "ATL"}]}
+        df = rc.opencypher_get_columns(res, False).to_dataframe()
+        self.assertEqual(['a.code', 'a.runways'], list(df.columns))
+        self.assertEqual('Int64', str(df['a.runways'].dtype))
+        self.assertEqual(3, df['a.runways'][0])